@@ -10,6 +10,43 @@ Python generation scripts. Uses the Anthropic API (Claude) for:
 - Employee scenario planning
 - Configuration conflict detection
 
+Responses are cached (in-process LRU + on-disk store, see llm_cache.py), so
+repeat runs over the same questionnaire skip identical round trips. Pass
+use_cache=False (or set PAYROLL_AI_NO_CACHE=1) to bypass.
+
+Requests are paced against shared requests/tokens-per-minute budgets and
+transient API errors (429, overloaded, 5xx, connection) are retried with
+jittered backoff before a section falls back to "[AI analysis unavailable]"
+(see llm_scheduler.py).
+
+Every call is recorded in ai.metrics (task, tokens, latency, time to first
+token, cache hits, retries, errors) — see llm_metrics.py for p50/p95 per
+method and a JSON dump.
+
+Methods that return JSON (quality scores, test and employee scenarios) answer
+through a forced tool call with a JSON schema, so results parse on the first
+attempt; parse_json_lenient salvages fenced or truncated text output.
+
+Each method is routed to a model tier with its own output cap (ROUTES):
+high-volume scoring and per-tab commentary use the fast tier, synthesis the
+standard model. Override via PAYROLL_AI_ROUTES / PAYROLL_AI_MODEL_<TIER> or
+PayrollAI(routes={...}); the routed model and tier are recorded in ai.metrics.
+
+Each prompt is prefixed with the few reference passages (references/*.md, BM25
+over heading chunks — see ref_index.py) most relevant to it, within a per-method
+token budget; PayrollAI(retrieval=False) or PAYROLL_AI_NO_RETRIEVAL=1 turns it off.
+
+Structured payloads are embedded in compact form (tabular, deduplicated,
+minified, truncated to a per-method token budget — see prompt_compact.py).
+
+The system prompt (plus optional reference material) is sent as a cacheable
+prefix using the API's prompt caching, and cache read/write token counts are
+accumulated in ai.usage.
+
+The client can be swapped for a recording, replaying or synthetic transport
+(PayrollAI(transport=...) or PAYROLL_AI_TRANSPORT — see llm_transport.py) to
+benchmark pipelines offline.
+
 Usage:
     from ai_helper import PayrollAI
     ai = PayrollAI()  # Uses ANTHROPIC_API_KEY env var
@@ -17,15 +54,147 @@ Usage:
     # Or pass key directly
     ai = PayrollAI(api_key="sk-ant-...")
 
+    # Ground every call in reference docs, cached once per ~5 minutes by the API
+    ai = PayrollAI(reference_material=load_reference_material(["tax-configuration", "wage-types"]))
+
     result = ai.analyze_questionnaire_response(section, question, response)
     narrative = ai.generate_risk_narrative(findings)
     rationale = ai.generate_design_rationale(section, design_decisions)
+
+    # Fan out many independent calls; results come back in input order
+    rationales = ai.batch([("generate_design_rationale", (name, d)) for name, d in sections])
+
+    # Briefing from per-deliverable digests; only changed deliverables are re-summarized
+    briefing = ai.generate_incremental_briefing({"config_workbook": "config.xlsx", "qa_report": "qa.docx"})
+
+    # Score a whole questionnaire's answers in a handful of requests
+    scores = ai.analyze_response_quality_batch([(section, question, answer), ...])
+
+    # Start on the first test scenarios while later ones are still generating
+    for scenario in ai.stream_smart_test_scenarios(config_summary, states):
+        if "error" in scenario:
+            break
+        write_test_row(scenario)
+
+    # Or from async code, with a concurrency cap
+    aai = AsyncPayrollAI(ai, max_concurrency=8)
+    tabs = await aai.gather([("generate_config_commentary", (tab, data)) for tab, data in tabs])
 """
 
 import os
 import json
+import glob
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+from llm_cache import ResponseCache
+from llm_scheduler import Scheduler, shared_client, shared_scheduler
+from llm_metrics import LLMMetrics
+from prompt_compact import compact_payload, estimate_tokens
+from gap_rules import evaluate_gaps, format_gaps
+from config_conflicts import format_conflicts
+from llm_transport import transport_from_env
+from ref_index import retrieve, format_passages
+from digests import ensure_digest, write_digest
+
+REFERENCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "references")
+
+# Prefix of the text every AI method returns (or streams) when the model call fails
+UNAVAILABLE = "[AI analysis unavailable"
+
+# =========================================================================
+# STRUCTURED OUTPUT SCHEMAS (tool input_schema; tool input must be an object,
+# so list results are wrapped in a single array property)
+# =========================================================================
+
+_SCORE = {"type": "integer", "minimum": 1, "maximum": 5}
+_STR_LIST = {"type": "array", "items": {"type": "string"}}
+
+QUALITY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "completeness_score": _SCORE,
+        "clarity_score": _SCORE,
+        "sap_readiness_score": _SCORE,
+        "issues": _STR_LIST,
+        "missing_details": _STR_LIST,
+        "recommendation": {"type": "string"},
+    },
+    "required": ["completeness_score", "clarity_score", "sap_readiness_score",
+                 "issues", "missing_details", "recommendation"],
+}
+
+QUALITY_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analyses": {"type": "array", "items": {
+            "type": "object",
+            "properties": dict(QUALITY_SCHEMA["properties"], id={"type": "integer"}),
+            "required": ["id"] + QUALITY_SCHEMA["required"],
+        }},
+    },
+    "required": ["analyses"],
+}
+
+TEST_SCENARIOS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scenarios": {"type": "array", "items": {
+            "type": "object",
+            "properties": {
+                "test_id": {"type": "string"},
+                "category": {"type": "string", "enum": [
+                    "Regular Pay", "OT", "Tax", "Deduction", "Benefit",
+                    "Garnishment", "Absence", "Posting", "Off-Cycle"]},
+                "description": {"type": "string"},
+                "employee_type": {"type": "string"},
+                "state": {"type": "string"},
+                "inputs": {"type": "object"},
+                "expected": {"type": "object", "properties": {
+                    "gross": {"type": "number"}, "deductions": {"type": "number"},
+                    "taxes": {"type": "number"}, "net": {"type": "number"}}},
+                "sap_transaction": {"type": "string"},
+                "rationale": {"type": "string"},
+            },
+            "required": ["test_id", "category", "description", "employee_type", "state",
+                         "inputs", "expected", "sap_transaction", "rationale"],
+        }},
+    },
+    "required": ["scenarios"],
+}
+
+EMPLOYEE_SCENARIOS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "employees": {"type": "array", "items": {
+            "type": "object",
+            "properties": {
+                "employee_number": {"type": "string"},
+                "name_pattern": {"type": "string"},
+                "ee_group": {"type": "string"},
+                "ee_subgroup": {"type": "string"},
+                "personnel_area": {"type": "string"},
+                "personnel_subarea": {"type": "string"},
+                "residence_state": {"type": "string"},
+                "work_state": {"type": "string"},
+                "payroll_area": {"type": "string"},
+                "work_schedule_rule": {"type": "string"},
+                "pay_type": {"type": "string", "enum": ["salary", "hourly"]},
+                "rate": {"type": "number"},
+                "deductions": {"type": "array", "items": {"type": "object"}},
+                "benefits": _STR_LIST,
+                "special_attributes": _STR_LIST,
+            },
+            "required": ["employee_number", "ee_group", "ee_subgroup", "personnel_area",
+                         "personnel_subarea", "residence_state", "work_state", "payroll_area",
+                         "pay_type", "rate"],
+        }},
+    },
+    "required": ["employees"],
+}
+
 try:
     import anthropic
     HAS_ANTHROPIC = True
@@ -39,6 +208,73 @@ class PayrollAI:
     MODEL = "claude-sonnet-4-5-20250929"
     MAX_TOKENS = 2048
 
+    # Model per tier. Override with PAYROLL_AI_MODEL_FAST / PAYROLL_AI_MODEL_STANDARD.
+    MODEL_TIERS = {
+        "fast": "claude-haiku-4-5-20251001",
+        "standard": MODEL,
+    }
+
+    # task (method name) → (tier, output cap). High-volume scoring and per-tab
+    # commentary go to the fast tier; synthesis stays on the standard model.
+    # Override with PAYROLL_AI_ROUTES="task=tier[:max_tokens],..." or routes={...}.
+    ROUTES = {
+        "analyze_response_quality": ("fast", 1024),
+        "analyze_response_quality_batch": ("fast", 8000),
+        "generate_config_commentary": ("fast", 1500),
+        "suggest_industry_questions": ("fast", 1500),
+        "summarize_deliverable": ("fast", 1000),
+        "generate_industry_profile": ("standard", 2048),
+        "generate_risk_narrative": ("standard", 2048),
+        "generate_design_rationale": ("standard", 2048),
+        "generate_executive_summary": ("standard", 2048),
+        "detect_contradictions": ("standard", 3000),
+        "predict_missing_config": ("standard", 3000),
+        "assess_complexity_risk": ("standard", 3000),
+        "detect_config_conflicts": ("standard", 3000),
+        "review_migration_data": ("standard", 3000),
+        "generate_executive_briefing": ("standard", 3000),
+        "generate_smart_test_scenarios": ("standard", 4000),
+        "stream_smart_test_scenarios": ("standard", 4000),
+        "plan_employee_scenarios": ("standard", 4000),
+        "stream_employee_scenarios": ("standard", 4000),
+    }
+
+    # Batched QA sizing: estimated input tokens per request, items per request,
+    # and output tokens reserved per scored item (capped by the task's route)
+    QA_BATCH_TOKENS = 6000
+    QA_BATCH_MAX_ITEMS = 25
+    QA_TOKENS_PER_ITEM = 220
+
+    # Estimated-token budget for the structure each method embeds in its prompt
+    # (see prompt_compact.py); payloads over budget are truncated deterministically
+    PAYLOAD_BUDGETS = {
+        "detect_contradictions": 12000,
+        "detect_config_conflicts": 12000,
+        "predict_missing_config": 10000,
+        "generate_executive_briefing": 8000,
+        "generate_smart_test_scenarios": 6000,
+        "plan_employee_scenarios": 6000,
+        "review_migration_data": 6000,
+        "summarize_deliverable": 6000,
+    }
+    DEFAULT_PAYLOAD_BUDGET = 4000
+
+    # Estimated-token budget for reference passages retrieved into each prompt
+    # (see ref_index.py); 0 sends none. Executive-audience output needs no SAP detail.
+    REFERENCE_BUDGETS = {
+        "analyze_response_quality": 300,
+        "analyze_response_quality_batch": 600,
+        "generate_config_commentary": 400,
+        "detect_contradictions": 1200,
+        "predict_missing_config": 1200,
+        "detect_config_conflicts": 1200,
+        "generate_executive_summary": 0,
+        "generate_executive_briefing": 0,
+        "summarize_deliverable": 0,
+    }
+    DEFAULT_REFERENCE_BUDGET = 800
+    REFERENCE_PASSAGES = 4
+
     SYSTEM_PROMPT = """You are an expert SAP HCM US Payroll implementation consultant
 with 15+ years of experience configuring SAP ECC payroll (Molga 10) for mid-market
 and enterprise companies. You have deep knowledge of:
@@ -53,31 +289,270 @@ and enterprise companies. You have deep knowledge of:
 - LSMW data migration
 
 You provide concise, actionable analysis in professional consulting language.
-Avoid generic advice — be specific to SAP payroll configuration."""
+Avoid generic advice — be specific to SAP payroll configuration.
+
+Structured inputs are compact JSON: {"columns": [...], "rows": [[...]]} is a list of
+records, "&N" strings stand for the matching entry in "_refs", and "... +N more"
+marks items omitted for length. <reference_passages> are excerpts from the
+project's SAP reference documents — prefer them over general knowledge where they apply."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True, reference_material: Optional[str] = None,
+                 scheduler: Optional[Scheduler] = None, metrics: Optional[LLMMetrics] = None,
+                 routes: Optional[dict] = None, transport=None, retrieval: Optional[bool] = None):
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
-        if HAS_ANTHROPIC and self.api_key:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+        transport = transport or transport_from_env()
+        if transport is not None:
+            # Record/replay/synthetic stand-in (llm_transport.py) — no API key needed
+            self.client = transport
+            self.enabled = True
+        elif HAS_ANTHROPIC and self.api_key:
+            self.client = shared_client(self.api_key)
             self.enabled = True
         else:
             self.client = None
             self.enabled = False
-
-    def _call_llm(self, prompt: str, max_tokens: int = None) -> str:
-        """Call the Anthropic API. Returns empty string if unavailable."""
+        # Stand-in transports never share the default on-disk cache with real API calls;
+        # an explicitly passed cache keys their entries by the transport's scope
+        self.cache_scope = getattr(transport, "cache_scope", None) if transport is not None else None
+        self.use_cache = (use_cache and os.environ.get("PAYROLL_AI_NO_CACHE") != "1"
+                          and (cache is not None or self.cache_scope is None))
+        self.cache = (cache or ResponseCache()) if self.use_cache else None
+        self.reference_material = reference_material
+        # Retrieved passages are redundant when the full reference set is in the system prompt
+        if retrieval is None:
+            retrieval = not reference_material and os.environ.get("PAYROLL_AI_NO_RETRIEVAL") != "1"
+        self.retrieval = retrieval
+        self._system = self._build_system_blocks()
+        self._system_text = "\n\n".join(block["text"] for block in self._system)
+        self.scheduler = scheduler or shared_scheduler(self.api_key)
+        self.metrics = metrics or LLMMetrics()
+        self.model_tiers, self.routes = self._load_routing(routes)
+        self._usage_lock = threading.Lock()
+        self.usage = {"calls": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0,
+                      "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+
+    def _load_routing(self, routes: Optional[dict]):
+        """Tier models and routes from class defaults, then env, then the routes argument
+        ({task: tier} or {task: (tier, max_tokens)})."""
+        tiers = dict(self.MODEL_TIERS)
+        for tier in tiers:
+            tiers[tier] = os.environ.get(f"PAYROLL_AI_MODEL_{tier.upper()}", tiers[tier])
+        table = dict(self.ROUTES)
+        overrides = {}
+        for entry in filter(None, os.environ.get("PAYROLL_AI_ROUTES", "").split(",")):
+            task, _, spec = entry.strip().partition("=")
+            tier, _, cap = spec.partition(":")
+            overrides[task] = (tier, int(cap)) if cap else tier
+        overrides.update(routes or {})
+        for task, spec in overrides.items():
+            tier, cap = spec if isinstance(spec, tuple) else (spec, None)
+            if tier not in tiers:
+                raise ValueError(f"Unknown model tier {tier!r} for {task} (have {sorted(tiers)})")
+            table[task] = (tier, cap or table.get(task, (tier, self.MAX_TOKENS))[1])
+        return tiers, table
+
+    def _route(self, task: str, max_tokens: Optional[int]):
+        """(tier, model, max_tokens) for a task. An explicit max_tokens wins over the route cap."""
+        tier, cap = self.routes.get(task, ("standard", self.MAX_TOKENS))
+        return tier, self.model_tiers[tier], max_tokens or cap
+
+    def _build_system_blocks(self) -> list:
+        """Stable system prefix as content blocks, with a cache breakpoint on the last block.
+
+        The API only caches prefixes above a model-specific minimum (~1024 tokens for
+        Sonnet), so the system prompt alone is usually too short to cache — attach
+        reference_material to make the prefix worth caching across dozens of calls.
+        """
+        blocks = [{"type": "text", "text": self.SYSTEM_PROMPT}]
+        if self.reference_material:
+            blocks.append({"type": "text",
+                           "text": f"<reference_material>\n{self.reference_material}\n</reference_material>"})
+        blocks[-1]["cache_control"] = {"type": "ephemeral"}
+        return blocks
+
+    def _record_usage(self, response, rec: dict):
+        usage = getattr(response, "usage", None)
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            for field in ("input_tokens", "output_tokens",
+                          "cache_read_input_tokens", "cache_creation_input_tokens"):
+                rec[field] = getattr(usage, field, 0) or 0
+                self.usage[field] += rec[field]
+
+    def _retry_counter(self, rec: dict):
+        def on_retry(exc, attempt, delay):
+            rec["retries"] += 1
+            with self._usage_lock:
+                self.usage["retries"] += 1
+        return on_retry
+
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Rough input-token estimate (~4 chars/token) for tokens-per-minute pacing."""
+        return estimate_tokens(self._system_text) + estimate_tokens(prompt)
+
+    def _payload(self, data, task: str) -> str:
+        """Compact encoding of a prompt payload, held to the task's token budget."""
+        return compact_payload(data, self.PAYLOAD_BUDGETS.get(task, self.DEFAULT_PAYLOAD_BUDGET))
+
+    def _ground(self, prompt: str, task: str) -> str:
+        """Prefix the prompt with the reference passages most relevant to it, within the
+        task's REFERENCE_BUDGETS allowance."""
+        budget = self.REFERENCE_BUDGETS.get(task, self.DEFAULT_REFERENCE_BUDGET)
+        if not self.retrieval or not budget:
+            return prompt
+        passages = format_passages(retrieve(prompt, self.REFERENCE_PASSAGES, budget))
+        return f"{passages}\n\n{prompt}" if passages else prompt
+
+    def cache_report(self) -> dict:
+        """Prompt-cache effectiveness: token counts plus share of input served from cache."""
+        u = dict(self.usage)
+        prompt_total = u["input_tokens"] + u["cache_read_input_tokens"] + u["cache_creation_input_tokens"]
+        u["cache_read_ratio"] = round(u["cache_read_input_tokens"] / prompt_total, 3) if prompt_total else 0.0
+        return u
+
+    def _call_llm(self, prompt: str, max_tokens: int = None, use_cache: bool = True,
+                  task: str = "other", tool: Optional[dict] = None) -> str:
+        """Call the Anthropic API. Returns empty string if unavailable.
+        Identical requests are served from the response cache unless use_cache=False.
+        task labels the call in self.metrics (normally the calling method's name).
+        With tool={"name", "description", "input_schema"} the model is forced to answer
+        through that tool, and the tool input comes back as JSON text."""
         if not self.enabled:
             return ""
+        prompt = self._ground(prompt, task)
+        tier, model, max_tokens = self._route(task, max_tokens)
+        rec = self.metrics.start(task, model, prompt, max_tokens)
+        rec["tier"] = tier
+        request = {}
+        if tool:
+            request = {"tools": [tool], "tool_choice": {"type": "tool", "name": tool["name"]}}
+        key = None
+        if self.cache is not None and use_cache:
+            key = self.cache.make_key(model, self._system_text, max_tokens, prompt,
+                                      extra=self._cache_extra(tool))
+            cached = self.cache.get(key)
+            if cached is not None:
+                rec["cache_hit"] = True
+                self.metrics.finish(rec)
+                return cached
         try:
-            response = self.client.messages.create(
-                model=self.MODEL,
-                max_tokens=max_tokens or self.MAX_TOKENS,
-                system=self.SYSTEM_PROMPT,
-                messages=[{"role": "user", "content": prompt}]
+            response = self.scheduler.run(
+                lambda: self.client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    system=self._system,
+                    messages=[{"role": "user", "content": prompt}],
+                    **request
+                ),
+                tokens=self._estimate_tokens(prompt),
+                on_retry=self._retry_counter(rec),
             )
-            return response.content[0].text
+            self._record_usage(response, rec)
+            text = _response_text(response)
         except Exception as e:
-            return f"[AI analysis unavailable: {e}]"
+            # Non-retryable or retries exhausted. Failures are never cached — the next run retries
+            rec["error"] = f"{type(e).__name__}: {e}"
+            self.metrics.finish(rec)
+            return f"{UNAVAILABLE}: {e}]"
+        self.metrics.finish(rec)
+        if key is not None:
+            self.cache.put(key, text)
+        return text
+
+    def _cache_extra(self, tool: Optional[dict] = None) -> Optional[dict]:
+        extra = {}
+        if tool:
+            extra["tool"] = tool
+        if self.cache_scope is not None:
+            extra["transport"] = self.cache_scope
+        return extra or None
+
+    def _stream_llm(self, prompt: str, max_tokens: int = None, use_cache: bool = True,
+                    task: str = "other"):
+        """Streaming _call_llm: yields text chunks as they arrive.
+        A cache hit yields the whole cached text at once; the full text of a
+        completed stream is cached like a regular call. Yields nothing if unavailable."""
+        if not self.enabled:
+            return
+        prompt = self._ground(prompt, task)
+        tier, model, max_tokens = self._route(task, max_tokens)
+        rec = self.metrics.start(task, model, prompt, max_tokens)
+        rec["tier"] = tier
+        key = None
+        if self.cache is not None and use_cache:
+            key = self.cache.make_key(model, self._system_text, max_tokens, prompt,
+                                      extra=self._cache_extra())
+            cached = self.cache.get(key)
+            if cached is not None:
+                rec["cache_hit"] = True
+                self.metrics.finish(rec)
+                yield cached
+                return
+        parts = []
+        attempt = 0
+        on_retry = self._retry_counter(rec)
+        while True:
+            self.scheduler.pace(self._estimate_tokens(prompt))
+            try:
+                with self.client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    system=self._system,
+                    messages=[{"role": "user", "content": prompt}]
+                ) as stream:
+                    for text in stream.text_stream:
+                        if not parts:
+                            self.metrics.first_token(rec)
+                        parts.append(text)
+                        yield text
+                    self._record_usage(stream.get_final_message(), rec)
+                break
+            except Exception as e:
+                # Only retry before the first chunk — text already yielded can't be taken back
+                delay = None if parts else self.scheduler.backoff(e, attempt)
+                if delay is None:
+                    # Partial streams are never cached — the next run retries
+                    rec["error"] = f"{type(e).__name__}: {e}"
+                    self.metrics.finish(rec)
+                    yield f"{UNAVAILABLE}: {e}]"
+                    return
+                on_retry(e, attempt, delay)
+                self.scheduler.sleep(delay)
+                attempt += 1
+        self.metrics.finish(rec)
+        if key is not None:
+            self.cache.put(key, "".join(parts))
+
+    def _call_structured(self, prompt: str, tool_name: str, schema: dict,
+                         max_tokens: int = None, task: str = "other"):
+        """Schema-constrained call via a forced tool. Returns (data, text): data is the
+        parsed object (None if unavailable or unparseable), text the raw JSON/error text."""
+        tool = {"name": tool_name, "description": f"Record the result ({task}).", "input_schema": schema}
+        text = self._call_llm(prompt, max_tokens=max_tokens, task=task, tool=tool)
+        return parse_json_lenient(text), text
+
+    def _call_json_array(self, prompt: str, tool_name: str, schema: dict, field: str,
+                         max_tokens: int = None, task: str = "other") -> str:
+        """Structured call for methods that return a JSON array as text. Always returns
+        valid JSON (or "" / the unavailable marker), so callers can json.loads it directly."""
+        data, text = self._call_structured(prompt, tool_name, schema, max_tokens=max_tokens, task=task)
+        if data is None:
+            return text
+        return json.dumps(_unwrap(data, field), indent=2)
+
+    def batch(self, calls: list, max_concurrency: int = 8) -> list:
+        """Run independent PayrollAI calls concurrently; results in input order.
+
+        calls: [(method_name, args) or (method_name, args, kwargs), ...]
+        Wall time is roughly the slowest call rather than the sum of all calls.
+        """
+        def run(call):
+            name, args, kwargs = _unpack_call(call)
+            return getattr(self, name)(*args, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(calls) or 1))) as pool:
+            return list(pool.map(run, calls))
 
     # =========================================================================
     # QUESTIONNAIRE AI FEATURES
@@ -98,7 +573,7 @@ industry-specific guidance note (3-5 paragraphs) covering:
 5. Key risk areas to probe during discovery
 
 Keep it under 500 words. Use bullet points sparingly."""
-        return self._call_llm(prompt)
+        return self._call_llm(prompt, task="generate_industry_profile")
 
     def suggest_industry_questions(self, industry: str) -> str:
         """Suggest additional industry-specific questions for the questionnaire."""
@@ -114,7 +589,7 @@ Examples of industry-specific concerns:
 - Technology: RSU/stock options, global mobility, remote work tax nexus
 
 Only include questions relevant to {industry}."""
-        return self._call_llm(prompt)
+        return self._call_llm(prompt, task="suggest_industry_questions")
 
     # =========================================================================
     # QA AI FEATURES
@@ -143,18 +618,96 @@ Return JSON format:
   "missing_details": ["what additional info is needed"],
   "recommendation": "one sentence recommendation"
 }}"""
-        result = self._call_llm(prompt)
-        try:
-            return json.loads(result)
-        except:
-            return {"completeness_score": 0, "raw_analysis": result}
+        data, result = self._call_structured(prompt, "record_quality_analysis", QUALITY_SCHEMA,
+                                             task="analyze_response_quality")
+        if isinstance(data, dict):
+            return data
+        return {"completeness_score": 0, "raw_analysis": result}
+
+    def analyze_response_quality_batch(self, items: list,
+                                       token_budget: int = None) -> list:
+        """Batched analyze_response_quality: many answers scored per request.
+
+        items: [(section, question, response), ...]. Returns one dict per item, in
+        input order, with the same fields as analyze_response_quality. Batches are
+        packed up to token_budget estimated input tokens (QA_BATCH_TOKENS by default)
+        and run concurrently. Items a batch reply leaves out are re-scored singly; if
+        the batch request itself fails, its items get the unavailable result
+        ({"completeness_score": 0, "raw_analysis": ...}) without further calls.
+        """
+        batches = self._plan_qa_batches(items, token_budget or self.QA_BATCH_TOKENS)
+        outputs = self.batch([("_analyze_quality_chunk", (chunk,)) for chunk in batches])
+        results = [None] * len(items)
+        for scored in outputs:
+            for idx, analysis in scored.items():
+                results[idx] = analysis
+        for idx, item in enumerate(items):
+            if results[idx] is None:
+                results[idx] = self.analyze_response_quality(*item)
+        return results
+
+    def _plan_qa_batches(self, items: list, token_budget: int) -> list:
+        """Greedy packing of (index, item) into batches under the input-token budget,
+        capped so each batch's answer fits in QA_BATCH_MAX_ITEMS result objects."""
+        batches, current, used = [], [], 0
+        for idx, (section, question, response) in enumerate(items):
+            cost = (len(section) + len(question) + len(response)) // 4 + 20
+            if current and (used + cost > token_budget or len(current) >= self.QA_BATCH_MAX_ITEMS):
+                batches.append(current)
+                current, used = [], 0
+            current.append((idx, (section, question, response)))
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _analyze_quality_chunk(self, chunk: list) -> dict:
+        """Score one batch; returns {item index: analysis dict} for items the model returned,
+        or the unavailable result for every item if the request failed."""
+        entries = "\n\n".join(
+            f"[{idx}]\nSection: {section}\nQuestion: {question}\nResponse: {response}"
+            for idx, (section, question, response) in chunk)
+        prompt = f"""Analyze each of these SAP payroll questionnaire responses:
+
+{entries}
+
+Evaluate each on a 1-5 scale:
+1. Completeness: Does it provide enough detail for SAP configuration?
+2. Clarity: Is it unambiguous? Could it be misinterpreted?
+3. SAP Readiness: Can this be directly translated to SAP table values?
+
+Return a JSON array with one object per response, using the bracketed number as "id":
+[
+  {{
+    "id": <number>,
+    "completeness_score": <1-5>,
+    "clarity_score": <1-5>,
+    "sap_readiness_score": <1-5>,
+    "issues": ["list of specific issues found"],
+    "missing_details": ["what additional info is needed"],
+    "recommendation": "one sentence recommendation"
+  }}
+]"""
+        cap = self._route("analyze_response_quality_batch", None)[2]
+        max_tokens = min(cap, 200 + self.QA_TOKENS_PER_ITEM * len(chunk))
+        data, text = self._call_structured(prompt, "record_quality_analyses", QUALITY_BATCH_SCHEMA,
+                                           max_tokens=max_tokens, task="analyze_response_quality_batch")
+        if not text or text.startswith(UNAVAILABLE):
+            # Re-scoring singly would hit the same failure once per item
+            return {idx: {"completeness_score": 0, "raw_analysis": text} for idx, _ in chunk}
+        wanted = {idx for idx, _ in chunk}
+        scored = {}
+        for analysis in _unwrap(data, "analyses"):
+            if isinstance(analysis, dict) and analysis.get("id") in wanted:
+                scored[analysis.pop("id")] = analysis
+        return scored
 
     def detect_contradictions(self, responses: dict) -> str:
         """Detect contradictions across questionnaire sections."""
         prompt = f"""Review these SAP payroll questionnaire responses across sections
 and identify any contradictions, inconsistencies, or logical conflicts:
 
-{json.dumps(responses, indent=2)}
+{self._payload(responses, "detect_contradictions")}
 
 For each contradiction found, explain:
 1. Which sections conflict
@@ -163,7 +716,7 @@ For each contradiction found, explain:
 4. How to resolve it
 
 If no contradictions found, say "No contradictions detected." """
-        return self._call_llm(prompt, max_tokens=3000)
+        return self._call_llm(prompt, task="detect_contradictions")
 
     def generate_risk_narrative(self, findings: list) -> str:
         """Generate a risk assessment narrative from QA findings."""
@@ -171,7 +724,7 @@ If no contradictions found, say "No contradictions detected." """
 write a 2-3 paragraph executive risk assessment narrative:
 
 Findings:
-{json.dumps(findings, indent=2)}
+{self._payload(findings, "generate_risk_narrative")}
 
 The narrative should:
 1. Summarize the overall risk level (Low/Medium/High)
@@ -180,26 +733,42 @@ The narrative should:
 4. Estimate the effort to resolve (hours/days)
 
 Write in professional consulting language suitable for a project steering committee."""
-        return self._call_llm(prompt)
+        return self._call_llm(prompt, task="generate_risk_narrative")
+
+    def predict_missing_config(self, answered_sections: dict, use_llm: str = "auto") -> str:
+        """Predict what configuration areas might be missing based on what was answered.
+
+        Deterministic gap rules (gap_rules.json) run locally first. With use_llm="auto"
+        the LLM is only asked to adjudicate rules left ambiguous by hedged answers;
+        "always" also asks it for gaps beyond the rules, "never" stays fully local.
+        Works without an API key (rule-based findings only).
+        """
+        gaps, ambiguous = evaluate_gaps(answered_sections)
+        report = format_gaps(gaps)
+        if use_llm == "never" or not self.enabled or (use_llm == "auto" and not ambiguous):
+            if ambiguous:
+                report += "\n\n" + format_gaps(ambiguous, "Possible gaps (answers hedged — confirm with client)")
+            return report
 
-    def predict_missing_config(self, answered_sections: dict) -> str:
-        """Predict what configuration areas might be missing based on what was answered."""
         prompt = f"""Based on what was answered in this SAP payroll questionnaire,
 predict what configuration areas are likely MISSING or under-specified:
 
 Answered sections summary:
-{json.dumps(answered_sections, indent=2)}
-
-Consider:
-- If they mention CA employees but no CA daily OT rules → likely gap
-- If they mention union but no H&W fund or pension → likely gap
-- If they mention multi-state but no reciprocity → likely gap
-- If they mention 401k but no match formula tiers → likely gap
-- If they mention shifts but no shift differential amounts → likely gap
-
+{self._payload(answered_sections, "predict_missing_config")}
+
+These gaps were already found by deterministic rules — do not repeat them:
+{self._payload([g["gap"] for g in gaps], "predict_missing_config")}
+
+These possible gaps are covered only by hedged answers — decide for each whether
+it is a real gap:
+{self._payload([{"id": g["id"], "gap": g["gap"], "evidence": g["evidence"]} for g in ambiguous],
+               "predict_missing_config")}
+""" + ("""
+Then list any other gaps the rules could not catch.
+""" if use_llm == "always" else "") + """
 List each predicted gap with severity (Critical/Warning/Info) and what
 questions to ask the client to fill the gap."""
-        return self._call_llm(prompt, max_tokens=3000)
+        return report + "\n\n" + self._call_llm(prompt, task="predict_missing_config")
 
     # =========================================================================
     # FUNCSPEC AI FEATURES
@@ -213,7 +782,7 @@ decisions were made — not just WHAT they are:
 
 Section: {section}
 Design Decisions:
-{json.dumps(decisions, indent=2)}
+{self._payload(decisions, "generate_design_rationale")}
 
 The rationale should:
 1. Explain the business driver behind each decision
@@ -222,14 +791,14 @@ The rationale should:
 4. Reference relevant SAP tables/transactions
 
 Write in first-person plural ("We recommend..." / "The design leverages...")."""
-        return self._call_llm(prompt)
+        return self._call_llm(prompt, task="generate_design_rationale")
 
     def assess_complexity_risk(self, config_summary: dict) -> str:
         """Assess implementation complexity and risk for each funcspec area."""
         prompt = f"""Assess the implementation complexity and risk for this
 SAP payroll configuration:
 
-{json.dumps(config_summary, indent=2)}
+{self._payload(config_summary, "assess_complexity_risk")}
 
 For each area, provide:
 1. Complexity rating: Simple / Moderate / Complex / Very Complex
@@ -239,7 +808,7 @@ For each area, provide:
 5. Recommended testing approach
 
 Format as a table with columns: Area | Complexity | Risk | Effort (hrs) | Key Risks | Test Approach"""
-        return self._call_llm(prompt, max_tokens=3000)
+        return self._call_llm(prompt, task="assess_complexity_risk")
 
     def generate_executive_summary(self, company_name: str,
                                     scope_summary: dict) -> str:
@@ -248,7 +817,7 @@ Format as a table with columns: Area | Complexity | Risk | Effort (hrs) | Key Ri
 Payroll Functional Specification for {company_name}:
 
 Scope:
-{json.dumps(scope_summary, indent=2)}
+{self._payload(scope_summary, "generate_executive_summary")}
 
 The summary should:
 1. State the project objective (SAP ECC US Payroll implementation)
@@ -259,7 +828,7 @@ The summary should:
 6. Provide a high-level timeline reference
 
 Write in executive briefing style — concise, authoritative, no jargon."""
-        return self._call_llm(prompt)
+        return self._call_llm(prompt, task="generate_executive_summary")
 
     # =========================================================================
     # CONFIG WORKBOOK AI FEATURES
@@ -272,7 +841,7 @@ this SAP payroll configuration tab:
 
 Tab: {tab_name}
 Configuration Data:
-{json.dumps(config_data, indent=2)}
+{self._payload(config_data, "generate_config_commentary")}
 
 The commentary should:
 1. Summarize what was configured and why
@@ -281,14 +850,37 @@ The commentary should:
 4. Recommend validation steps
 
 Write in technical consulting language."""
-        return self._call_llm(prompt)
+        return self._call_llm(prompt, task="generate_config_commentary")
+
+    def detect_config_conflicts(self, all_tabs_summary: dict,
+                                local_conflicts: Optional[list] = None) -> str:
+        """Detect potential conflicts across config workbook tabs.
+
+        Pass local_conflicts (from config_conflicts.detect_conflicts) to keep the
+        mechanical checks local: the LLM then only explains impact and fixes for
+        those findings, and without an API key the local report is returned as-is.
+        """
+        if local_conflicts is not None:
+            report = format_conflicts(local_conflicts)
+            if not self.enabled or not local_conflicts:
+                return report
+            prompt = f"""These cross-tab conflicts were found mechanically in an SAP payroll
+configuration workbook:
+
+{self._payload(local_conflicts, "detect_config_conflicts")}
+
+Workbook summary for context:
+{self._payload(all_tabs_summary, "detect_config_conflicts")}
+
+For each conflict, explain in consulting language what will go wrong in
+payroll if it ships (which infotypes, schema steps or postings fail), and
+how to fix it in SAP. Order by go-live impact. Do not list new conflicts."""
+            return report + "\n\n" + self._call_llm(prompt, task="detect_config_conflicts")
 
-    def detect_config_conflicts(self, all_tabs_summary: dict) -> str:
-        """Detect potential conflicts across config workbook tabs."""
         prompt = f"""Review this SAP payroll configuration workbook summary
 and identify potential cross-tab conflicts:
 
-{json.dumps(all_tabs_summary, indent=2)}
+{self._payload(all_tabs_summary, "detect_config_conflicts")}
 
 Common conflict patterns to check:
 - Wage types assigned to subgroups that don't exist in enterprise structure
@@ -301,16 +893,29 @@ Common conflict patterns to check:
 
 For each conflict, explain what it is, which tabs are involved,
 and how to fix it."""
-        return self._call_llm(prompt, max_tokens=3000)
+        return self._call_llm(prompt, task="detect_config_conflicts")
 
     def generate_smart_test_scenarios(self, config_summary: dict,
                                        states: list) -> str:
         """Generate intelligent test scenarios based on actual configuration."""
-        prompt = f"""Based on this SAP payroll configuration, generate 15-20
+        return self._call_json_array(self._test_scenarios_prompt(config_summary, states),
+                                     "record_test_scenarios", TEST_SCENARIOS_SCHEMA, "scenarios",
+                                     task="generate_smart_test_scenarios")
+
+    def stream_smart_test_scenarios(self, config_summary: dict, states: list, parse: bool = True):
+        """Streaming generate_smart_test_scenarios: yields each scenario dict as soon as
+        its closing brace arrives (or raw text chunks with parse=False). A failed call
+        ends with an {"error": ...} record."""
+        chunks = self._stream_llm(self._test_scenarios_prompt(config_summary, states),
+                                  task="stream_smart_test_scenarios")
+        return iter_json_array(chunks) if parse else chunks
+
+    def _test_scenarios_prompt(self, config_summary: dict, states: list) -> str:
+        return f"""Based on this SAP payroll configuration, generate 15-20
 detailed test scenarios that cover the most critical and edge-case situations:
 
 Configuration:
-{json.dumps(config_summary, indent=2)}
+{self._payload(config_summary, "generate_smart_test_scenarios")}
 Operating States: {', '.join(states)}
 
 For each test scenario, provide:
@@ -330,7 +935,6 @@ Prioritize scenarios that:
 4. Test year-end (W-2 box mapping, GTL imputed income)
 
 Format as JSON array."""
-        return self._call_llm(prompt, max_tokens=4000)
 
     # =========================================================================
     # MIGRATION FILE AI FEATURES
@@ -338,11 +942,23 @@ Format as JSON array."""
 
     def plan_employee_scenarios(self, config_summary: dict) -> str:
         """Plan employee scenarios that thoroughly test all configuration."""
-        prompt = f"""Based on this SAP payroll configuration, plan 12-18
+        return self._call_json_array(self._employee_scenarios_prompt(config_summary),
+                                     "record_employee_scenarios", EMPLOYEE_SCENARIOS_SCHEMA, "employees",
+                                     task="plan_employee_scenarios")
+
+    def stream_employee_scenarios(self, config_summary: dict, parse: bool = True):
+        """Streaming plan_employee_scenarios: yields each employee dict as it completes
+        (or raw text chunks with parse=False). A failed call ends with an {"error": ...} record."""
+        chunks = self._stream_llm(self._employee_scenarios_prompt(config_summary),
+                                  task="stream_employee_scenarios")
+        return iter_json_array(chunks) if parse else chunks
+
+    def _employee_scenarios_prompt(self, config_summary: dict) -> str:
+        return f"""Based on this SAP payroll configuration, plan 12-18
 employee scenarios that collectively cover ALL configured elements:
 
 Configuration:
-{json.dumps(config_summary, indent=2)}
+{self._payload(config_summary, "plan_employee_scenarios")}
 
 For each employee scenario, specify:
 - Employee # and name pattern
@@ -369,14 +985,13 @@ Design the scenarios so that:
 10. Executive for high-comp scenarios (SS wage base, additional Medicare)
 
 Format as JSON array."""
-        return self._call_llm(prompt, max_tokens=4000)
 
     def review_migration_data(self, data_summary: dict) -> str:
         """Review generated migration data for completeness and realism."""
         prompt = f"""Review this SAP payroll migration data summary and
 identify any issues:
 
-{json.dumps(data_summary, indent=2)}
+{self._payload(data_summary, "review_migration_data")}
 
 Check for:
 1. Unrealistic salary amounts (too low for executives, too high for hourly)
@@ -390,7 +1005,7 @@ Check for:
 9. Garnishment employees without IT0194 records
 
 For each issue, state what it is, which employee is affected, and how to fix it."""
-        return self._call_llm(prompt, max_tokens=3000)
+        return self._call_llm(prompt, task="review_migration_data")
 
     # =========================================================================
     # PIPELINE AI FEATURES
@@ -401,7 +1016,7 @@ For each issue, state what it is, which employee is affected, and how to fix it.
         prompt = f"""Write a 1-page executive briefing for this SAP HCM Payroll
 implementation project based on all generated documents:
 
-{json.dumps(project_data, indent=2)}
+{self._payload(project_data, "generate_executive_briefing")}
 
 Structure:
 1. **Project Overview** (2-3 sentences)
@@ -414,13 +1029,282 @@ Structure:
 7. **Timeline Impact** (estimated effort for remaining manual items)
 
 Write for a CFO/VP HR audience — business-focused, minimal SAP jargon."""
-        return self._call_llm(prompt, max_tokens=3000)
+        return self._call_llm(prompt, task="generate_executive_briefing")
+
+    def summarize_deliverable(self, digest: dict, previous: Optional[dict] = None) -> str:
+        """Briefing-ready summary of one deliverable digest (see digests.py). Given the
+        previously stored summary, only the sections that changed since are sent."""
+        def facts(names):
+            return {n: {k: v for k, v in digest["sections"][n].items() if k != "hash"} for n in names}
+
+        if previous and previous.get("section_hashes"):
+            before = previous["section_hashes"]
+            changed = [n for n, sec in digest["sections"].items() if before.get(n) != sec["hash"]]
+            removed = [n for n in before if n not in digest["sections"]]
+            prompt = f"""This is the current briefing summary of the {digest["kind"]} deliverable:
+
+{previous["text"]}
+
+These sections have changed since (current facts):
+{self._payload(facts(changed), "summarize_deliverable")}
+{f"Removed sections: {', '.join(removed)}" if removed else ""}
+
+Return the updated summary in the same format and length, changing only what these facts affect."""
+        else:
+            prompt = f"""Summarize this {digest["kind"]} deliverable for an executive briefing in
+120-200 words: scope figures (states, wage types, employees, tabs and row counts),
+notable configuration choices, and manual or open items. Facts only, no recommendations.
+
+Digest (one entry per tab/section):
+{self._payload(facts(digest["sections"]), "summarize_deliverable")}"""
+        return self._call_llm(prompt, task="summarize_deliverable")
+
+    def generate_incremental_briefing(self, artifacts: dict, scope: Optional[dict] = None) -> str:
+        """generate_executive_briefing assembled from per-deliverable digest summaries.
+
+        artifacts: {kind: path} for the QA report, funcspec, config workbook and
+        migration file. Summaries are stored in each <artifact>.digest.json and only
+        deliverables whose digest changed are re-summarized, so regenerating after one
+        tab changes costs one small update call plus the briefing itself. If an update
+        fails, the deliverable's previous summary is used.
+        """
+        summaries = {}
+        for kind, path in artifacts.items():
+            digest = ensure_digest(path, kind)
+            stored = digest.get("summary")
+            if not stored or stored.get("content_hash") != digest["content_hash"]:
+                text = self.summarize_deliverable(digest, stored)
+                if not text or text.startswith(UNAVAILABLE):
+                    # Brief from the previous (stale) summary rather than drop the
+                    # deliverable; its hash still differs, so the next run retries
+                    if stored:
+                        summaries[kind] = stored["text"]
+                    continue
+                stored = {"content_hash": digest["content_hash"], "text": text,
+                          "section_hashes": {n: sec["hash"] for n, sec in digest["sections"].items()}}
+                write_digest(path, dict(digest, summary=stored))
+            summaries[kind] = stored["text"]
+        if not summaries:
+            return ""
+        return self.generate_executive_briefing({"scope": scope or {}, "deliverables": summaries})
+
+
+# =========================================================================
+# STREAMING JSON
+# =========================================================================
+
+def iter_json_array(chunks):
+    """Yield the elements of a top-level JSON array of objects from an iterable of text
+    chunks as each element completes. Text before the opening '[{' (prose, a bracketed
+    aside, a ```json fence) is skipped; elements that fail to parse are skipped rather
+    than ending the stream. If the stream fails, {"error": "[AI analysis unavailable: ...]"}
+    is yielded last so callers can tell a failed stream from a short one."""
+    buf = ""
+    pos = 0            # scan position in buf
+    start = None       # start of the current element
+    depth = 0          # 0 = before array, 1 = inside array, >1 = inside an element
+    in_str = escape = done = False
+    for chunk in chunks:
+        if done:
+            # Keep draining so the producer finishes (records usage, fills the cache)
+            continue
+        if chunk.startswith(UNAVAILABLE):
+            # _stream_llm's failure marker — a whole chunk, never part of the array
+            yield {"error": chunk}
+            done = True
+            continue
+        buf += chunk
+        while pos < len(buf) and not done:
+            ch = buf[pos]
+            if in_str:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_str = False
+            elif depth == 0:
+                if ch == "[":
+                    rest = buf[pos + 1:].lstrip()
+                    if not rest:
+                        break  # wait for the next chunk to see what the bracket opens
+                    if rest[0] == "{":
+                        depth = 1
+            elif ch == '"':
+                in_str = True
+                if start is None:
+                    start = pos
+            elif ch in "{[":
+                if depth == 1 and start is None:
+                    start = pos
+                depth += 1
+            elif ch in "}]":
+                depth -= 1
+                if depth == 0:
+                    # End of the array: flush a trailing scalar element, then stop
+                    if start is not None:
+                        yield from _parse_element(buf[start:pos])
+                    done = True
+                if depth == 1 and start is not None:
+                    # Object/array element closed — emit it without waiting for the comma
+                    yield from _parse_element(buf[start:pos + 1])
+                    buf, pos, start = buf[pos + 1:], -1, None
+            elif ch == "," and depth == 1:
+                if start is not None:
+                    yield from _parse_element(buf[start:pos])
+                # Drop consumed text so the buffer stays one element long
+                buf, pos, start = buf[pos + 1:], -1, None
+            elif depth == 1 and start is None and not ch.isspace():
+                start = pos
+            pos += 1
+
+
+def _parse_element(text):
+    try:
+        yield json.loads(text)
+    except ValueError:
+        return
+
+
+def parse_json_lenient(text: str):
+    """Parse JSON from model text: tolerates ```json fences, leading/trailing prose and
+    output truncated at max_tokens (cut back to the last complete member, then closed).
+    Returns None when nothing usable is found."""
+    if not text:
+        return None
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    stack = []
+    in_str = escape = False
+    safe = None  # (end index, open brackets) of the last point where the value is complete-able
+    for pos in range(start, len(text)):
+        ch = text[pos]
+        if in_str:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            if len(stack) == 1:
+                # Only the outermost container may close empty; an empty trailing element is noise
+                safe = (pos + 1, list(stack))
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                try:
+                    return json.loads(text[start:pos + 1])
+                except ValueError:
+                    return None
+            safe = (pos + 1, list(stack))
+        elif ch == ",":
+            safe = (pos, list(stack))
+    if safe is None:
+        return None
+    end, open_brackets = safe
+    try:
+        return json.loads(text[start:end] + "".join(reversed(open_brackets)))
+    except ValueError:
+        return None
+
+
+def _unwrap(data, field: str) -> list:
+    """List payload from a structured result: {field: [...]} from a tool, or a bare list."""
+    if isinstance(data, dict):
+        data = data.get(field, [])
+    return data if isinstance(data, list) else []
+
+
+def _response_text(response) -> str:
+    """Tool input (as JSON) if the model answered through a tool, else the text blocks."""
+    texts = []
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use":
+            return json.dumps(block.input)
+        if getattr(block, "text", None) is not None:
+            texts.append(block.text)
+    return "".join(texts)
+
+
+# =========================================================================
+# ASYNC FAN-OUT
+# =========================================================================
+
+def _unpack_call(call):
+    name, args = call[0], tuple(call[1]) if len(call) > 1 else ()
+    kwargs = call[2] if len(call) > 2 else {}
+    return name, args, kwargs
+
+
+class AsyncPayrollAI:
+    """Async facade over PayrollAI with a semaphore-bounded concurrency limit.
+
+    Every public PayrollAI method is available as a coroutine with the same
+    signature (await aai.generate_design_rationale(section, decisions)). Calls run
+    the sync method in a worker thread, so caching and the sync API are shared.
+    """
+
+    def __init__(self, ai: Optional[PayrollAI] = None, max_concurrency: int = 8, **kwargs):
+        self.ai = ai or PayrollAI(**kwargs)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+
+    def _sem(self) -> asyncio.Semaphore:
+        # One semaphore per event loop, so the instance survives repeated asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def call(self, method: str, *args, **kwargs):
+        async with self._sem():
+            return await asyncio.to_thread(getattr(self.ai, method), *args, **kwargs)
+
+    async def gather(self, calls: list, return_exceptions: bool = False) -> list:
+        """Run [(method_name, args[, kwargs]), ...] concurrently; results in input order."""
+        tasks = [self.call(name, *args, **kwargs) for name, args, kwargs in map(_unpack_call, calls)]
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
+    def __getattr__(self, name):
+        target = getattr(self.ai, name)
+        if name.startswith("_") or not callable(target):
+            return target
+
+        async def method(*args, **kwargs):
+            return await self.call(name, *args, **kwargs)
+        method.__name__ = name
+        method.__doc__ = target.__doc__
+        return method
 
 
 # =========================================================================
 # STANDALONE FUNCTIONS (no API key needed — use Claude's own reasoning)
 # =========================================================================
 
+def load_reference_material(names: Optional[list] = None) -> str:
+    """Concatenate references/*.md (all, or the given stems like "wage-types") for
+    use as PayrollAI(reference_material=...). Sorted so the cached prefix is stable."""
+    paths = sorted(glob.glob(os.path.join(REFERENCES_DIR, "*.md")))
+    if names:
+        wanted = {n.replace(".md", "") for n in names}
+        paths = [p for p in paths if os.path.splitext(os.path.basename(p))[0] in wanted]
+    parts = []
+    for path in paths:
+        with open(path) as f:
+            parts.append(f"# {os.path.basename(path)}\n\n{f.read().strip()}")
+    return "\n\n".join(parts)
+
+
 def build_ai_analysis_prompt(context: str, task: str) -> str:
     """Build a structured prompt for Claude to perform AI analysis
     during command execution (no API call needed — Claude IS the LLM)."""
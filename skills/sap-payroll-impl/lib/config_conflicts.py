@@ -0,0 +1,192 @@
+"""
+Cross-Tab Conflict Detection for SAP Payroll Config Workbooks
+=============================================================
+Deterministic checks for the conflict patterns PayrollAI.detect_config_conflicts
+used to ask the LLM to find. Reads a workbook produced by
+gen_helpers.generate_config_workbook (read-only, streaming), builds key sets per
+tab and compares them with set operations:
+
+- WT_Permissibility subgroups (PERSK) missing from Enterprise_Structure
+- WT_Permissibility wage types missing from Wage_Type_Catalog
+- Tax_Authorities states without a payroll area, and payroll areas in states
+  without a tax authority
+- Benefit plans whose deduction wage types are missing from the catalog
+  (wt_count truncation can drop them), and union dues when the profile is union
+- Work schedule rule codes referenced (Enterprise_Structure, or IT0007 when the
+  migration file's tabs are passed in too) but not defined in Work_Schedule_Rules
+- PSA_Groupings subareas missing from Enterprise_Structure
+- Symbolic accounts / absence quotas referencing undefined wage types — these
+  tabs carry no wage type column today, so the checks run only when the header
+  has one and are otherwise listed under "skipped"
+
+Tabs are located by header names rather than fixed cells, so reordered or
+extra columns don't break the checks.
+
+Usage:
+    from config_conflicts import detect_conflicts, format_conflicts
+    conflicts, skipped = detect_conflicts("config.xlsx", company)
+    print(format_conflicts(conflicts, skipped))
+"""
+
+from typing import Optional
+
+# Deduction wage type each benefit plan posts through (mirrors the IT0014/IT0167-0171
+# layout in gen_helpers.generate_migration_file)
+BENEFIT_PLAN_WTS = {
+    "MED1": [2100], "MED2": [2100], "DEN1": [2110], "VIS1": [2115],
+    "401K": [2120], "ROTH": [2121], "HSA1": [2130], "FSA1": [2131],
+    "LIFE": [2140], "STD1": [2140], "LTD1": [2140],
+}
+UNION_DUES_WT = 2150
+
+# Header aliases per logical column (first match wins)
+WT_HEADERS = ("LGART", "WT Code", "Wage Type", "Wage Types")
+STATE_HEADERS = ("State", "PA Description")
+
+
+def _norm(value) -> Optional[str]:
+    """Cell value → comparable key ("1000", "/101", "S1"); None for blanks."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def read_tabs(path_or_wb, names=None) -> dict:
+    """{tab: {"headers": [...], "rows": [{header: value}]}} for every sheet, or only
+    the sheets in names. Accepts a path or an already-open (read-only) workbook.
+
+    The header row is the first of the top five rows with two or more text cells
+    (row 3 for most generated tabs, row 1 for Symbolic_Accounts_GL)."""
+    import openpyxl
+    own = isinstance(path_or_wb, str)
+    wb = openpyxl.load_workbook(path_or_wb, read_only=True, data_only=True) if own else path_or_wb
+    try:
+        tabs = {}
+        for ws in wb.worksheets:
+            if names is not None and ws.title not in names:
+                continue
+            headers, rows = None, []
+            for i, values in enumerate(ws.iter_rows(values_only=True)):
+                if headers is None:
+                    if sum(1 for v in values if isinstance(v, str) and v.strip()) >= 2:
+                        headers = [_norm(v) for v in values]
+                    elif i >= 4:
+                        break
+                    continue
+                if any(v is not None for v in values):
+                    rows.append({h: v for h, v in zip(headers, values) if h})
+            tabs[ws.title] = {"headers": [h for h in (headers or []) if h], "rows": rows}
+        return tabs
+    finally:
+        if own:
+            wb.close()
+
+
+def _column(tabs, tab, *names, where=None) -> set:
+    """Set of normalized values under the first present header in `names`."""
+    t = tabs.get(tab)
+    if not t:
+        return set()
+    header = next((n for n in names if n in t["headers"]), None)
+    if header is None:
+        return set()
+    values = {_norm(r.get(header)) for r in t["rows"] if where is None or where(r)}
+    values.discard(None)
+    return values
+
+
+def _has_header(tabs, tab, names) -> Optional[str]:
+    t = tabs.get(tab)
+    return next((n for n in names if t and n in t["headers"]), None)
+
+
+def detect_conflicts(path_or_tabs, company: Optional[dict] = None):
+    """Run every cross-tab check. Returns (conflicts, skipped).
+
+    conflicts: [{"check", "severity", "tabs", "detail", "keys"}]
+    skipped: [check descriptions that could not run on this workbook's headers]
+    company: optional profile dict, enables the union dues check.
+    """
+    tabs = read_tabs(path_or_tabs) if isinstance(path_or_tabs, str) else path_or_tabs
+    conflicts, skipped = [], []
+
+    def report(check, severity, tab_names, detail, keys):
+        if keys:
+            conflicts.append({"check": check, "severity": severity, "tabs": tab_names,
+                              "detail": detail, "keys": sorted(keys)})
+
+    es = "Enterprise_Structure"
+    subgroups = _column(tabs, es, "PERSK", where=lambda r: r.get("Config Object Type") == "Employee Subgroup")
+    subareas = _column(tabs, es, "BTRTL", where=lambda r: r.get("Config Object Type") == "Personnel Sub-Area")
+    catalog = _column(tabs, "Wage_Type_Catalog", "LGART")
+
+    # Wage type permissibility
+    report("CC-01", "Critical", ["WT_Permissibility", es],
+           "Wage types permitted for employee subgroups not defined in enterprise structure",
+           _column(tabs, "WT_Permissibility", "PERSK") - subgroups)
+    report("CC-02", "Critical", ["WT_Permissibility", "Wage_Type_Catalog"],
+           "Permitted wage types missing from the wage type catalog",
+           _column(tabs, "WT_Permissibility", *WT_HEADERS) - catalog)
+
+    # Tax authorities ↔ payroll areas
+    tax_states = _column(tabs, "Tax_Authorities", "State") - {"Federal"}
+    area_states = _column(tabs, "Payroll_Areas", *STATE_HEADERS)
+    report("CC-03", "Warning", ["Tax_Authorities", "Payroll_Areas"],
+           "Tax authorities in states with no payroll area", tax_states - area_states)
+    report("CC-04", "Critical", ["Payroll_Areas", "Tax_Authorities"],
+           "Payroll areas in states with no tax authority", area_states - tax_states)
+
+    # Benefits ↔ catalog
+    plans = _column(tabs, "Benefits_Config", "Plan Code")
+    missing = {f"{plan}→{wt}" for plan in plans for wt in BENEFIT_PLAN_WTS.get(plan, [])
+               if str(wt) not in catalog}
+    report("CC-05", "Critical", ["Benefits_Config", "Wage_Type_Catalog"],
+           "Benefit plans whose deduction wage type is missing from the catalog", missing)
+    if company and company.get("unions") and str(UNION_DUES_WT) not in catalog:
+        report("CC-06", "Critical", ["Wage_Type_Catalog"],
+               "Union workforce but no union dues wage type in the catalog", {str(UNION_DUES_WT)})
+
+    # Work schedule rules
+    defined_wsr = _column(tabs, "Work_Schedule_Rules", "Schedule Code")
+    # Feature_Configuration's SCHKZ column holds feature decision-tree IDs (SCHKZ01), not rule codes
+    referenced = _column(tabs, es, "SCHKZ") | _column(tabs, "IT0007_WorkTime", "SCHKZ")
+    report("CC-07", "Warning", [es, "IT0007_WorkTime", "Work_Schedule_Rules"],
+           "Work schedule rules referenced but not defined", referenced - defined_wsr)
+
+    # PSA groupings ↔ enterprise structure
+    report("CC-08", "Warning", ["PSA_Groupings", es],
+           "PSA groupings for personnel subareas not in enterprise structure",
+           _column(tabs, "PSA_Groupings", "PSA Code") - subareas)
+
+    # Header-driven wage type references
+    for check, tab, desc in [("CC-09", "Symbolic_Accounts_GL", "Symbolic accounts referencing undefined wage types"),
+                             ("CC-10", "Absence_Quota_Config", "Absence quota types referencing undefined wage types")]:
+        if _has_header(tabs, tab, WT_HEADERS):
+            report(check, "Warning", [tab, "Wage_Type_Catalog"], desc,
+                   _column(tabs, tab, *WT_HEADERS) - catalog)
+        else:
+            skipped.append(f"{check}: {desc} ({tab} has no wage type column)")
+
+    return conflicts, skipped
+
+
+def format_conflicts(conflicts: list, skipped: Optional[list] = None) -> str:
+    if not conflicts:
+        lines = ["Cross-tab conflicts (rule-based): none found."]
+    else:
+        lines = [f"Cross-tab conflicts (rule-based): {len(conflicts)}"]
+        for c in conflicts:
+            keys = ", ".join(c["keys"][:15]) + (f" (+{len(c['keys']) - 15} more)" if len(c["keys"]) > 15 else "")
+            lines.append(f"- [{c['severity']}] {c['check']} {c['detail']} [{' / '.join(c['tabs'])}]: {keys}")
+    for s in skipped or []:
+        lines.append(f"  (not checked) {s}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    found, not_run = detect_conflicts(sys.argv[1])
+    print(format_conflicts(found, not_run))
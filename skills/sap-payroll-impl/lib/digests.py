@@ -0,0 +1,209 @@
+"""
+Deliverable Digests for SAP Payroll Implementation Toolkit
+==========================================================
+Compact, content-hashed summaries of each deliverable, written next to the
+artifact as <artifact>.digest.json when it is generated for a briefing
+(gen_helpers' digest=True; ensure_digest() builds missing ones from the file):
+
+- Workbooks (config workbook, migration file): one section per tab with row
+  count, headers, key-column sample and value counts for low-cardinality
+  columns (states, classes, flags) — enough to brief from, small enough to embed
+- Documents (QA report, funcspec .docx): one section per heading with word
+  count and an opening excerpt
+
+Each section carries a hash of its facts and the digest a hash of its sections,
+so volatile cells that never reach the digest (generation timestamps, random
+test SSNs) don't register as changes. An LLM summary of the digest is stored
+in the same file with the hashes it was made from, and survives rewrites of
+the digest. PayrollAI.generate_incremental_briefing() re-summarizes
+only deliverables whose digest changed, then assembles the briefing from the
+cached summaries.
+
+Usage:
+    from digests import workbook_digest, document_digest, write_digest, load_digest
+    write_digest(path, workbook_digest(wb, "config_workbook"))    # at generation time
+    write_digest(qa_path, document_digest(qa_path, "qa_report"))  # after writing a .docx
+    digest = load_digest(path)  # None if missing or unreadable
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from typing import Optional
+from xml.etree.ElementTree import iterparse
+
+DIGEST_SUFFIX = ".digest.json"
+KEY_SAMPLE = 12  # first-column values listed per tab
+CATEGORICAL_MAX = 12  # columns with at most this many distinct values get value counts
+EXCERPT_CHARS = 400
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _hash(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(",", ":"),
+                                     default=str).encode()).hexdigest()[:16]
+
+
+def digest_path(artifact: str) -> str:
+    return artifact + DIGEST_SUFFIX
+
+
+def _finish(kind: str, artifact: str, sections: dict) -> dict:
+    for facts in sections.values():
+        facts["hash"] = _hash({k: v for k, v in facts.items() if k != "hash"})
+    return {"kind": kind, "artifact": os.path.basename(artifact) if artifact else None,
+            "content_hash": _hash({name: s["hash"] for name, s in sections.items()}),
+            "sections": sections}
+
+
+# =========================================================================
+# WORKBOOKS
+# =========================================================================
+
+def _cell(v) -> str:
+    """Cell value as digest text. openpyxl reads whole-number floats back as int, so
+    0.0 written and 0 reloaded must hash alike."""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _tab_facts(rows) -> dict:
+    """Facts for one tab from its row tuples: header row = first of the top five
+    rows with two or more text cells (same rule as config_conflicts.read_tabs)."""
+    headers, body = None, []
+    for i, values in enumerate(rows):
+        if headers is None:
+            if sum(1 for v in values if isinstance(v, str) and v.strip()) >= 2:
+                headers = [str(v).strip() if v is not None else "" for v in values]
+            elif i >= 4:
+                break
+            continue
+        if any(v is not None for v in values):
+            body.append(values)
+    if headers is None:
+        return {"rows": 0, "headers": []}
+    facts = {"rows": len(body), "headers": [h for h in headers if h]}
+    keys = [v for v in (r[0] if r else None for r in body) if v is not None]
+    distinct_keys = list(dict.fromkeys(_cell(k) for k in keys))
+    facts["keys"] = distinct_keys[:KEY_SAMPLE]
+    if len(distinct_keys) > KEY_SAMPLE:
+        facts["keys"].append(f"... +{len(distinct_keys) - KEY_SAMPLE} more")
+    counts = {}
+    for col, header in enumerate(headers[1:], start=1):
+        if not header:
+            continue
+        values = {}
+        for r in body:
+            v = r[col] if col < len(r) else None
+            if v is not None:
+                values[_cell(v)] = values.get(_cell(v), 0) + 1
+                if len(values) > CATEGORICAL_MAX:
+                    break
+        if 1 < len(values) <= CATEGORICAL_MAX or (len(values) == 1 and len(body) > 1):
+            counts[header] = values
+    if counts:
+        facts["values"] = counts
+    return facts
+
+
+def workbook_digest(wb_or_path, kind: str, artifact: Optional[str] = None) -> dict:
+    """Digest of an openpyxl Workbook (in memory, e.g. right before save) or an .xlsx path."""
+    if isinstance(wb_or_path, str):
+        import openpyxl
+        artifact = artifact or wb_or_path
+        wb = openpyxl.load_workbook(wb_or_path, read_only=True, data_only=True)
+        try:
+            sections = {ws.title: _tab_facts(ws.iter_rows(values_only=True)) for ws in wb.worksheets}
+        finally:
+            wb.close()
+    else:
+        sections = {ws.title: _tab_facts(ws.iter_rows(values_only=True)) for ws in wb_or_path.worksheets}
+    return _finish(kind, artifact, sections)
+
+
+# =========================================================================
+# DOCUMENTS
+# =========================================================================
+
+def _docx_paragraphs(path: str):
+    """(style, text) per paragraph of a .docx, streamed from word/document.xml."""
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        style, parts = "", []
+        for event, elem in iterparse(f, events=("start", "end")):
+            if event == "start" and elem.tag == f"{W}p":
+                style, parts = "", []
+            elif event == "end":
+                if elem.tag == f"{W}pStyle":
+                    style = elem.get(f"{W}val", "")
+                elif elem.tag == f"{W}t" and elem.text:
+                    parts.append(elem.text)
+                elif elem.tag == f"{W}p":
+                    yield style, "".join(parts).strip()
+                    elem.clear()
+
+
+def document_digest(path_or_sections, kind: str, artifact: Optional[str] = None) -> dict:
+    """Digest of a .docx (sections split at Heading/Title paragraphs) or of a
+    {section title: text} dict for documents assembled in memory."""
+    if isinstance(path_or_sections, str):
+        artifact = artifact or path_or_sections
+        texts, current = {}, "(preamble)"
+        for style, text in _docx_paragraphs(path_or_sections):
+            if style.lower().startswith(("heading", "title")) and text:
+                current = text
+                texts.setdefault(current, [])
+            elif text:
+                texts.setdefault(current, []).append(text)
+        texts = {name: "\n".join(parts) for name, parts in texts.items()}
+    else:
+        texts = dict(path_or_sections)
+    sections = {}
+    for name, text in texts.items():
+        excerpt = " ".join(text.split())
+        sections[name] = {"words": len(text.split()),
+                          "excerpt": excerpt[:EXCERPT_CHARS] + ("..." if len(excerpt) > EXCERPT_CHARS else "")}
+    return _finish(kind, artifact, sections)
+
+
+# =========================================================================
+# STORAGE
+# =========================================================================
+
+def load_digest(artifact: str) -> Optional[dict]:
+    try:
+        with open(digest_path(artifact)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_digest(artifact: str, digest: dict) -> dict:
+    """Write <artifact>.digest.json, carrying over the stored summary. The summary
+    records the content and section hashes it was made from, so a stale one is
+    detected by the reader and updated from the changed sections only.
+    Returns the digest as written."""
+    previous = load_digest(artifact)
+    if previous and "summary" in previous and "summary" not in digest:
+        digest = dict(digest, summary=previous["summary"])
+    with open(digest_path(artifact), "w") as f:
+        json.dump(digest, f, indent=1, default=str)
+    return digest
+
+
+def ensure_digest(artifact: str, kind: Optional[str] = None) -> dict:
+    """Stored digest for an artifact, (re)built from the file if missing or older than it."""
+    digest = load_digest(artifact)
+    if digest is None or os.path.getmtime(artifact) > os.path.getmtime(digest_path(artifact)):
+        kind = kind or os.path.splitext(os.path.basename(artifact))[0]
+        build = workbook_digest if artifact.endswith(".xlsx") else document_digest
+        digest = write_digest(artifact, build(artifact, kind))
+    return digest
+
+
+def changed_sections(old: Optional[dict], new: dict) -> list:
+    """Section names added or changed between two digests of the same artifact."""
+    before = {name: s["hash"] for name, s in (old or {}).get("sections", {}).items()}
+    return [name for name, s in new["sections"].items() if before.get(name) != s["hash"]]
@@ -0,0 +1,134 @@
+"""
+Deterministic Gap Rules for SAP Payroll Implementation Toolkit
+==============================================================
+Local stand-in for most of PayrollAI.predict_missing_config: "if they mention
+X but never Y, Y is a likely gap" rules, loaded from gap_rules.json and
+compiled once into regexes, evaluated against the answered-sections dict.
+
+A rule fires when any `when_any` pattern appears (not negated, e.g. "no union")
+and no `unless_any` pattern does. When the only `unless_any` evidence sits on
+answer lines that also hedge ("TBD", "not sure", "pending"), the rule is returned
+as ambiguous instead — those are the cases worth an LLM call.
+
+Usage:
+    from gap_rules import evaluate_gaps, format_gaps
+    gaps, ambiguous = evaluate_gaps(answered_sections)
+    print(format_gaps(gaps))
+"""
+
+import json
+import os
+import re
+from typing import Optional
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gap_rules.json")
+
+NEGATION = re.compile(r"\b(no|non|not|without|none|never)\W{0,3}$", re.I)
+# "Union: No" / "Tips: N/A" — the key mentions the topic but the answer denies it
+NEGATED_ANSWER = re.compile(r"^[^:\n]*:\s*(no|none|n/?a|not applicable)\b", re.I)
+SEVERITY_ORDER = {"Critical": 0, "Warning": 1, "Info": 2}
+
+_compiled = {}
+
+
+def load_rules(path: Optional[str] = None) -> dict:
+    """Compile a rules table once per path: {"hedges": regex, "rules": [rule + compiled patterns]}."""
+    path = path or RULES_FILE
+    if path not in _compiled:
+        with open(path) as f:
+            table = json.load(f)
+        rules = []
+        for rule in table["rules"]:
+            rules.append(dict(
+                rule,
+                _when=re.compile("|".join(f"(?:{p})" for p in rule["when_any"]), re.I | re.M),
+                _unless=re.compile("|".join(f"(?:{p})" for p in rule.get("unless_any", [])), re.I | re.M)
+                if rule.get("unless_any") else None,
+            ))
+        hedges = re.compile("|".join(f"(?:{p})" for p in table.get("hedges", [])), re.I | re.M) \
+            if table.get("hedges") else None
+        _compiled[path] = {"hedges": hedges, "rules": rules}
+    return _compiled[path]
+
+
+def _flatten(value, prefix=""):
+    """Nested answers → one text blob ("key: value" lines) so keys count as evidence too."""
+    if isinstance(value, dict):
+        return "\n".join(_flatten(v, f"{k}: ") for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return "\n".join(_flatten(v, prefix) for v in value)
+    return f"{prefix}{value}"
+
+
+def _line_at(text, pos):
+    start = text.rfind("\n", 0, pos) + 1
+    end = text.find("\n", pos)
+    return text[start:end if end >= 0 else len(text)]
+
+
+def _negated(text, m):
+    """True if the match is denied ("no union", "Pension contributions: None")."""
+    return bool(NEGATION.search(text[max(0, m.start() - 12):m.start()])
+                or NEGATED_ANSWER.match(_line_at(text, m.start())))
+
+
+def _mentions(pattern, text):
+    """First non-negated match of pattern in text, or None."""
+    for m in pattern.finditer(text):
+        if not _negated(text, m):
+            return m
+    return None
+
+
+def evaluate_gaps(answered_sections: dict, rules_path: Optional[str] = None):
+    """Evaluate every rule against the answered sections.
+
+    Returns (gaps, ambiguous): lists of {"id", "severity", "gap", "ask", "evidence"}
+    sorted by severity. evidence names the section and text that triggered the rule.
+    """
+    table = load_rules(rules_path)
+    sections = {str(name): _flatten(body) for name, body in answered_sections.items()}
+    hedges = table["hedges"]
+
+    gaps, ambiguous = [], []
+    for rule in table["rules"]:
+        trigger = None
+        for name, text in sections.items():
+            m = _mentions(rule["_when"], text)
+            if m:
+                trigger = (name, m.group(0))
+                break
+        if trigger is None:
+            continue
+        # Lines that answer the rule, and whether each one hedges
+        covered = []
+        if rule["_unless"] is not None:
+            for name, text in sections.items():
+                for m in rule["_unless"].finditer(text):
+                    # An answer denying the covering item is not coverage
+                    if _negated(text, m):
+                        continue
+                    line = _line_at(text, m.start())
+                    covered.append((name, bool(hedges and hedges.search(line))))
+        finding = {"id": rule["id"], "severity": rule["severity"], "gap": rule["gap"],
+                   "ask": rule.get("ask", []), "evidence": f"{trigger[0]}: \"{trigger[1]}\""}
+        if not covered:
+            gaps.append(finding)
+        elif all(tentative for _, tentative in covered):
+            names = sorted({name for name, _ in covered})
+            finding["evidence"] += f"; covered only tentatively in {', '.join(names)}"
+            ambiguous.append(finding)
+
+    key = lambda f: (SEVERITY_ORDER.get(f["severity"], 9), f["id"])
+    return sorted(gaps, key=key), sorted(ambiguous, key=key)
+
+
+def format_gaps(gaps: list, title: str = "Predicted configuration gaps (rule-based)") -> str:
+    if not gaps:
+        return f"{title}: none found."
+    lines = [f"{title}:"]
+    for g in gaps:
+        lines.append(f"- [{g['severity']}] {g['id']}: {g['gap']} (evidence — {g['evidence']})")
+        for q in g["ask"]:
+            lines.append(f"    Ask: {q}")
+    return "\n".join(lines)
@@ -10,6 +10,8 @@ from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from datetime import datetime, timedelta
 import random
 
+from digests import workbook_digest, write_digest
+
 # ============================================================
 # CONSTANTS & MAPPINGS
 # ============================================================
@@ -88,11 +90,39 @@ def _apply_header_row(ws, row_num, headers):
         cell.border = _get_border()
         cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
 
+# ============================================================
+# PROFILE METADATA
+# ============================================================
+
+# Profile fields with no tab of their own, stored as custom document properties
+# ("payroll.<field>") so workbook_reader can rebuild the full generation profile
+PROFILE_PROPERTY_PREFIX = "payroll."
+PROFILE_PROPERTIES = ("id", "code", "name", "industry", "employees", "payroll_areas", "mid_year",
+                      "benefits_approach", "time_approach", "concurrent_employment")
+
+
+def _write_profile_properties(wb, company):
+    from openpyxl.packaging.custom import BoolProperty, IntProperty, StringProperty
+    for field in PROFILE_PROPERTIES:
+        if field not in company:
+            continue
+        value = company[field]
+        name = PROFILE_PROPERTY_PREFIX + field
+        if isinstance(value, bool):
+            wb.custom_doc_props.append(BoolProperty(name=name, value=value))
+        elif isinstance(value, int):
+            wb.custom_doc_props.append(IntProperty(name=name, value=value))
+        elif isinstance(value, dict):
+            wb.custom_doc_props.append(StringProperty(name=name, value=";".join(f"{k}={v}" for k, v in value.items())))
+        else:
+            wb.custom_doc_props.append(StringProperty(name=name, value=str(value)))
+
+
 # ============================================================
 # CONFIG WORKBOOK GENERATION
 # ============================================================
 
-def generate_config_workbook(company, output_path):
+def generate_config_workbook(company, output_path, digest=False):
     """
     Generate a complete config workbook for a company profile.
 
@@ -100,6 +130,7 @@ def generate_config_workbook(company, output_path):
         company: Dict with keys: id, code, name, pas, psas, ee_subgroups,
                  payroll_areas, unions, states, benefits, wt_count, etc.
         output_path: Path to save the workbook
+        digest: Also write <output_path>.digest.json for incremental briefings
     """
     wb = openpyxl.Workbook()
     wb.remove(wb.active)  # Remove default sheet
@@ -490,17 +521,21 @@ def generate_config_workbook(company, output_path):
     ws.cell(row=4, column=3).value = "INFO"
     ws.cell(row=4, column=4).value = "QA PASS"
 
+    _write_profile_properties(wb, company)
     wb.save(output_path)
+    if digest:
+        write_digest(output_path, workbook_digest(wb, "config_workbook", output_path))
     print(f"Config workbook saved: {output_path}")
 
 
-def generate_migration_file(company, output_path):
+def generate_migration_file(company, output_path, digest=False):
     """
     Generate a complete migration file (multi-sheet infotypes) for a company.
 
     Args:
         company: Company profile dict
         output_path: Path to save the migration file
+        digest: Also write <output_path>.digest.json for incremental briefings
     """
     wb = openpyxl.Workbook()
     wb.remove(wb.active)
@@ -1106,6 +1141,8 @@ def generate_migration_file(company, output_path):
     ws.cell(row=9, column=5).value = "PASS"
 
     wb.save(output_path)
+    if digest:
+        write_digest(output_path, workbook_digest(wb, "migration_file", output_path))
     print(f"Migration file saved: {output_path}")
 
 
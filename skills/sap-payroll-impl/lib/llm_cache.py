@@ -0,0 +1,165 @@
+"""
+LLM Response Cache for SAP Payroll Implementation Toolkit
+=========================================================
+Two-layer cache for PayrollAI responses:
+- In-process LRU (OrderedDict) for repeat calls within one pipeline run
+- On-disk JSON store with TTL and size-based eviction for repeat runs
+
+Keys hash the model, system prompt, max_tokens and a whitespace-normalized
+prompt, so the same question for the same client hits the cache no matter how
+the prompt was indented.
+
+Usage:
+    from llm_cache import ResponseCache
+    cache = ResponseCache()                       # ~/.cache/cc-py-toolkit/llm
+    key = cache.make_key(model, system, 2048, prompt)
+    text = cache.get(key)
+    if text is None:
+        text = call_api(...)
+        cache.put(key, text)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cc-py-toolkit", "llm")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Strip trailing whitespace per line and collapse blank-line runs."""
+    lines = [line.rstrip() for line in prompt.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+class ResponseCache:
+    """In-process LRU in front of an on-disk store with TTL and size-based eviction."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 256,
+                 ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 50 * 1024 * 1024,
+                 disk: bool = True):
+        self.cache_dir = cache_dir or os.environ.get("PAYROLL_AI_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(model: str, system: str, max_tokens: int, prompt: str, extra: Optional[dict] = None) -> str:
+        payload = json.dumps({
+            "model": model,
+            "system": hashlib.sha256(system.encode()).hexdigest(),
+            "max_tokens": max_tokens,
+            "prompt": hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest(),
+            "extra": extra or {},
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: str):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._lru[key]
+        if self.disk:
+            path = self._path(key)
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                if time.time() - entry.get("created", 0) <= self.ttl_seconds:
+                    with self._lock:
+                        self._remember(key, entry["value"])
+                        self.stats["disk_hits"] += 1
+                    return entry["value"]
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._remember(key, value)
+        if not self.disk:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"created": time.time(), "value": value})
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_bytes()
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _scan_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Drop expired entries, then oldest entries until under 90% of max_bytes."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, mtime in entries:
+            if total <= target and now - mtime <= self.ttl_seconds:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                self.stats["evictions"] += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        if self.disk:
+            for path, _, _ in list(self._entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._disk_bytes = 0
@@ -0,0 +1,127 @@
+"""
+LLM Call Metrics for SAP Payroll Implementation Toolkit
+=======================================================
+Per-call accounting for PayrollAI: which method (task) made the call, prompt
+size, input/output/cached tokens, latency, time to first token, response-cache
+hits, retries and errors. Aggregates give p50/p95 latency and token totals per
+method and for the whole pipeline run, to decide which calls to batch, cache
+or move to a cheaper model.
+
+Usage:
+    ai = PayrollAI()
+    ... run a pipeline ...
+    print_metrics(ai.metrics.summary())
+    ai.metrics.dump("ai_metrics.json")
+"""
+
+import json
+import math
+import threading
+import time
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LLMMetrics:
+    """Thread-safe list of call records plus aggregate views."""
+
+    def __init__(self):
+        self.records = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def start(self, task: str, model: str, prompt: str, max_tokens: int) -> dict:
+        """New call record; the caller fills outcome fields then passes it to finish()."""
+        return {
+            "task": task, "model": model, "prompt_chars": len(prompt),
+            "prompt_tokens_est": len(prompt) // 4, "max_tokens": max_tokens,
+            "input_tokens": 0, "output_tokens": 0,
+            "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0,
+            "cache_hit": False, "retries": 0, "error": None,
+            "ttft_s": None, "_t0": time.perf_counter(),
+        }
+
+    def first_token(self, rec: dict):
+        if rec["ttft_s"] is None:
+            rec["ttft_s"] = round(time.perf_counter() - rec["_t0"], 4)
+
+    def finish(self, rec: dict):
+        rec["latency_s"] = round(time.perf_counter() - rec.pop("_t0"), 4)
+        if rec["ttft_s"] is None:
+            # Non-streaming calls deliver every token at once
+            rec["ttft_s"] = rec["latency_s"]
+        with self._lock:
+            self.records.append(rec)
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+            self.started = time.time()
+
+    @staticmethod
+    def _aggregate(records):
+        api = [r for r in records if not r["cache_hit"] and not r["error"]]
+        latencies = [r["latency_s"] for r in api]
+        ttfts = [r["ttft_s"] for r in api]
+        agg = {
+            "calls": len(records),
+            "models": sorted({r["model"] for r in records}),
+            "api_calls": len(api),
+            "cache_hits": sum(1 for r in records if r["cache_hit"]),
+            "errors": sum(1 for r in records if r["error"]),
+            "retries": sum(r["retries"] for r in records),
+            "prompt_chars": sum(r["prompt_chars"] for r in records),
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p95_s": percentile(latencies, 95),
+            "ttft_p50_s": percentile(ttfts, 50),
+            "latency_total_s": round(sum(latencies), 3),
+        }
+        for field in TOKEN_FIELDS:
+            agg[field] = sum(r[field] for r in records)
+        return agg
+
+    def summary(self) -> dict:
+        """{"totals": {...}, "by_task": {task: {...}}} — by_task sorted by total latency."""
+        with self._lock:
+            records = list(self.records)
+        by_task = {}
+        for r in records:
+            by_task.setdefault(r["task"], []).append(r)
+        tasks = {t: self._aggregate(rs) for t, rs in by_task.items()}
+        return {
+            "started": self.started,
+            "totals": self._aggregate(records),
+            "by_task": dict(sorted(tasks.items(), key=lambda kv: -kv[1]["latency_total_s"])),
+        }
+
+    def dump(self, path: str, include_records: bool = True):
+        data = self.summary()
+        if include_records:
+            with self._lock:
+                data["records"] = list(self.records)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def print_metrics(summary: dict):
+    t = summary["totals"]
+    print(f"\n{'='*78}")
+    print(f"  PAYROLL AI METRICS — {t['calls']} calls ({t['api_calls']} API, {t['cache_hits']} cached, "
+          f"{t['errors']} errors, {t['retries']} retries)")
+    print(f"{'='*78}")
+    print(f"  {'Task':<32} {'Calls':>5} {'p50 s':>7} {'p95 s':>7} {'In tok':>8} {'Out tok':>8} {'Cached':>8}")
+    for task, a in summary["by_task"].items():
+        print(f"  {task:<32} {a['calls']:>5} {a['latency_p50_s']:>7.2f} {a['latency_p95_s']:>7.2f} "
+              f"{a['input_tokens']:>8} {a['output_tokens']:>8} {a['cache_read_input_tokens']:>8}")
+    print(f"  {'TOTAL':<32} {t['calls']:>5} {t['latency_p50_s']:>7.2f} {t['latency_p95_s']:>7.2f} "
+          f"{t['input_tokens']:>8} {t['output_tokens']:>8} {t['cache_read_input_tokens']:>8}")
+    print(f"{'='*78}")
@@ -0,0 +1,173 @@
+"""
+LLM Request Scheduler for SAP Payroll Implementation Toolkit
+============================================================
+Paces PayrollAI requests against requests-per-minute and tokens-per-minute
+budgets (token buckets) and retries transient API errors (429, 408, 409, 5xx,
+529 overloaded, connection/timeouts) with jittered exponential backoff, honoring
+retry-after headers.
+
+One client and one scheduler are shared per API key, so every PayrollAI
+instance in a process draws on the same budget — a batch() fan-out of 50
+calls queues behind the buckets instead of tripping the org rate limit.
+
+Budgets come from PAYROLL_AI_RPM / PAYROLL_AI_TPM (defaults below) or are
+passed explicitly.
+
+Usage:
+    from llm_scheduler import Scheduler
+    sched = Scheduler(rpm=50, tpm=30000)
+    text = sched.run(lambda: client.messages.create(...), tokens=1200)
+    print(sched.stats)   # calls, retries, failures, throttled_s, by_status
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+DEFAULT_RPM = 50
+DEFAULT_TPM = 30000
+DEFAULT_MAX_RETRIES = 5
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# SDK / stdlib exception names that mean "the request never completed"
+RETRYABLE_NAMES = {"APIConnectionError", "APITimeoutError", "RateLimitError",
+                   "InternalServerError", "OverloadedError"}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1, sleep=time.sleep) -> float:
+        """Block until `amount` tokens are available, then take them. Returns seconds waited.
+        Requests larger than the bucket are clamped to its capacity so they can still run."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            sleep(delay)
+            waited += delay
+
+
+def status_of(exc) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc) -> bool:
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(exc).__name__ in RETRYABLE_NAMES or isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def retry_after(exc) -> Optional[float]:
+    """Server-suggested delay in seconds, if the error response carried one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    """Token-bucket pacing plus jittered exponential backoff around API calls."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = 1.0,
+                 max_delay: float = 60.0, sleep=time.sleep):
+        rpm = rpm or float(os.environ.get("PAYROLL_AI_RPM", DEFAULT_RPM))
+        tpm = tpm or float(os.environ.get("PAYROLL_AI_TPM", DEFAULT_TPM))
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "throttled_s": 0.0, "by_status": {}}
+
+    def pace(self, tokens: int = 0):
+        """Wait for one request slot and `tokens` of token budget."""
+        waited = self.requests.acquire(1, self.sleep)
+        if tokens:
+            waited += self.tokens.acquire(tokens, self.sleep)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["throttled_s"] = round(self.stats["throttled_s"] + waited, 3)
+
+    def backoff(self, exc, attempt: int) -> Optional[float]:
+        """Delay before retry number `attempt` (0-based), or None if exc should propagate.
+        Full jitter over an exponential window; retry-after is honored as a floor."""
+        status = status_of(exc)
+        with self._lock:
+            key = str(status or type(exc).__name__)
+            self.stats["by_status"][key] = self.stats["by_status"].get(key, 0) + 1
+            if attempt >= self.max_retries or not is_retryable(exc):
+                self.stats["failures"] += 1
+                return None
+            self.stats["retries"] += 1
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hinted = retry_after(exc)
+        return min(self.max_delay, max(delay, hinted)) if hinted is not None else delay
+
+    def run(self, fn, tokens: int = 0, on_retry=None):
+        """Call fn() under pacing, retrying retryable errors. Re-raises the last error."""
+        attempt = 0
+        while True:
+            self.pace(tokens)
+            try:
+                return fn()
+            except Exception as e:
+                delay = self.backoff(e, attempt)
+                if delay is None:
+                    raise
+                if on_retry:
+                    on_retry(e, attempt, delay)
+                self.sleep(delay)
+                attempt += 1
+
+
+# =========================================================================
+# SHARED CLIENT / SCHEDULER PER API KEY
+# =========================================================================
+
+_shared_lock = threading.Lock()
+_clients = {}
+_schedulers = {}
+
+
+def shared_client(api_key: str):
+    """One anthropic client per key. SDK-level retries are off; Scheduler owns retrying."""
+    import anthropic
+    with _shared_lock:
+        if api_key not in _clients:
+            _clients[api_key] = anthropic.Anthropic(api_key=api_key, max_retries=0)
+        return _clients[api_key]
+
+
+def shared_scheduler(api_key: Optional[str]) -> Scheduler:
+    with _shared_lock:
+        if api_key not in _schedulers:
+            _schedulers[api_key] = Scheduler()
+        return _schedulers[api_key]
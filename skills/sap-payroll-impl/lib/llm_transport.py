@@ -0,0 +1,407 @@
+"""
+LLM Transports for SAP Payroll Implementation Toolkit
+=====================================================
+Pluggable stand-ins for the Anthropic client behind PayrollAI, so AI-enhanced
+pipelines can be benchmarked and regression-tested without the network.
+Every transport exposes the client surface PayrollAI uses —
+messages.create(**request) and messages.stream(**request) — and returns
+response objects with .content blocks and .usage.
+
+- AnthropicTransport:  the real API (shared client per key)
+- RecordingTransport:  wraps another transport and appends every request /
+                       response pair, with latency and stream chunk timings,
+                       to a JSONL file
+- ReplayTransport:     serves recorded responses from that file, optionally
+                       reproducing the recorded latency
+- SyntheticTransport:  local emulated server with configurable latency,
+                       output speed, streaming, requests-per-minute and
+                       concurrency limits (429 / 529 errors) and failure rate
+
+Usage:
+    ai = PayrollAI(transport=RecordingTransport(AnthropicTransport(key), "run.jsonl"))
+    ai = PayrollAI(transport=ReplayTransport("run.jsonl", latency="recorded"))
+    ai = PayrollAI(transport=SyntheticTransport(latency_s=0.8, tokens_per_s=80, rpm=50))
+
+    # Or from the environment: PAYROLL_AI_TRANSPORT=replay:run.jsonl | record:run.jsonl | synthetic
+    ai = PayrollAI(transport=transport_from_env())
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Optional
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+
+def request_key(request: dict) -> str:
+    """Stable hash of everything that determines a response."""
+    relevant = {k: request.get(k) for k in ("model", "system", "messages", "tools", "tool_choice", "max_tokens")}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _block_to_dict(block) -> dict:
+    if getattr(block, "type", None) == "tool_use":
+        return {"type": "tool_use", "name": block.name, "input": block.input}
+    return {"type": "text", "text": getattr(block, "text", "")}
+
+
+def response_to_dict(response) -> dict:
+    usage = getattr(response, "usage", None)
+    return {
+        "content": [_block_to_dict(b) for b in response.content],
+        "usage": {f: getattr(usage, f, 0) or 0 for f in USAGE_FIELDS},
+    }
+
+
+def response_from_dict(data: dict):
+    return SimpleNamespace(
+        content=[SimpleNamespace(**b) for b in data["content"]],
+        usage=SimpleNamespace(**{f: data.get("usage", {}).get(f, 0) for f in USAGE_FIELDS}),
+    )
+
+
+def _text_of(data: dict) -> str:
+    return "".join(b.get("text", "") for b in data["content"] if b["type"] == "text")
+
+
+class TransportError(Exception):
+    """API-shaped error (status_code + response.headers) so llm_scheduler retries it."""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class ReplayMiss(KeyError):
+    """No recorded response for this request."""
+
+
+class _Stream:
+    """Minimal MessageStream: context manager with text_stream and get_final_message()."""
+
+    def __init__(self, chunks, final, on_close=None):
+        self._chunks = chunks
+        self._final = final  # message, or a callable returning it
+        self._on_close = on_close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._on_close:
+            self._on_close(exc_type is None)
+        return False
+
+    @property
+    def text_stream(self):
+        return self._chunks
+
+    def get_final_message(self):
+        return self._final() if callable(self._final) else self._final
+
+
+class _Messages:
+    def __init__(self, transport):
+        self._t = transport
+
+    def create(self, **request):
+        return self._t.create(request)
+
+    def stream(self, **request):
+        return self._t.stream(request)
+
+
+class Transport:
+    """Base: subclasses implement create(request) and stream(request).
+
+    cache_scope names where responses come from. None means the real API; anything
+    else keeps PayrollAI's response cache from mixing stand-in text with real answers.
+    """
+
+    cache_scope: Optional[str] = "offline"
+
+    @property
+    def messages(self):
+        return _Messages(self)
+
+    def create(self, request: dict):
+        raise NotImplementedError
+
+    def stream(self, request: dict):
+        raise NotImplementedError
+
+
+# =========================================================================
+# REAL API
+# =========================================================================
+
+class AnthropicTransport(Transport):
+    cache_scope = None
+
+    def __init__(self, api_key: Optional[str] = None):
+        from llm_scheduler import shared_client
+        self.client = shared_client(api_key or os.environ["ANTHROPIC_API_KEY"])
+
+    def create(self, request):
+        return self.client.messages.create(**request)
+
+    def stream(self, request):
+        return self.client.messages.stream(**request)
+
+
+# =========================================================================
+# RECORD / REPLAY
+# =========================================================================
+
+class RecordingTransport(Transport):
+    """Pass-through that appends {key, request, response, latency_s, ttft_s, chunks} per call."""
+
+    def __init__(self, inner: Transport, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        self.cache_scope = inner.cache_scope  # responses are the inner transport's
+
+    def _write(self, request, response, latency, ttft=None, chunks=None):
+        entry = {"key": request_key(request), "request": request, "response": response_to_dict(response),
+                 "latency_s": round(latency, 4), "ttft_s": round(ttft if ttft is not None else latency, 4)}
+        if chunks is not None:
+            entry["chunks"] = chunks
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def create(self, request):
+        t0 = time.perf_counter()
+        response = self.inner.create(request)
+        self._write(request, response, time.perf_counter() - t0)
+        return response
+
+    def stream(self, request):
+        t0 = time.perf_counter()
+        inner = self.inner.stream(request)
+        stream = inner.__enter__()
+        chunks = []
+
+        def tap():
+            for text in stream.text_stream:
+                chunks.append([round(time.perf_counter() - t0, 4), text])
+                yield text
+
+        def close(completed):
+            try:
+                # Failed or abandoned streams aren't recorded — replay would serve a partial answer
+                if completed:
+                    ttft = chunks[0][0] if chunks else None
+                    self._write(request, stream.get_final_message(), time.perf_counter() - t0, ttft, chunks)
+            finally:
+                inner.__exit__(None, None, None)
+
+        return _Stream(tap(), stream.get_final_message, close)
+
+
+class ReplayTransport(Transport):
+    """Serve recorded responses by request key.
+
+    latency: "none" (instant), "recorded" (sleep the recorded latency / chunk timings)
+    or a float scale factor applied to recorded timings.
+    strict: raise ReplayMiss for unrecorded requests; otherwise return an empty text response.
+    """
+
+    def __init__(self, path: str, latency="none", strict: bool = True):
+        self.latency = latency
+        self.strict = strict
+        self.cache_scope = f"replay:{os.path.abspath(path)}"
+        self.entries = {}
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], entry)
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _scale(self) -> float:
+        if self.latency == "none":
+            return 0.0
+        if self.latency == "recorded":
+            return 1.0
+        return float(self.latency)
+
+    def _lookup(self, request):
+        entry = self.entries.get(request_key(request))
+        if entry is None:
+            self.stats["misses"] += 1
+            if self.strict:
+                raise ReplayMiss(f"no recorded response for request {request_key(request)[:12]}")
+            return {"response": {"content": [{"type": "text", "text": ""}], "usage": {}},
+                    "latency_s": 0, "ttft_s": 0}
+        self.stats["hits"] += 1
+        return entry
+
+    def create(self, request):
+        entry = self._lookup(request)
+        if self._scale():
+            time.sleep(entry["latency_s"] * self._scale())
+        return response_from_dict(entry["response"])
+
+    def stream(self, request):
+        entry = self._lookup(request)
+        scale = self._scale()
+        chunks = entry.get("chunks") or [[entry["latency_s"], _text_of(entry["response"])]]
+
+        def replay():
+            t0 = time.perf_counter()
+            for at, text in chunks:
+                if scale:
+                    delay = at * scale - (time.perf_counter() - t0)
+                    if delay > 0:
+                        time.sleep(delay)
+                yield text
+
+        return _Stream(replay(), response_from_dict(entry["response"]))
+
+
+# =========================================================================
+# SYNTHETIC LOCAL SERVER
+# =========================================================================
+
+def _instance_for(schema: dict, rng: random.Random, depth: int = 0):
+    """Smallest plausible value satisfying a JSON schema (enough for PayrollAI's tools)."""
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {k: _instance_for(v, rng, depth + 1) for k, v in props.items()
+                if k in schema.get("required", props) or depth == 0}
+    if kind == "array":
+        n = 3 if depth <= 1 else 1
+        return [_instance_for(schema.get("items", {}), rng, depth + 1) for _ in range(n)]
+    if kind == "integer":
+        return max(schema.get("minimum", 1), min(schema.get("maximum", 100), rng.randint(1, 5)))
+    if kind == "number":
+        return round(rng.uniform(100, 5000), 2)
+    if kind == "boolean":
+        return False
+    return "synthetic"
+
+
+class SyntheticTransport(Transport):
+    """Emulated API with tunable timing and limits, for throughput/concurrency work.
+
+    latency_s: time to first token; tokens_per_s: output speed after that;
+    output_tokens: response length; rpm: requests per rolling minute before 429;
+    max_concurrent: in-flight requests before 529 overloaded; failure_rate: random 500s.
+    Responses are deterministic per request (seeded by the request key).
+    """
+
+    def __init__(self, latency_s: float = 0.5, tokens_per_s: float = 200.0, output_tokens: int = 300,
+                 rpm: Optional[int] = None, max_concurrent: Optional[int] = None,
+                 failure_rate: float = 0.0, jitter: float = 0.1, seed: int = 0):
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.output_tokens = output_tokens
+        self.cache_scope = f"synthetic:{seed}:{output_tokens}"
+        self.rpm = rpm
+        self.max_concurrent = max_concurrent
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self._in_flight = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "overloaded": 0, "failed": 0}
+
+    def _admit(self):
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            while self._window and now - self._window[0] > 60:
+                self._window.popleft()
+            if self.rpm and len(self._window) >= self.rpm:
+                self.stats["rate_limited"] += 1
+                raise TransportError(429, "rate_limit_error (synthetic)",
+                                     retry_after=round(60 - (now - self._window[0]), 2))
+            if self.max_concurrent and self._in_flight >= self.max_concurrent:
+                self.stats["overloaded"] += 1
+                raise TransportError(529, "overloaded_error (synthetic)")
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.stats["failed"] += 1
+                raise TransportError(500, "api_error (synthetic)")
+            self._window.append(now)
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _respond(self, request) -> dict:
+        key = request_key(request)
+        rng = random.Random(key)
+        prompt = json.dumps(request.get("messages", []))
+        n_out = min(self.output_tokens, request.get("max_tokens") or self.output_tokens)
+        tools = request.get("tools") or []
+        if tools:
+            content = [{"type": "tool_use", "name": tools[0]["name"],
+                        "input": _instance_for(tools[0]["input_schema"], rng)}]
+        elif "JSON array" in prompt:
+            items = [{"id": f"SYN-{i + 1:03d}", "description": f"synthetic item {i + 1}"}
+                     for i in range(max(1, n_out // 25))]
+            content = [{"type": "text", "text": json.dumps(items, indent=2)}]
+        else:
+            words = " ".join(f"synthetic{rng.randint(0, 999)}" for _ in range(max(1, n_out * 3 // 4)))
+            content = [{"type": "text", "text": words}]
+        return {"content": content,
+                "usage": {"input_tokens": len(prompt) // 4, "output_tokens": n_out}}
+
+    def _ttft(self):
+        return max(0.0, self.latency_s * (1 + self._rng.uniform(-self.jitter, self.jitter)))
+
+    def create(self, request):
+        self._admit()
+        try:
+            data = self._respond(request)
+            time.sleep(self._ttft() + data["usage"]["output_tokens"] / self.tokens_per_s)
+            return response_from_dict(data)
+        finally:
+            self._release()
+
+    def stream(self, request):
+        self._admit()
+        data = self._respond(request)
+        text = _text_of(data)
+        per_chunk = 16  # characters (~4 tokens) per text delta
+        delay = (per_chunk / 4) / self.tokens_per_s
+        ttft = self._ttft()
+
+        def emit():
+            time.sleep(ttft)
+            for i in range(0, len(text), per_chunk):
+                yield text[i:i + per_chunk]
+                time.sleep(delay)
+
+        return _Stream(emit(), response_from_dict(data), lambda completed: self._release())
+
+
+def transport_from_env() -> Optional[Transport]:
+    """PAYROLL_AI_TRANSPORT = anthropic | record:<path> | replay:<path> | synthetic[:latency_s]"""
+    spec = os.environ.get("PAYROLL_AI_TRANSPORT", "")
+    kind, _, arg = spec.partition(":")
+    if kind == "record":
+        return RecordingTransport(AnthropicTransport(), arg)
+    if kind == "replay":
+        return ReplayTransport(arg, latency=os.environ.get("PAYROLL_AI_REPLAY_LATENCY", "none"))
+    if kind == "synthetic":
+        return SyntheticTransport(latency_s=float(arg) if arg else 0.5)
+    if kind == "anthropic":
+        return AnthropicTransport()
+    return None
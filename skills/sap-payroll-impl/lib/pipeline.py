@@ -0,0 +1,303 @@
+"""
+Pipeline Orchestrator for SAP Payroll Implementation Toolkit
+============================================================
+Runs /payroll-implement as a dependency graph instead of a fixed sequence.
+Every node (an AI call or a deliverable generator) starts as soon as its
+inputs are ready, on a shared thread pool, so end-to-end time approaches the
+critical path rather than the sum of all steps.
+
+Many AI calls only need the parsed questionnaire (industry profile, executive
+summary, complexity assessment, design rationale, test scenarios). They are
+marked speculative and start alongside QA. A gate node (the QA verdict)
+decides whether the run continues: on FAIL, speculative nodes that have not
+started are cancelled, running ones are abandoned (their results discarded
+and the run returns without waiting for them), and everything downstream of
+the gate is blocked.
+
+run_graph() is generic; implementation_pipeline() builds the graph for the
+full QA → funcspec → config workbook → briefing flow.
+
+Usage:
+    from pipeline import implementation_pipeline, run_graph, format_run
+    nodes = implementation_pipeline(ai, company, answered_sections, qa_findings, "out/")
+    run = run_graph(nodes, max_workers=8)
+    print(format_run(run))
+    if run["gate_failed"]:
+        ...  # present run["results"]["qa_verdict"] and stop, as on a QA FAIL
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+
+QA_SCORE_KEYS = ("completeness_score", "clarity_score", "sap_readiness_score")
+
+
+class Node:
+    """One unit of work. fn receives {dep_name: dep_result} for its deps.
+
+    speculative: started before the gate resolves; dropped if a gate fails.
+    gate: predicate on the node's result; False fails the run's gate.
+    """
+
+    def __init__(self, name: str, fn: Callable[[dict], object], deps=(),
+                 speculative: bool = False, gate: Optional[Callable[[object], bool]] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.speculative = speculative
+        self.gate = gate
+
+    def __repr__(self):
+        return f"Node({self.name!r}, deps={list(self.deps)})"
+
+
+def _topo_order(nodes: dict) -> list:
+    """Names in dependency order; raises ValueError on unknown deps or cycles."""
+    order, state = [], {}
+
+    def visit(name, trail):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join(trail + [name])}")
+        state[name] = "visiting"
+        for dep in nodes[name].deps:
+            if dep not in nodes:
+                raise ValueError(f"{name} depends on unknown node {dep!r}")
+            visit(dep, trail + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in nodes:
+        visit(name, [])
+    return order
+
+
+def critical_path(nodes: dict, timings: dict):
+    """(seconds, [names]) of the longest dependency chain by measured duration."""
+    best = {}
+    for name in _topo_order(nodes):
+        if name not in timings:
+            continue
+        start, end = timings[name]
+        prev = max((best[d] for d in nodes[name].deps if d in best), key=lambda b: b[0], default=(0.0, []))
+        best[name] = (prev[0] + end - start, prev[1] + [name])
+    return max(best.values(), key=lambda b: b[0], default=(0.0, []))
+
+
+def run_graph(node_list: list, max_workers: int = 8, on_event: Optional[Callable] = None) -> dict:
+    """Execute nodes as their dependencies complete.
+
+    Returns {"results", "status", "errors", "timings", "gate_failed", "wall_s",
+    "sum_s", "critical_path_s", "critical_path"}. status per node is one of
+    done / failed / gate_failed / cancelled / discarded / blocked.
+    on_event(name, status) is called as nodes start and finish.
+    """
+    nodes = {n.name: n for n in node_list}
+    if len(nodes) != len(node_list):
+        raise ValueError("Duplicate node names")
+    order = _topo_order(nodes)
+    results, status, errors, timings = {}, {}, {}, {}
+    gate_failed = None
+    t0 = time.perf_counter()
+    notify = on_event or (lambda name, state: None)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    running = {}
+
+    def call(node, inputs):
+        start = time.perf_counter() - t0
+        result = node.fn(inputs)
+        return result, (start, time.perf_counter() - t0)
+
+    try:
+        while True:
+            # Resolve every waiting node whose fate is already decided
+            progressed = True
+            while progressed:
+                progressed = False
+                for name in order:
+                    if name in status or name in running.values():
+                        continue
+                    node = nodes[name]
+                    if gate_failed and node.speculative:
+                        status[name] = "cancelled"
+                    elif any(status.get(d) not in (None, "done") for d in node.deps):
+                        status[name] = "blocked"
+                    elif all(status.get(d) == "done" for d in node.deps):
+                        future = pool.submit(call, node, {d: results[d] for d in node.deps})
+                        running[future] = name
+                        notify(name, "started")
+                    else:
+                        continue
+                    if name in status:
+                        notify(name, status[name])
+                    progressed = True
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                node = nodes[name]
+                try:
+                    result, timings[name] = future.result()
+                except Exception as e:
+                    status[name] = "failed"
+                    errors[name] = f"{type(e).__name__}: {e}"
+                    notify(name, "failed")
+                    continue
+                results[name] = result
+                if node.gate and not node.gate(result):
+                    status[name] = "gate_failed"
+                    gate_failed = gate_failed or name
+                else:
+                    status[name] = "done"
+                notify(name, status[name])
+            if gate_failed:
+                # Speculative work in flight is abandoned; don't wait on it
+                for future, name in list(running.items()):
+                    if nodes[name].speculative:
+                        status[name] = "cancelled" if future.cancel() else "discarded"
+                        running.pop(future)
+                        notify(name, status[name])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    wall = time.perf_counter() - t0
+    cp_s, cp = critical_path(nodes, {n: t for n, t in timings.items() if status.get(n) in ("done", "gate_failed")})
+    return {"results": results, "status": status, "errors": errors, "timings": timings,
+            "gate_failed": gate_failed, "wall_s": round(wall, 3),
+            "sum_s": round(sum(end - start for start, end in timings.values()), 3),
+            "critical_path_s": round(cp_s, 3), "critical_path": cp}
+
+
+def format_run(run: dict) -> str:
+    counts = {}
+    for state in run["status"].values():
+        counts[state] = counts.get(state, 0) + 1
+    lines = [f"Pipeline: {run['wall_s']:.2f}s wall vs {run['sum_s']:.2f}s sequential "
+             f"(critical path {run['critical_path_s']:.2f}s: {' → '.join(run['critical_path'])})",
+             "  " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items()))]
+    if run["gate_failed"]:
+        lines.append(f"  Gate {run['gate_failed']} failed — downstream work cancelled")
+    for name, err in run["errors"].items():
+        lines.append(f"  FAILED {name}: {err}")
+    return "\n".join(lines)
+
+
+# =========================================================================
+# /payroll-implement GRAPH
+# =========================================================================
+
+def scope_summary(company: dict) -> dict:
+    """Profile fields the summary/complexity/scenario prompts need."""
+    keys = ("name", "industry", "employees", "states", "pas", "psas", "ee_subgroups", "payroll_areas",
+            "benefits", "wt_count", "unions", "garnishments", "mid_year", "benefits_approach",
+            "time_approach", "concurrent_employment")
+    return {k: company[k] for k in keys if k in company}
+
+
+def _valid_scores(analysis) -> list:
+    """The 1-5 scores of an answer analysis. Unavailable analyses (completeness_score 0,
+    raw_analysis fallbacks) carry no scores."""
+    if not isinstance(analysis, dict) or "raw_analysis" in analysis:
+        return []
+    return [analysis[k] for k in QA_SCORE_KEYS
+            if isinstance(analysis.get(k), (int, float)) and not isinstance(analysis[k], bool)
+            and 1 <= analysis[k] <= 5]
+
+
+def qa_verdict(findings: list, quality: list) -> dict:
+    """PASS / PASS WITH CONDITIONS / FAIL from deterministic QA findings and AI answer scores.
+    FAIL on any Critical finding; conditions for warnings or answers scored 1/5 anywhere.
+    Answers without valid scores (AI disabled or failing) are not counted as weak."""
+    critical = [f for f in findings if f.get("severity") == "Critical"]
+    warnings = [f for f in findings if f.get("severity") == "Warning"]
+    weak = [i for i, q in enumerate(quality) if min(_valid_scores(q), default=5) <= 1]
+    if critical:
+        verdict = "FAIL"
+    elif warnings or weak:
+        verdict = "PASS WITH CONDITIONS"
+    else:
+        verdict = "PASS"
+    return {"status": verdict, "critical": critical, "warnings": warnings, "weak_answers": weak}
+
+
+def _qa_items(answered_sections: dict) -> list:
+    items = []
+    for section, answers in answered_sections.items():
+        if isinstance(answers, dict):
+            items.extend((section, str(q), str(a)) for q, a in answers.items())
+        else:
+            items.append((section, section, str(answers)))
+    return items
+
+
+def implementation_pipeline(ai, company: dict, answered_sections: dict, qa_findings: list,
+                            output_dir: str = ".", design_decisions: Optional[dict] = None) -> list:
+    """Nodes for the full /payroll-implement flow.
+
+    ai: PayrollAI. company: profile dict (gen_helpers format) parsed from the
+    questionnaire. answered_sections: {section: {question: answer}}. qa_findings:
+    the deterministic QA findings ([{"severity", ...}]). design_decisions:
+    {funcspec section: decisions} for per-section design rationale.
+    """
+    from gen_helpers import generate_config_workbook
+    from config_conflicts import detect_conflicts, read_tabs
+
+    scope = scope_summary(company)
+    states = company.get("states", [])
+    workbook = os.path.join(output_dir, f"SAP_Payroll_ConfigWorkbook_{company.get('code', 'X')}.xlsx")
+
+    nodes = [
+        # QA — always runs
+        Node("qa_quality", lambda r: ai.analyze_response_quality_batch(_qa_items(answered_sections))),
+        Node("qa_contradictions", lambda r: ai.detect_contradictions(answered_sections)),
+        Node("qa_gaps", lambda r: ai.predict_missing_config(answered_sections)),
+        Node("qa_risk", lambda r: ai.generate_risk_narrative(qa_findings)),
+        Node("qa_verdict", lambda r: qa_verdict(qa_findings, r["qa_quality"]), deps=["qa_quality"],
+             gate=lambda v: v["status"] != "FAIL"),
+
+        # Speculative — need only the parsed questionnaire
+        Node("industry_profile", lambda r: ai.generate_industry_profile(
+            company.get("name", ""), company.get("industry", ""), company.get("employees", 0), states),
+            speculative=True),
+        Node("executive_summary", lambda r: ai.generate_executive_summary(company.get("name", ""), scope),
+             speculative=True),
+        Node("complexity", lambda r: ai.assess_complexity_risk(scope), speculative=True),
+        Node("test_scenarios", lambda r: ai.generate_smart_test_scenarios(scope, states), speculative=True),
+    ]
+    rationale = []
+    for section, decisions in (design_decisions or {}).items():
+        name = f"rationale:{section}"
+        nodes.append(Node(name, lambda r, s=section, d=decisions: ai.generate_design_rationale(s, d),
+                          speculative=True))
+        rationale.append(name)
+
+    def build_workbook(r):
+        generate_config_workbook(company, workbook)
+        return workbook
+
+    def conflicts(r):
+        tabs = read_tabs(r["config_workbook"])
+        local, _ = detect_conflicts(tabs, company)
+        summary = {tab: {"headers": t["headers"], "rows": len(t["rows"])} for tab, t in tabs.items()}
+        return ai.detect_config_conflicts(summary, local_conflicts=local)
+
+    def briefing(r):
+        project = {"scope": scope, "qa": r["qa_verdict"]["status"], "risk_narrative": r["qa_risk"],
+                   "executive_summary": r["executive_summary"], "complexity": r["complexity"],
+                   "config_conflicts": r["config_conflicts"],
+                   "design_rationale": {n.split(":", 1)[1]: r[n] for n in rationale}}
+        return ai.generate_executive_briefing(project)
+
+    # Gated — only after QA passes
+    nodes += [
+        Node("config_workbook", build_workbook, deps=["qa_verdict"]),
+        Node("config_conflicts", conflicts, deps=["config_workbook"]),
+        Node("briefing", briefing, deps=["qa_verdict", "qa_risk", "executive_summary", "complexity",
+                                         "config_conflicts"] + rationale),
+    ]
+    return nodes
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Company Profile Schema — compiled validation for COMPANIES-style profile dicts.
+The profile dict is the contract between test_harness, gen_helpers, validator and
+every parser that produces profiles. The schema is compiled once into a flat list
+of check functions, so validating thousands of profiles before a wave is a tight
+loop rather than a generic schema walk.
+"""
+
+BENEFITS_APPROACHES = ("full", "hybrid", "deductions_only")
+TIME_APPROACHES = ("full", "negative", "third_party")
+
+
+def _is_str(v):
+    return isinstance(v, str) and v != ""
+
+
+def _is_pos_int(v):
+    return isinstance(v, int) and not isinstance(v, bool) and v > 0
+
+
+def _is_bool(v):
+    return isinstance(v, bool)
+
+
+def _is_str_list(v):
+    return isinstance(v, list) and len(v) > 0 and all(_is_str(x) for x in v)
+
+
+def _is_str_map(v):
+    return isinstance(v, dict) and len(v) > 0 and all(_is_str(k) and _is_str(x) for k, x in v.items())
+
+
+# field → (required, predicate, message). Optional fields fall back to validator defaults.
+PROFILE_SCHEMA = {
+    "id": (True, _is_pos_int, "positive int"),
+    "code": (True, _is_str, "non-empty string"),
+    "name": (True, _is_str, "non-empty string"),
+    "industry": (True, _is_str, "non-empty string"),
+    "employees": (True, _is_pos_int, "positive int"),
+    "company_code": (True, _is_str, "non-empty string"),
+    "pas": (True, _is_str_map, "non-empty {PA code: state}"),
+    "psas": (True, _is_str_list, "non-empty list of PSA codes"),
+    "ee_subgroups": (True, _is_str_map, "non-empty {PERSK: description}"),
+    "payroll_areas": (True, _is_str_map, "non-empty {area: frequency}"),
+    "unions": (True, _is_bool, "bool"),
+    "states": (True, _is_str_list, "non-empty list of state codes"),
+    "benefits": (True, lambda v: isinstance(v, list) and all(_is_str(x) for x in v), "list of plan codes"),
+    "wt_count": (True, _is_pos_int, "positive int"),
+    "garnishments": (True, _is_bool, "bool"),
+    "mid_year": (True, _is_bool, "bool"),
+    "benefits_approach": (False, lambda v: v in BENEFITS_APPROACHES, f"one of {BENEFITS_APPROACHES}"),
+    "time_approach": (False, lambda v: v in TIME_APPROACHES, f"one of {TIME_APPROACHES}"),
+    "concurrent_employment": (False, _is_bool, "bool"),
+}
+
+_compiled = None
+
+
+def compile_profile_validator(schema=None, valid_states=None):
+    """Compile the schema into a single function profile → [error strings].
+
+    valid_states defaults to the jurisdictions in gen_helpers.STATE_GEOCODES so a
+    profile can never reference a state the generator has no geocode for.
+    """
+    schema = schema or PROFILE_SCHEMA
+    if valid_states is None:
+        from gen_helpers import STATE_GEOCODES
+        valid_states = frozenset(s for s in STATE_GEOCODES if s != "Federal")
+
+    field_checks = [(f, req, pred, msg) for f, (req, pred, msg) in schema.items()]
+
+    def check(profile):
+        errors = []
+        for field, required, pred, msg in field_checks:
+            if field not in profile:
+                if required:
+                    errors.append(f"{field}: missing")
+                continue
+            if not pred(profile[field]):
+                errors.append(f"{field}: expected {msg}, got {profile[field]!r}")
+        states = profile.get("states")
+        if isinstance(states, list):
+            bad = [s for s in states if s not in valid_states]
+            if bad:
+                errors.append(f"states: no geocode for {bad}")
+            pas = profile.get("pas")
+            if isinstance(pas, dict):
+                stray = sorted({st for st in pas.values() if st not in states})
+                if stray:
+                    errors.append(f"pas: PA states {stray} not in states")
+        return errors
+
+    return check
+
+
+def validate_profiles(profiles):
+    """Validate a profile pool. Returns [(profile code or index, error)]; empty means valid.
+    Also enforces unique ids and codes across the pool."""
+    global _compiled
+    if _compiled is None:
+        _compiled = compile_profile_validator()
+    check = _compiled
+
+    problems = []
+    seen_ids, seen_codes = set(), set()
+    for i, p in enumerate(profiles):
+        label = p.get("code", f"#{i}") if isinstance(p, dict) else f"#{i}"
+        if not isinstance(p, dict):
+            problems.append((label, "not a dict"))
+            continue
+        for err in check(p):
+            problems.append((label, err))
+        pid, code = p.get("id"), p.get("code")
+        if pid in seen_ids:
+            problems.append((label, f"id: duplicate {pid}"))
+        if code in seen_codes:
+            problems.append((label, f"code: duplicate {code}"))
+        seen_ids.add(pid)
+        seen_codes.add(code)
+    return problems
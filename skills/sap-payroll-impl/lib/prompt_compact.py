@@ -0,0 +1,224 @@
+"""
+Prompt Payload Compaction for SAP Payroll Implementation Toolkit
+================================================================
+PayrollAI prompts embed whole questionnaire / workbook / project structures.
+Pretty-printed JSON spends most of its tokens on indentation and on keys
+repeated in every row. compact_payload() shrinks a payload before it is
+embedded:
+
+1. Tabular encoding — lists of uniform dicts become {"columns": [...], "rows": [[...]]}
+2. Deduplication — long strings repeated 3+ times become "&1", "&2"... refs
+   with a single "_refs" legend
+3. Minified JSON (no indentation, no spaces after separators)
+4. Deterministic truncation to a token budget — the largest list is cut to
+   its head (with a "+N more" marker) until the payload fits, then the
+   longest strings are clipped, then the largest objects are cut the same
+   way. The "_refs" legend counts toward the budget and drops refs whose
+   rows were cut
+
+Token counts are estimated at ~4 characters per token, which is close enough
+for budgeting and needs no tokenizer.
+
+Usage:
+    from prompt_compact import compact_payload, estimate_tokens
+    text = compact_payload(all_tabs_summary, budget_tokens=12000)
+"""
+
+import json
+import re
+
+CHARS_PER_TOKEN = 4
+DEDUP_MIN_LEN = 24
+DEDUP_MIN_COUNT = 3
+MIN_STRING_CLIP = 80
+MORE_KEY = "..."  # member that counts an object's cut members
+REF_RE = re.compile(r'"(&\d+)"')
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def minify(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def tabularize(obj):
+    """Recursively encode lists of dicts that share their keys as column/row tables."""
+    if isinstance(obj, dict):
+        return {k: tabularize(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        items = [tabularize(v) for v in obj]
+        if len(items) >= 2 and all(isinstance(v, dict) for v in items):
+            columns = []
+            for v in items:
+                for k in v:
+                    if k not in columns:
+                        columns.append(k)
+            if not columns:
+                return items  # all empty dicts: nothing to tabulate
+            filled = sum(len(v) for v in items) / (len(items) * len(columns))
+            # Sparse rows would waste more on nulls than they save on keys
+            if filled >= 0.6:
+                return {"columns": columns, "rows": [[v.get(c) for c in columns] for v in items]}
+        return items
+    return obj
+
+
+def dedupe(obj):
+    """Replace long strings that repeat DEDUP_MIN_COUNT+ times with short refs.
+    Returns the payload unchanged when nothing repeats."""
+    counts = {}
+
+    def count(o):
+        if isinstance(o, dict):
+            for v in o.values():
+                count(v)
+        elif isinstance(o, list):
+            for v in o:
+                count(v)
+        elif isinstance(o, str) and len(o) >= DEDUP_MIN_LEN:
+            counts[o] = counts.get(o, 0) + 1
+
+    count(obj)
+    repeated = sorted((s for s, n in counts.items() if n >= DEDUP_MIN_COUNT), key=lambda s: (-counts[s], s))
+    if not repeated:
+        return obj
+    refs = {s: f"&{i + 1}" for i, s in enumerate(repeated)}
+
+    def swap(o):
+        if isinstance(o, dict):
+            return {k: swap(v) for k, v in o.items()}
+        if isinstance(o, list):
+            return [swap(v) for v in o]
+        return refs.get(o, o) if isinstance(o, str) else o
+
+    return {"_refs": {ref: s for s, ref in refs.items()}, "data": swap(obj)}
+
+
+def _is_marker(v):
+    return isinstance(v, str) and v.startswith("... +") and v.endswith(" more")
+
+
+def _real_len(container):
+    if isinstance(container, dict):
+        return len(container) - (1 if MORE_KEY in container else 0)
+    return len(container) - (1 if container and _is_marker(container[-1]) else 0)
+
+
+def _is_table(obj):
+    return isinstance(obj, dict) and set(obj) == {"columns", "rows"}
+
+
+def _largest(obj, kind, path=()):
+    """(encoded size, path) of the biggest list (kind=list) or object (kind=dict) with
+    more than one real item, or None. Tables are cut by whole rows only, so columns
+    and row cells stay aligned."""
+    best = None
+    if _is_table(obj):
+        if kind is list:
+            rows = obj["rows"]
+            return (len(minify(rows)), path + ("rows",)) if _real_len(rows) > 1 else None
+        children = [(("rows", i), row) for i, row in enumerate(obj["rows"])]
+    elif isinstance(obj, (dict, list)):
+        children = [((k,), v) for k, v in (obj.items() if isinstance(obj, dict) else enumerate(obj))]
+        if isinstance(obj, kind) and _real_len(obj) > 1:
+            best = (len(minify(obj)), path)
+    else:
+        return None
+    for keys, v in children:
+        found = _largest(v, kind, path + keys)
+        if found and (best is None or found[0] > best[0]):
+            best = found
+    return best
+
+
+def _get(obj, path):
+    for k in path:
+        obj = obj[k]
+    return obj
+
+
+def _halve(container):
+    """Keep the first half of a list's items or an object's members, in place, and
+    count everything dropped so far in a "+N more" marker."""
+    real = _real_len(container)
+    keep = real // 2
+    if isinstance(container, dict):
+        omitted = int(container.pop(MORE_KEY, "+0 more").split("+")[1].split()[0])
+        for k in list(container)[keep:]:
+            del container[k]
+        container[MORE_KEY] = f"+{real - keep + omitted} more"
+    else:
+        omitted = int(container[-1].split("+")[1].split()[0]) if real < len(container) else 0
+        container[:] = container[:keep] + [f"... +{real - keep + omitted} more"]
+
+
+def _clip_strings(obj, limit):
+    if isinstance(obj, dict):
+        return {k: _clip_strings(v, limit) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_clip_strings(v, limit) for v in obj]
+    if isinstance(obj, str) and len(obj) > limit:
+        return obj[:limit] + f"... [+{len(obj) - limit} chars]"
+    return obj
+
+
+def truncate_to_budget(obj, budget_tokens: int):
+    """Shrink obj until its minified form fits budget_tokens. Deterministic: halves
+    the currently largest list (keeping its head), then clips long strings, then
+    halves the largest object. For dedupe() output the cuts apply to "data", and
+    the "_refs" legend keeps only refs still in use — it counts toward the budget."""
+    obj = json.loads(minify(obj))
+    budget_chars = budget_tokens * CHARS_PER_TOKEN
+    refs = None
+    if isinstance(obj, dict) and set(obj) == {"_refs", "data"}:
+        refs, obj = obj["_refs"], obj["data"]
+    root = {"data": obj}  # holder, so every cut has a path and nothing cuts the legend
+
+    def encoded(final=False):
+        """(payload, minified text) with the legend pruned to refs the data still uses."""
+        text = minify(root["data"])
+        if refs is None or (len(text) > budget_chars and not final):
+            return root["data"], text  # over budget even without the legend
+        used = set(REF_RE.findall(text))
+        legend = {ref: s for ref, s in refs.items() if ref in used}
+        if not legend:
+            return root["data"], text
+        return {"_refs": legend, "data": root["data"]}, f'{{"_refs":{minify(legend)},"data":{text}}}'
+
+    def over():
+        return len(encoded()[1]) > budget_chars
+
+    for kind in (list, dict):
+        while over():
+            found = _largest(root, kind)
+            if found is None:
+                break
+            _halve(_get(root, found[1]))
+        limit = 2000
+        while kind is list and over() and limit >= MIN_STRING_CLIP:
+            root = _clip_strings(root, limit)
+            refs = refs and _clip_strings(refs, limit)
+            limit //= 2
+    return encoded(final=True)[0]
+
+
+def compact_payload(obj, budget_tokens=None) -> str:
+    """Tabular + deduplicated + minified encoding of obj, truncated to budget_tokens."""
+    encoded = dedupe(tabularize(obj))
+    text = minify(encoded)
+    if budget_tokens and estimate_tokens(text) > budget_tokens:
+        text = minify(truncate_to_budget(encoded, budget_tokens))
+        if estimate_tokens(text) > budget_tokens:
+            # Nothing left to cut: the budget is smaller than the payload's skeleton
+            text = minify(f"... [payload omitted: over the {budget_tokens}-token budget]")
+    return text
+
+
+def compaction_report(obj, budget_tokens=None) -> dict:
+    """Token estimates for pretty-printed vs compacted encodings of obj."""
+    pretty = estimate_tokens(json.dumps(obj, indent=2, default=str))
+    compact = estimate_tokens(compact_payload(obj, budget_tokens))
+    return {"pretty_tokens": pretty, "compact_tokens": compact,
+            "saved_pct": round(100 * (1 - compact / pretty), 1) if pretty else 0.0}
@@ -0,0 +1,401 @@
+"""
+Questionnaire Parser for SAP Payroll Implementation Toolkit
+===========================================================
+Turns a completed discovery questionnaire (.docx from /payroll-questionnaire)
+into the COMPANIES-style profile dict that gen_helpers consumes, without an
+LLM pass over the document.
+
+word/document.xml is streamed with iterparse straight out of the zip; section
+headings ("Section 4: Compensation & Wage Types", "Section 1A: ...") open a
+section and every table under it is collected. Two-column tables are read as
+question → response; wider tables are kept as header-keyed rows. Placeholder
+responses ("[Enter company name]") count as unanswered.
+
+The profile is extracted from the answers with per-field rules (state names
+and codes, "S1 - Salaried Exempt" style code lists, benefit keywords, Section 1A
+option letters or checkbox marks) and validated with profile_schema. Fields that
+could not be read fall back to a default and are listed in "warnings".
+
+Usage:
+    from questionnaire_parser import parse_questionnaire
+    result = parse_questionnaire("SAP_Payroll_Questionnaire_Acme.docx", profile_id=1)
+    result["profile"]   # gen_helpers-ready dict
+    result["answers"]   # {"1": {"title", "answers": {question: response}, "tables": [...]}}
+    result["toggles"]   # Section 1A decisions, including OM scope
+    result["errors"]    # profile_schema violations (empty when valid)
+
+    python questionnaire_parser.py questionnaire.docx   # print the profile as JSON
+"""
+
+import re
+import zipfile
+from typing import Optional
+from xml.etree.ElementTree import iterparse
+
+from gap_rules import NEGATION
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+SECTION_HEADING = re.compile(r"^\s*Section\s+(\d{1,2}A?)\s*[:.\-–—]\s*(.+?)\s*$", re.I)
+PLACEHOLDER = re.compile(r"^\s*(\[[^\]]*\]\s*)+$|^\s*(tbd|n/?a|-+)?\s*$", re.I)
+
+STATE_NAMES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR",
+    "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC", "south dakota": "SD",
+    "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA",
+    "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}
+STATE_NAME_RE = re.compile(r"\b(" + "|".join(sorted(STATE_NAMES, key=len, reverse=True)) + r")\b", re.I)
+STATE_CODE_RE = re.compile(r"\b([A-Z]{2})\b")
+
+PAYROLL_FREQUENCIES = {"weekly": ("W1", "Weekly"), "bi-?weekly": ("B1", "Biweekly"),
+                       "semi-?monthly": ("S1", "Semi-monthly"), "monthly": ("M1", "Monthly")}
+
+# Plan code → keywords (first match wins per plan; explicit codes in the text count too)
+BENEFIT_KEYWORDS = {
+    "MED1": r"medical|health (plan|insurance)|ppo|hmo|hdhp",
+    "DEN1": r"dental",
+    "VIS1": r"vision",
+    "401K": r"401\s?\(?k\)?",
+    "403B": r"403\s?\(?b\)?",
+    "457B": r"457\s?\(?b\)?",
+    "ROTH": r"\broth\b",
+    "PENS": r"pension|defined benefit",
+    "HSA1": r"\bhsa\b|health savings",
+    "FSA1": r"\bfsa\b|flexible spending",
+    "LIFE": r"\blife\b|\bgtl\b",
+    "STD1": r"\bstd\b|short[- ]term disability",
+    "LTD1": r"\bltd\b|long[- ]term disability",
+    "TUTN": r"tuition",
+}
+BENEFIT_RES = {code: re.compile(pattern, re.I) for code, pattern in BENEFIT_KEYWORDS.items()}
+# Denial after the keyword in the same clause: "Life insurance: none", "Vision | N/A",
+# "Tuition reimbursement not offered"
+NEGATED_AFTER = re.compile(r"[^\n;,:|]*(?:[:|]\s*(no|none|n/?a|not applicable|declined|waived)\b"
+                           r"|\b(not|never)\s+(offered|provided|available|included)\b)", re.I)
+
+# Section 1A: toggle → (question pattern, {option letter: value}, {keyword pattern: value})
+TOGGLES = {
+    "time_approach": (r"time management", {"A": "full", "B": "negative", "C": "third_party"},
+                      {r"negative": "negative", r"3rd|third|import|kronos|adp|ceridian": "third_party",
+                       r"full|time eval|pt60": "full"}),
+    "benefits_approach": (r"benefits approach", {"A": "full", "B": "deductions_only", "C": "hybrid"},
+                          {r"hybrid": "hybrid", r"deduction|it0014": "deductions_only",
+                           r"full|pa-bn": "full"}),
+    "om_scope": (r"organi[sz]ational|\bom\b", {"A": "full", "B": "minimal", "C": "none"},
+                 {r"minimal": "minimal", r"\bno om\b|\bnone\b": "none", r"full": "full"}),
+    "mid_year": (r"go-?live timing", {"A": False, "B": True},
+                 {r"mid-?year|ytd": True, r"jan(uary)?\s*1|clean year": False}),
+    "concurrent_employment": (r"concurrent", {"A": True, "B": False},
+                              {r"^\s*no\b|standard|single": False, r"^\s*yes\b|multiple": True}),
+}
+SELECTED = re.compile(r"(?:☒|☑|✓|✔|■|\[x\]|\(x\))\s*\(?([A-C])\b", re.I)
+RESPONSE_HEADER = re.compile(r"response|selection|selected|answer|choice", re.I)
+LEADING_OPTION = re.compile(r"^\s*(?:(?i:option)\s+)?\(?([A-C])\)?(?:[\s.:\-–)]|$)")
+
+DEFAULT_WT_COUNT = 30
+SUBGROUP_ITEM = re.compile(r"\b([A-Z][A-Z0-9])\s*[-–:=]\s*([^;\n,]+)")
+PSA_CODE = re.compile(r"^\s*([A-Z][A-Z0-9]{1,4})\b")
+PA_CODE = re.compile(r"\b([A-Z][A-Z0-9]{3})\b")
+WT_CODE = re.compile(r"(?<![\w/])(/\d{3}|[1-9]\d{3})(?!\d)")
+
+
+# =========================================================================
+# STREAMING DOCX READ
+# =========================================================================
+
+def _text(elem) -> str:
+    return "".join(t.text or "" for t in elem.iter(f"{W}t"))
+
+
+def read_sections(path: str) -> dict:
+    """{section id: {"title", "paragraphs": [...], "tables": [[[cell text, ...], ...]]}}.
+    Content before the first section heading is filed under "0"."""
+    sections = {"0": {"title": "Front matter", "paragraphs": [], "tables": []}}
+    current = sections["0"]
+    depth = 0  # table nesting
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        for event, elem in iterparse(f, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == f"{W}tbl":
+                    depth += 1
+                continue
+            if tag == f"{W}tbl":
+                depth -= 1
+                if depth == 0:
+                    rows = []
+                    for tr in elem.iter(f"{W}tr"):
+                        cells = ["\n".join(_text(p) for p in tc.iter(f"{W}p")).strip()
+                                 for tc in tr.findall(f"{W}tc")]
+                        if any(cells):
+                            rows.append(cells)
+                    current["tables"].append(rows)
+                    elem.clear()
+            elif tag == f"{W}p" and depth == 0:
+                text = _text(elem).strip()
+                m = SECTION_HEADING.match(text)
+                if m:
+                    # Table-of-contents entries match too; the real heading comes last and its title wins
+                    current = sections.setdefault(m.group(1).upper(), {"paragraphs": [], "tables": []})
+                    current["title"] = re.sub(r"\s*\d+$", "", m.group(2))
+                elif text:
+                    current["paragraphs"].append(text)
+                elem.clear()
+    return sections
+
+
+def _answered(value: Optional[str]) -> Optional[str]:
+    if value is None or PLACEHOLDER.match(value):
+        return None
+    return value.strip()
+
+
+def answer_map(sections: dict) -> dict:
+    """Per-section {"title", "answers": {question: response or None}, "tables": [row dicts]}."""
+    out = {}
+    for sid, sec in sections.items():
+        answers, tables = {}, []
+        for rows in sec["tables"]:
+            if not rows:
+                continue
+            width = max(len(r) for r in rows)
+            if width == 2:
+                for r in rows:
+                    q = r[0].strip() if r else ""
+                    if q and not re.match(r"^(question|item|question\s*/\s*item)$", q, re.I):
+                        answers[q] = _answered(r[1] if len(r) > 1 else None)
+            else:
+                header = rows[0]
+                tables.append([{h or f"col{i}": (r[i] if i < len(r) else "") for i, h in enumerate(header)}
+                               for r in rows[1:]])
+        out[sid] = {"title": sec["title"], "answers": answers, "tables": tables}
+    return out
+
+
+# =========================================================================
+# PROFILE EXTRACTION
+# =========================================================================
+
+def _find(section: dict, pattern: str) -> Optional[str]:
+    """First answered response whose question matches pattern."""
+    rx = re.compile(pattern, re.I)
+    for q, a in (section or {}).get("answers", {}).items():
+        if a and rx.search(q):
+            return a
+    return None
+
+
+def _section_text(section: dict) -> str:
+    if not section:
+        return ""
+    parts = [f"{q}: {a}" for q, a in section["answers"].items() if a]
+    for table in section["tables"]:
+        parts.extend(" | ".join(str(v) for v in row.values()) for row in table)
+    return "\n".join(parts)
+
+
+def parse_states(text: str, valid: frozenset) -> list:
+    found = []
+    for m in STATE_NAME_RE.finditer(text):
+        found.append(STATE_NAMES[m.group(1).lower()])
+    for m in STATE_CODE_RE.finditer(text):
+        found.append(m.group(1))
+    return [s for s in dict.fromkeys(found) if s in valid]
+
+
+def _code_map(text: str) -> dict:
+    return {m.group(1): m.group(2).strip() for m in SUBGROUP_ITEM.finditer(text or "")}
+
+
+def _first_int(text: Optional[str]) -> Optional[int]:
+    m = re.search(r"\d[\d,]*", text or "")
+    return int(m.group(0).replace(",", "")) if m else None
+
+
+def _yes(text: Optional[str]) -> Optional[bool]:
+    if not text:
+        return None
+    if re.match(r"^\s*(no|none|non-?union|not applicable|n/?a)\b", text, re.I):
+        return False
+    return True
+
+
+def _toggle(row_texts: list, letters: dict, keywords: dict):
+    """Selected value from a Section 1A answer: checkbox mark, leading option
+    letter, then keywords (keywords only on a response, never the options list)."""
+    for text in row_texts:
+        m = SELECTED.search(text)
+        if m and m.group(1).upper() in letters:
+            return letters[m.group(1).upper()]
+    response = row_texts[-1] if row_texts else ""
+    m = LEADING_OPTION.match(response)
+    if m and m.group(1).upper() in letters:
+        return letters[m.group(1).upper()]
+    for pattern, value in keywords.items():
+        if re.search(pattern, response, re.I):
+            return value
+    return None
+
+
+def parse_toggles(section: dict) -> dict:
+    """Section 1A decisions from a Question | Response table or a
+    Decision | Options | Impact [| Response/Selection] table."""
+    toggles = {}
+    if not section:
+        return toggles
+    candidates = [(q, [a]) for q, a in section["answers"].items() if a]
+    for table in section["tables"]:
+        for row in table:
+            values = list(row.values())
+            if not values:
+                continue
+            response = [v for k, v in row.items() if RESPONSE_HEADER.search(k) and _answered(v)]
+            options = [v for k, v in row.items() if "option" in k.lower()]
+            # Keywords only count in a response cell; inside an options list only checkbox marks do
+            texts = options + (response or [""]) if options else (response or values[1:2])
+            candidates.append((values[0], texts))
+    for name, (question, letters, keywords) in TOGGLES.items():
+        for q, texts in candidates:
+            if re.search(question, q, re.I):
+                value = _toggle(texts, letters, keywords)
+                if value is not None:
+                    toggles[name] = value
+                    break
+    return toggles
+
+
+def parse_benefits(text: str) -> list:
+    plans = []
+    for code, rx in BENEFIT_RES.items():
+        for m in list(rx.finditer(text)) + list(re.finditer(rf"\b{code}\b", text)):
+            if not (NEGATION.search(text[max(0, m.start() - 12):m.start()])
+                    or NEGATED_AFTER.match(text, m.end())):
+                plans.append(code)
+                break
+    # A second medical plan: two distinct network types offered side by side
+    if "MED1" in plans and len({t.lower() for t in re.findall(r"\b(ppo|hmo|epo|pos)\b", text, re.I)}) >= 2:
+        plans.insert(plans.index("MED1") + 1, "MED2")
+    return plans
+
+
+def _initials(name: str) -> str:
+    words = [w for w in re.findall(r"[A-Za-z]+", name) if w.lower() not in ("inc", "llc", "corp", "co", "the", "of", "and")]
+    return "".join(w[0] for w in words[:4]).upper() or "CO"
+
+
+def extract_profile(answers: dict, profile_id: int = 1, code: Optional[str] = None):
+    """(profile, toggles, warnings) from an answer_map()."""
+    from gen_helpers import STATE_GEOCODES
+    valid_states = frozenset(s for s in STATE_GEOCODES if s != "Federal")
+    s1, s2, s3 = answers.get("1"), answers.get("2"), answers.get("3")
+    warnings = []
+
+    def need(field, value, default):
+        if value in (None, "", [], {}):
+            warnings.append(f"{field}: not found in questionnaire, defaulted to {default!r}")
+            return default
+        return value
+
+    name = _find(s1, r"legal entity|company name") or ""
+    industry_text = _find(s1, r"industry") or ""
+    industry = re.split(r"\s*[/(,;]\s*(?=naics|\d)|\s+-\s+", industry_text, flags=re.I)[0].strip()
+    states = parse_states(_find(s1, r"states") or "", valid_states)
+
+    # Personnel areas: "MHS1 - Seattle, WA" lines or a PA table
+    pas = {}
+    pa_text = _find(s2, r"personnel areas?") or ""
+    pa_lines = re.split(r"[;\n]", pa_text)
+    for table in (s2 or {}).get("tables", []):
+        for row in table:
+            pa_lines.append(" | ".join(str(v) for v in row.values()))
+    for line in pa_lines:
+        m = PA_CODE.search(line)
+        st = parse_states(line[m.end():], valid_states) if m else []
+        if m and st:
+            pas.setdefault(m.group(1), st[0])
+    if not states:
+        states = list(dict.fromkeys(pas.values()))
+    for st in pas.values():
+        if st not in states:
+            states.append(st)
+
+    psa_text = _find(s2, r"subareas?") or ""
+    psas = list(dict.fromkeys(m.group(1) for m in map(PSA_CODE.match, re.split(r"[,;\n]", psa_text)) if m))
+    subgroups = _code_map(_find(s2, r"subgroups?"))
+
+    areas = _code_map(_find(s3, r"payroll areas?"))
+    if not areas:
+        freq_text = _find(s3, r"payroll areas?|frequenc") or ""
+        for pattern, (area, label) in PAYROLL_FREQUENCIES.items():
+            if re.search(rf"(?<![\w-]){pattern}", freq_text, re.I):
+                areas[area] = label
+
+    wt_codes = set(WT_CODE.findall(_section_text(answers.get("4"))))
+    wt_rows = sum(len(t) for t in (answers.get("4") or {}).get("tables", []))
+    benefits_text = _section_text(answers.get("7")) or (_find(answers.get("4"), r"voluntary") or "")
+    garn_answers = [a for a in (answers.get("8") or {}).get("answers", {}).values() if a]
+    garn_answer = _find(answers.get("8"), r"garnishment types|types|garnish")
+
+    toggles = parse_toggles(answers.get("1A"))
+    if "mid_year" not in toggles:
+        golive = _find(s1, r"go-?live")
+        if golive:
+            toggles["mid_year"] = not re.search(r"\b(jan(uary)?\.?\s*0?1\b|01/01|1/1)\b", golive, re.I)
+
+    union_answer = _find(s1, r"union")
+    profile = {
+        "id": profile_id,
+        "code": code or _initials(name),
+        "name": need("name", name, "Unknown Company"),
+        "industry": need("industry", industry, "Other"),
+        "employees": need("employees", _first_int(_find(s1, r"headcount|employees")), 1),
+        "company_code": need("company_code", (re.findall(r"\b\w{4}\b", _find(s2, r"company code") or "") or [None])[0], "1000"),
+        "pas": need("pas", pas, {}),
+        "psas": need("psas", psas, []),
+        "ee_subgroups": need("ee_subgroups", subgroups, {}),
+        "payroll_areas": need("payroll_areas", areas, {"B1": "Biweekly"}),
+        "unions": need("unions", _yes(union_answer), False),
+        "states": need("states", states, []),
+        "benefits": parse_benefits(benefits_text),
+        "wt_count": max(len(wt_codes), wt_rows) or need("wt_count", None, DEFAULT_WT_COUNT),
+        "garnishments": _yes(garn_answer) if garn_answer else any(_yes(a) for a in garn_answers),
+        "mid_year": need("mid_year", toggles.get("mid_year"), False),
+        "benefits_approach": need("benefits_approach", toggles.get("benefits_approach"), "full"),
+        "time_approach": need("time_approach", toggles.get("time_approach"), "full"),
+        "concurrent_employment": need("concurrent_employment", toggles.get("concurrent_employment"), False),
+    }
+    return profile, toggles, warnings
+
+
+def parse_questionnaire(path: str, profile_id: int = 1, code: Optional[str] = None) -> dict:
+    """Parse a completed questionnaire. Returns {"profile", "answers", "toggles",
+    "warnings", "errors", "sections_found"}; errors are profile_schema violations."""
+    from profile_schema import compile_profile_validator
+    answers = answer_map(read_sections(path))
+    profile, toggles, warnings = extract_profile(answers, profile_id, code)
+    found = sorted((s for s in answers if s != "0"), key=lambda s: (int(re.sub(r"\D", "", s)), s))
+    expected = [str(n) for n in range(1, 16)] + ["1A"]
+    missing = [s for s in expected if s not in answers]
+    if missing:
+        warnings.append(f"sections not found: {', '.join(missing)}")
+    return {"profile": profile, "answers": answers, "toggles": toggles, "warnings": warnings,
+            "errors": compile_profile_validator()(profile), "sections_found": found}
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    result = parse_questionnaire(sys.argv[1])
+    print(json.dumps(result["profile"], indent=2))
+    for w in result["warnings"]:
+        print(f"warning: {w}", file=sys.stderr)
+    for e in result["errors"]:
+        print(f"error: {e}", file=sys.stderr)
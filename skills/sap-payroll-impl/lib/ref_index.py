@@ -0,0 +1,217 @@
+"""
+Reference Retrieval Index for SAP Payroll Implementation Toolkit
+================================================================
+Lexical (BM25) index over references/*.md so prompts carry only the passages
+relevant to the question instead of every reference document.
+
+- Documents are chunked at headings (#, ##, ###); each chunk keeps its heading
+  path ("garnishments.md › CCPA Priority Rules (Federal) › Child Support Details")
+  and heading words are weighted into the chunk's terms
+- Tokens keep SAP identifiers intact ("/101", "it0194", "v_t511", "401k")
+- The index is persisted to ref_index.json next to this module together with a
+  fingerprint of the reference files; it is rebuilt automatically when they change
+- retrieve(query, k, token_budget) returns the top passages that fit the budget
+
+Usage:
+    from ref_index import retrieve, format_passages
+    passages = retrieve("child support CCPA priority", k=4, token_budget=800)
+    prompt = format_passages(passages) + "\n\n" + prompt
+
+    python ref_index.py build                       # rebuild the persisted index
+    python ref_index.py query "CA daily overtime"   # inspect what a query pulls in
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from typing import Optional
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+REFERENCES_DIR = os.path.join(LIB_DIR, "..", "references")
+INDEX_FILE = os.path.join(LIB_DIR, "ref_index.json")
+
+K1 = 1.5
+B = 0.75
+HEADING_WEIGHT = 2  # heading terms count this many times in a chunk
+MAX_CHUNK_CHARS = 2400  # longer sections are split at blank lines
+CHARS_PER_TOKEN = 4
+
+HEADING = re.compile(r"^(#{1,3})\s+(.*\S)\s*$")
+TOKEN = re.compile(r"/?[a-z0-9][a-z0-9_]*")
+STOPWORDS = frozenset("""a an and are as at be by for from has have if in into is it its of on or per
+that the their then there these this to was were when which will with all any can may must not
+only other so such than each also but do does""".split())
+
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def _split_long(body: str) -> list:
+    if len(body) <= MAX_CHUNK_CHARS:
+        return [body]
+    parts, current = [], ""
+    for para in re.split(r"\n\s*\n", body):
+        if current and len(current) + len(para) > MAX_CHUNK_CHARS:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_markdown(text: str, source: str) -> list:
+    """[{"source", "heading", "text"}] — one chunk per ###-or-higher section."""
+    chunks, path, lines = [], [], []
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            heading = " › ".join([source] + path)
+            for part in _split_long(body):
+                chunks.append({"source": source, "heading": heading, "text": part})
+        lines.clear()
+
+    for line in text.splitlines():
+        m = HEADING.match(line)
+        if m:
+            flush()
+            level = len(m.group(1))
+            path[:] = path[:level - 1] + [m.group(2)]
+        else:
+            lines.append(line)
+    flush()
+    return chunks
+
+
+def references_fingerprint(references_dir: str = REFERENCES_DIR) -> str:
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(references_dir)):
+        if name.endswith(".md"):
+            h.update(name.encode())
+            with open(os.path.join(references_dir, name), "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+class RefIndex:
+    """BM25 over heading chunks. Build with RefIndex.build(), or RefIndex.load() the persisted one."""
+
+    def __init__(self, chunks: list, postings: dict, lengths: list, fingerprint: str = ""):
+        self.chunks = chunks
+        self.postings = postings  # term -> [[chunk_id, tf], ...]
+        self.lengths = lengths
+        self.avgdl = sum(lengths) / len(lengths) if lengths else 0.0
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, references_dir: str = REFERENCES_DIR) -> "RefIndex":
+        chunks = []
+        for name in sorted(os.listdir(references_dir)):
+            if name.endswith(".md"):
+                with open(os.path.join(references_dir, name)) as f:
+                    chunks.extend(chunk_markdown(f.read(), name))
+        postings, lengths = {}, []
+        for i, chunk in enumerate(chunks):
+            heading_terms = tokenize(chunk["heading"].replace(".md", ""))
+            terms = tokenize(chunk["text"]) + heading_terms * HEADING_WEIGHT
+            lengths.append(len(terms))
+            tf = {}
+            for t in terms:
+                tf[t] = tf.get(t, 0) + 1
+            for t, n in tf.items():
+                postings.setdefault(t, []).append([i, n])
+        return cls(chunks, postings, lengths, references_fingerprint(references_dir))
+
+    def save(self, path: str = INDEX_FILE):
+        data = {"fingerprint": self.fingerprint, "chunks": self.chunks,
+                "lengths": self.lengths, "postings": self.postings}
+        with open(path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE, references_dir: str = REFERENCES_DIR) -> "RefIndex":
+        """Persisted index if it matches the current reference files, else a fresh build
+        (saved back when the location is writable)."""
+        fingerprint = references_fingerprint(references_dir)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("fingerprint") == fingerprint:
+                return cls(data["chunks"], data["postings"], data["lengths"], fingerprint)
+        index = cls.build(references_dir)
+        try:
+            index.save(path)
+        except OSError:
+            pass
+        return index
+
+    def search(self, query: str, k: int = 5) -> list:
+        """Top-k (score, chunk_id) by BM25."""
+        n = len(self.chunks)
+        scores = {}
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for cid, tf in plist:
+                norm = tf + K1 * (1 - B + B * self.lengths[cid] / self.avgdl)
+                scores[cid] = scores.get(cid, 0.0) + idf * tf * (K1 + 1) / norm
+        return sorted(((s, cid) for cid, s in scores.items()), key=lambda x: (-x[0], x[1]))[:k]
+
+    def retrieve(self, query: str, k: int = 4, token_budget: Optional[int] = None) -> list:
+        """Up to k passages {"source", "heading", "text", "score"}, best first, whose
+        combined text fits token_budget (passages that would overflow are skipped)."""
+        out, used = [], 0
+        for score, cid in self.search(query, k * 3 if token_budget else k):
+            chunk = self.chunks[cid]
+            cost = (len(chunk["heading"]) + len(chunk["text"])) // CHARS_PER_TOKEN + 4
+            if token_budget and used + cost > token_budget:
+                continue
+            out.append(dict(chunk, score=round(score, 3)))
+            used += cost
+            if len(out) >= k:
+                break
+        return out
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_index() -> RefIndex:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = RefIndex.load()
+        return _default
+
+
+def retrieve(query: str, k: int = 4, token_budget: Optional[int] = None) -> list:
+    """Relevant reference passages for query from the persisted index."""
+    return default_index().retrieve(query, k, token_budget)
+
+
+def format_passages(passages: list) -> str:
+    if not passages:
+        return ""
+    parts = [f"[{p['heading']}]\n{p['text']}" for p in passages]
+    return "<reference_passages>\n" + "\n\n".join(parts) + "\n</reference_passages>"
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        idx = RefIndex.build()
+        idx.save()
+        print(f"Indexed {len(idx.chunks)} chunks, {len(idx.postings)} terms → {INDEX_FILE}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "query":
+        for p in retrieve(" ".join(sys.argv[2:]), k=5, token_budget=1500):
+            print(f"{p['score']:6.2f}  {p['heading']}  ({len(p['text'])} chars)")
+    else:
+        print("usage: ref_index.py build | query <text>")
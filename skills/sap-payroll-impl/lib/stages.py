@@ -0,0 +1,329 @@
+"""
+Stage Executor for SAP Payroll Implementation Toolkit
+=====================================================
+Runs the command stages (questionnaire → QA → funcspec → config workbook →
+migration file → briefing) as a cached build graph, so a revised
+questionnaire or a hand-edited workbook only re-runs the stages it affects.
+
+Each Stage declares its input files, output files and upstream stages. Its
+fingerprint hashes the input files (including the lib modules that implement
+it), its parameters and the output hashes of its upstream stages. A stage is
+skipped when the manifest holds the same fingerprint and its outputs are still
+on disk unchanged; its cached result is then handed downstream as if it had
+run. Because downstream stages key on upstream *outputs*, a stage that re-runs
+and produces the same content does not invalidate the rest of the graph.
+
+.xlsx/.docx files are hashed from the zip central directory (member names and
+CRC-32s, docProps/core.xml excluded), so the save timestamp alone is not a change
+and no member needs decompressing.
+
+Stages run on pipeline.run_graph: independent ones in parallel, the QA verdict
+as gate. Every run rewrites the manifest (run_manifest.json in the output
+directory) with per-stage status, fingerprints, outputs, results and timings.
+
+Usage:
+    from stages import implementation_stages, run_stages, format_stages
+    stages = implementation_stages("Questionnaire_Acme.docx", "out/", ai=PayrollAI())
+    run = run_stages(stages, "out/run_manifest.json")
+    print(format_stages(run))
+
+    python stages.py questionnaire.docx out/ [--force=qa,config] [--no-ai]
+"""
+
+import hashlib
+import json
+import os
+import time
+import zipfile
+from datetime import datetime
+from typing import Callable, Optional
+
+from pipeline import Node, run_graph, scope_summary, qa_verdict, _qa_items
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = "run_manifest.json"
+MANIFEST_VERSION = 1
+VOLATILE_MEMBERS = frozenset({"docProps/core.xml"})  # save timestamps
+
+
+class Stage:
+    """One cached step. fn receives {dep_name: dep_result} and returns a
+    JSON-serializable result; it must write every path in outputs (a list, or a
+    callable on the result for outputs named after what the stage found).
+
+    inputs: files whose content feeds the stage (add the implementing modules so
+    code changes invalidate it). params: JSON-serializable settings that feed it.
+    gate: predicate on the result; False stops everything downstream.
+    """
+
+    def __init__(self, name: str, fn: Callable[[dict], object], inputs=(), outputs=(), deps=(),
+                 params=None, gate: Optional[Callable[[object], bool]] = None):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = outputs if callable(outputs) else tuple(outputs)
+        self.deps = tuple(deps)
+        self.params = params
+        self.gate = gate
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={list(self.deps)})"
+
+
+def _hash(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(",", ":"),
+                                     default=str).encode()).hexdigest()[:16]
+
+
+def file_fingerprint(path: str) -> Optional[str]:
+    """Content hash of a file, None if it does not exist. Office files hash their
+    members' CRC-32s, skipping the volatile ones."""
+    if not os.path.exists(path):
+        return None
+    if path.endswith((".xlsx", ".docx")):
+        try:
+            with zipfile.ZipFile(path) as z:
+                return _hash(sorted((i.filename, i.CRC, i.file_size) for i in z.infolist()
+                                    if i.filename not in VOLATILE_MEMBERS))
+        except zipfile.BadZipFile:
+            pass
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def run_stages(stages: list, manifest_path: str, max_workers: int = 4, force=(),
+               on_event: Optional[Callable] = None) -> dict:
+    """Run stages, skipping those whose fingerprint matches the manifest.
+
+    force: stage names to re-run regardless. Returns the run_graph() dict plus
+    "stages": {name: manifest entry} and "manifest": path; the manifest is written
+    even when a stage fails.
+    """
+    previous = load_manifest(manifest_path).get("stages", {})
+    force = set(force)
+    entries = {}
+    started = datetime.now().isoformat(timespec="seconds")
+
+    def execute(stage, upstream):
+        inputs = {p: file_fingerprint(p) for p in stage.inputs}
+        missing = [p for p, fp in inputs.items() if fp is None]
+        if missing:
+            raise FileNotFoundError(f"missing inputs: {', '.join(missing)}")
+        fingerprint = _hash({"stage": stage.name, "params": stage.params, "inputs": inputs,
+                             "deps": {d: upstream[d]["output_hash"] for d in stage.deps}})
+        cached = previous.get(stage.name)
+        if (stage.name not in force and cached and cached.get("fingerprint") == fingerprint
+                and "result" in cached
+                and all(file_fingerprint(p) == fp for p, fp in cached.get("outputs", {}).items())):
+            entry = dict(cached, status="skipped", seconds=0.0)
+            entry.pop("gate", None)
+        else:
+            t0 = time.perf_counter()
+            result = stage.fn({d: upstream[d]["result"] for d in stage.deps})
+            paths = stage.outputs(result) if callable(stage.outputs) else stage.outputs
+            outputs = {p: file_fingerprint(p) for p in paths}
+            absent = [p for p, fp in outputs.items() if fp is None]
+            if absent:
+                raise RuntimeError(f"declared outputs not written: {', '.join(absent)}")
+            entry = {"status": "ran", "fingerprint": fingerprint, "inputs": inputs, "outputs": outputs,
+                     "output_hash": _hash({"outputs": outputs, "result": result}), "result": result,
+                     "seconds": round(time.perf_counter() - t0, 3)}
+        entries[stage.name] = entry
+        return entry
+
+    nodes = [Node(s.name, lambda up, s=s: execute(s, up), deps=s.deps,
+                  gate=(lambda e, g=s.gate: g(e["result"])) if s.gate else None)
+             for s in stages]
+    run = None
+    try:
+        run = run_graph(nodes, max_workers=max_workers, on_event=on_event)
+    finally:
+        manifest = {"version": MANIFEST_VERSION, "started": started, "stages": {}}
+        for s in stages:
+            entry = entries.get(s.name)
+            if entry is None:
+                # Not reached this run: keep the cache entry (its outputs are still
+                # valid for its fingerprint), drop it for stages that failed
+                entry = dict(previous.get(s.name, {}))
+            manifest["stages"][s.name] = entry
+        if run is not None:
+            for name, state in run["status"].items():
+                entry = manifest["stages"][name]
+                if state == "failed":
+                    entry.pop("fingerprint", None)
+                    entry["error"] = run["errors"][name]
+                if state == "gate_failed":
+                    entry["gate"] = "failed"
+                elif state != "done":
+                    entry["status"] = state
+            manifest.update({k: run[k] for k in ("wall_s", "sum_s", "critical_path_s", "critical_path",
+                                                 "gate_failed")})
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=1, default=str)
+    run["stages"] = manifest["stages"]
+    run["manifest"] = manifest_path
+    return run
+
+
+def format_stages(run: dict) -> str:
+    lines = [f"Stages: {run['wall_s']:.2f}s wall (critical path {run['critical_path_s']:.2f}s) → {run['manifest']}"]
+    for name, entry in run["stages"].items():
+        status = entry.get("status", "not run")
+        detail = f"{entry.get('seconds', 0):.2f}s" if status == "ran" else ""
+        if entry.get("gate") == "failed":
+            detail += " (gate failed)"
+        if entry.get("error"):
+            detail = entry["error"]
+        lines.append(f"  {name:<14} {status:<12} {detail}")
+    if run["gate_failed"]:
+        lines.append(f"  Gate {run['gate_failed']} failed — downstream stages not run")
+    return "\n".join(lines)
+
+
+# =========================================================================
+# COMMAND STAGES
+# =========================================================================
+
+def _module(name: str) -> str:
+    return os.path.join(LIB_DIR, name)
+
+
+def _write_json(path: str, obj):
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=1, sort_keys=True, default=str)
+
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+def implementation_stages(questionnaire: str, output_dir: str, ai=None, qa_report: Optional[str] = None,
+                          funcspec: Optional[str] = None, gate_on_qa: bool = True) -> list:
+    """Stages for the /payroll-implement flow from a completed questionnaire.
+
+    ai: PayrollAI for the AI-assisted steps (QA answer scoring and risk narrative,
+    funcspec summary and complexity, briefing); without it those steps are
+    deterministic only and the briefing stage is left out. qa_report / funcspec:
+    the .docx deliverables written by /payroll-qa and /payroll-funcspec, when they
+    exist — they become stage inputs and briefing artifacts.
+    """
+    from questionnaire_parser import parse_questionnaire
+
+    os.makedirs(output_dir, exist_ok=True)
+    out = lambda name: os.path.join(output_dir, name)
+    profile_path, answers_path = out("profile.json"), out("answers.json")
+    qa_path, funcspec_path = out("qa.json"), out("funcspec.json")
+
+    def parse(up):
+        result = parse_questionnaire(questionnaire)
+        _write_json(profile_path, result["profile"])
+        _write_json(answers_path, result["answers"])
+        return {"code": result["profile"]["code"], "name": result["profile"]["name"],
+                "warnings": result["warnings"], "errors": result["errors"]}
+
+    def answered_sections():
+        answers = _read_json(answers_path)
+        return {f"{sid} {sec['title']}".strip(): {q: a for q, a in sec["answers"].items() if a}
+                for sid, sec in answers.items() if sid != "0"}
+
+    def qa(up):
+        from gap_rules import evaluate_gaps
+        sections = answered_sections()
+        # Profile errors block generation; predicted gaps are conditions to resolve, not failures
+        findings = [{"severity": "Critical", "finding": e} for e in up["questionnaire"]["errors"]]
+        gaps, ambiguous = evaluate_gaps(sections)
+        findings += [{"severity": "Warning", "finding": g["gap"], "evidence": g["evidence"]} for g in gaps]
+        report = {"findings": findings, "gaps": gaps, "ambiguous": ambiguous}
+        quality = []
+        if ai is not None:
+            quality = ai.analyze_response_quality_batch(_qa_items(sections))
+            report["risk_narrative"] = ai.generate_risk_narrative(findings)
+        report["verdict"] = qa_verdict(findings, quality)
+        _write_json(qa_path, report)
+        return {"status": report["verdict"]["status"], "findings": len(findings)}
+
+    def spec(up):
+        profile = _read_json(profile_path)
+        scope = scope_summary(profile)
+        doc = {"scope": scope}
+        if ai is not None:
+            doc["executive_summary"] = ai.generate_executive_summary(profile["name"], scope)
+            doc["complexity"] = ai.assess_complexity_risk(scope)
+        _write_json(funcspec_path, doc)
+        return {"states": len(scope.get("states", [])), "ai": ai is not None}
+
+    def config(up):
+        from config_conflicts import detect_conflicts, read_tabs
+        from gen_helpers import generate_config_workbook
+        profile = _read_json(profile_path)
+        path = out(f"SAP_Payroll_ConfigWorkbook_{profile['code']}.xlsx")
+        generate_config_workbook(profile, path, digest=True)
+        conflicts, _ = detect_conflicts(read_tabs(path), profile)
+        return {"workbook": path, "conflicts": len(conflicts)}
+
+    def migration(up):
+        from workbook_reader import migration_from_workbook
+        path = out(f"SAP_Payroll_Migration_{up['questionnaire']['code']}.xlsx")
+        result = migration_from_workbook(up["config"]["workbook"], path, digest=True)
+        return {"migration": path, "warnings": result["warnings"]}
+
+    def briefing(up):
+        artifacts = {"config_workbook": up["config"]["workbook"], "migration_file": up["migration"]["migration"]}
+        if qa_report:
+            artifacts["qa_report"] = qa_report
+        if funcspec:
+            artifacts["funcspec"] = funcspec
+        text = ai.generate_incremental_briefing(artifacts, _read_json(funcspec_path)["scope"])
+        path = out("executive_briefing.md")
+        with open(path, "w") as f:
+            f.write(text)
+        return {"briefing": path, "chars": len(text)}
+
+    ai_params = {"ai": ai is not None}
+    stages = [
+        Stage("questionnaire", parse, inputs=[questionnaire, _module("questionnaire_parser.py")],
+              outputs=[profile_path, answers_path]),
+        Stage("qa", qa, inputs=[_module("gap_rules.py"), _module("gap_rules.json")], outputs=[qa_path], deps=["questionnaire"], params=ai_params,
+              gate=(lambda r: r["status"] != "FAIL") if gate_on_qa else None),
+        Stage("funcspec", spec, outputs=[funcspec_path], deps=["questionnaire"], params=ai_params),
+        Stage("config", config, inputs=[_module("gen_helpers.py"), _module("config_conflicts.py")],
+              outputs=lambda r: [r["workbook"]], deps=["questionnaire", "qa"]),
+        Stage("migration", migration, inputs=[_module("gen_helpers.py"), _module("workbook_reader.py")],
+              outputs=lambda r: [r["migration"]], deps=["questionnaire", "config"]),
+    ]
+    if ai is not None:
+        stages.append(Stage("briefing", briefing, inputs=[p for p in (qa_report, funcspec) if p],
+                            outputs=[out("executive_briefing.md")], deps=["qa", "funcspec", "config", "migration"]))
+    return stages
+
+
+if __name__ == "__main__":
+    import sys
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) != 2:
+        print("usage: stages.py <questionnaire.docx> <output_dir> [--force=stage,...] [--no-ai]")
+        sys.exit(2)
+    force = next((a.split("=", 1)[1] for a in sys.argv if a.startswith("--force=")), "")
+    ai = None
+    if "--no-ai" not in sys.argv:
+        from ai_helper import PayrollAI
+        ai = PayrollAI()
+        ai = ai if ai.enabled else None
+    run = run_stages(implementation_stages(args[0], args[1], ai=ai),
+                     os.path.join(args[1], MANIFEST_NAME), force=[f for f in force.split(",") if f])
+    print(format_stages(run))
+    sys.exit(1 if run["errors"] else 0)
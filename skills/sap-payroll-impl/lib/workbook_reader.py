@@ -0,0 +1,222 @@
+"""
+Config Workbook Reader for SAP Payroll Implementation Toolkit
+=============================================================
+Reads a configuration workbook (from generate_config_workbook or
+/payroll-config-workbook) back into the COMPANIES-style profile dict, so
+/payroll-migration-file can chain generate_migration_file() straight off the
+workbook without interpreting the .xlsx.
+
+The workbook is opened read-only and only the tabs that carry profile facts
+are streamed:
+
+- Enterprise_Structure: company code, PSAs, EE subgroups (and PAs as fallback)
+- Payroll_Areas: PA code → state
+- Tax_Authorities: states
+- Wage_Type_Catalog: wt_count (row count; capped at the generator's catalog)
+- Benefits_Config: plan codes
+- Garnishment_Config / Pay_Scale_Structure: garnishment and union flags
+
+Fields that have no tab (name, industry, headcount, payroll area frequencies,
+Section 1A approach flags) come from the "payroll.*" custom document properties
+gen_helpers writes. Tabs win over properties, so hand edits to the workbook
+carry through. Workbooks without the properties fall back to defaults, each
+listed in "warnings".
+
+Usage:
+    from workbook_reader import read_profile, migration_from_workbook
+    result = read_profile("SAP_Payroll_ConfigWorkbook_ACME.xlsx")
+    result["profile"]   # gen_helpers-ready dict
+    result["sources"]   # {field: "Tab_Name" | "property" | "default"}
+    result["errors"]    # profile_schema violations (empty when valid)
+    migration_from_workbook("SAP_Payroll_ConfigWorkbook_ACME.xlsx", "Migration_ACME.xlsx")
+
+    python workbook_reader.py config.xlsx                 # print the profile as JSON
+    python workbook_reader.py config.xlsx migration.xlsx  # and generate the migration file
+"""
+
+import re
+from typing import Optional
+
+from config_conflicts import read_tabs
+from gen_helpers import PROFILE_PROPERTY_PREFIX
+
+PROFILE_TABS = frozenset({"Enterprise_Structure", "Payroll_Areas", "Tax_Authorities", "Wage_Type_Catalog",
+                          "Benefits_Config", "Garnishment_Config", "Pay_Scale_Structure", "AI_QA_Report"})
+
+# Used when neither a tab nor a document property provides the field
+DEFAULTS = {
+    "id": 1,
+    "industry": "Other",
+    "employees": 1,
+    "company_code": "1000",
+    "payroll_areas": {"B1": "Biweekly"},
+    "mid_year": False,
+    "benefits_approach": "full",
+    "time_approach": "full",
+    "concurrent_employment": False,
+}
+
+QA_NAME = re.compile(r"Config workbook for (.+?) generated")
+
+
+def _str(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _column(tab: Optional[dict], header: str, where=None) -> list:
+    """Non-empty values of one column, in row order, optionally filtered by a row predicate."""
+    if not tab:
+        return []
+    return [v for v in (_str(r.get(header)) for r in tab["rows"] if where is None or where(r)) if v]
+
+
+def _is_object(object_type: str):
+    return lambda r: _str(r.get("Config Object Type")) == object_type
+
+
+def read_properties(wb) -> dict:
+    """{field: value} from the payroll.* custom document properties."""
+    props = {}
+    for prop in getattr(wb, "custom_doc_props", None) or []:
+        if not prop.name.startswith(PROFILE_PROPERTY_PREFIX):
+            continue
+        field, value = prop.name[len(PROFILE_PROPERTY_PREFIX):], prop.value
+        if field == "payroll_areas" and isinstance(value, str):
+            value = dict(item.split("=", 1) for item in value.split(";") if "=" in item)
+        props[field] = value
+    return props
+
+
+def extract_profile(tabs: dict, props: dict):
+    """(profile, sources, warnings) from read_tabs() output and read_properties()."""
+    es = tabs.get("Enterprise_Structure")
+    profile, sources, warnings = {}, {}, []
+
+    def put(field, value, source):
+        if value in (None, "", [], {}):
+            if field in props:
+                value, source = props[field], "property"
+            elif field in DEFAULTS:
+                value, source = DEFAULTS[field], "default"
+                warnings.append(f"{field}: not found in workbook, defaulted to {value!r}")
+            else:
+                warnings.append(f"{field}: not found in workbook")
+                return
+        profile[field] = value
+        sources[field] = source
+
+    put("id", None, None)
+    qa_text = " ".join(_column(tabs.get("AI_QA_Report"), "Finding Description"))
+    m = QA_NAME.search(qa_text)
+    # The properties hold the name verbatim; the QA line is the fallback for older workbooks
+    put("name", props.get("name") or (m.group(1) if m else None),
+        "property" if "name" in props else "AI_QA_Report")
+    put("industry", None, None)
+    put("employees", None, None)
+    put("company_code", (_column(es, "BUKRS", _is_object("Company Code")) or [None])[0],
+        "Enterprise_Structure")
+    put("code", None, None)
+    if "code" not in profile and "name" in profile:
+        from questionnaire_parser import _initials
+        profile["code"], sources["code"] = _initials(profile["name"]), "name"
+        warnings[-1] += f", derived {profile['code']!r} from the company name"
+
+    # PAs: Payroll_Areas lists code → state; Enterprise_Structure has "{code} in {state}"
+    pas = {}
+    pa_tab = tabs.get("Payroll_Areas")
+    for r in (pa_tab or {}).get("rows", []):
+        code, state = _str(r.get("PA Code")), _str(r.get("PA Description"))
+        if code and state:
+            pas.setdefault(code, state)
+    pa_source = "Payroll_Areas"
+    if not pas:
+        for r in (es or {}).get("rows", []):
+            if _str(r.get("Config Object Type")) == "Payroll Area" and _str(r.get("WERKS")):
+                desc = _str(r.get("Description")) or ""
+                state = desc.rsplit(" in ", 1)[1] if " in " in desc else None
+                if state:
+                    pas.setdefault(_str(r["WERKS"]), state)
+        pa_source = "Enterprise_Structure"
+    put("pas", pas, pa_source)
+    put("psas", list(dict.fromkeys(_column(es, "BTRTL", _is_object("Personnel Sub-Area")))),
+        "Enterprise_Structure")
+    subgroups = {}
+    for r in (es or {}).get("rows", []):
+        if _str(r.get("Config Object Type")) == "Employee Subgroup" and _str(r.get("PERSK")):
+            subgroups.setdefault(_str(r["PERSK"]), _str(r.get("Description")) or _str(r["PERSK"]))
+    put("ee_subgroups", subgroups, "Enterprise_Structure")
+    put("payroll_areas", None, None)
+
+    scale_notes = _column(tabs.get("Pay_Scale_Structure"), "Notes")
+    unions = any("UNION" in n.upper() for n in scale_notes) if tabs.get("Pay_Scale_Structure") else None
+    put("unions", unions, "Pay_Scale_Structure")
+
+    states = [s for s in _column(tabs.get("Tax_Authorities"), "State") if s != "Federal"]
+    states = list(dict.fromkeys(states + [s for s in pas.values() if s not in states]))
+    put("states", states, "Tax_Authorities")
+    # An empty Benefits_Config is a real answer (no plans), not a missing field
+    if "Benefits_Config" in tabs:
+        profile["benefits"] = list(dict.fromkeys(_column(tabs["Benefits_Config"], "Plan Code")))
+        sources["benefits"] = "Benefits_Config"
+    else:
+        put("benefits", [], None)
+    put("wt_count", len(_column(tabs.get("Wage_Type_Catalog"), "LGART")) or None, "Wage_Type_Catalog")
+
+    garn_tab = tabs.get("Garnishment_Config")
+    garnishments = None
+    if garn_tab:
+        orders = [o for o in _column(garn_tab, "Order Type") if not o.lower().startswith("no garnishment")]
+        garnishments = bool(orders)
+    put("garnishments", garnishments, "Garnishment_Config")
+
+    for field in ("mid_year", "benefits_approach", "time_approach", "concurrent_employment"):
+        put(field, None, None)
+    return profile, sources, warnings
+
+
+def read_profile(path: str) -> dict:
+    """Read a config workbook. Returns {"profile", "sources", "warnings", "errors",
+    "tabs_found"}; errors are profile_schema violations."""
+    import openpyxl
+    from profile_schema import compile_profile_validator
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        tabs = read_tabs(wb, PROFILE_TABS)
+        props = read_properties(wb)
+    finally:
+        wb.close()
+    profile, sources, warnings = extract_profile(tabs, props)
+    missing = sorted(PROFILE_TABS - set(tabs))
+    if missing:
+        warnings.append(f"tabs not found: {', '.join(missing)}")
+    return {"profile": profile, "sources": sources, "warnings": warnings,
+            "errors": compile_profile_validator()(profile), "tabs_found": sorted(tabs)}
+
+
+def migration_from_workbook(config_path: str, output_path: str, digest: bool = False) -> dict:
+    """Read the config workbook and generate the migration file from it in one step.
+    Returns the read_profile() result; raises ValueError if the profile is invalid.
+    digest=True also writes the migration file's briefing digest."""
+    from gen_helpers import generate_migration_file
+    result = read_profile(config_path)
+    if result["errors"]:
+        raise ValueError(f"{config_path}: {'; '.join(result['errors'])}")
+    generate_migration_file(result["profile"], output_path, digest=digest)
+    return result
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    if len(sys.argv) > 2:
+        result = migration_from_workbook(sys.argv[1], sys.argv[2])
+    else:
+        result = read_profile(sys.argv[1])
+        print(json.dumps(result["profile"], indent=2))
+    for w in result["warnings"]:
+        print(f"warning: {w}", file=sys.stderr)
+    for e in result["errors"]:
+        print(f"error: {e}", file=sys.stderr)
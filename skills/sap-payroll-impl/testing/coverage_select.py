@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Covering-Array Profile Selector — minimal smoke waves with full interaction coverage.
+Greedily picks the smallest subset of a profile pool (hand-written and/or synthetic)
+that covers every t-wise combination of approach toggle values present in the pool,
+and reports which combinations the pool itself cannot reach.
+"""
+
+import sys
+from itertools import combinations, product
+
+from test_harness import COMPANIES
+
+# Approach toggles and their defaults (mirrors validator.run_validation defaults)
+TOGGLES = {
+    "benefits_approach": "full",
+    "time_approach": "full",
+    "unions": False,
+    "garnishments": False,
+    "mid_year": False,
+    "concurrent_employment": False,
+}
+
+# Full value domain per toggle, used to report combinations missing from the pool
+TOGGLE_DOMAINS = {
+    "benefits_approach": ["full", "hybrid", "deductions_only"],
+    "time_approach": ["full", "negative", "third_party"],
+    "unions": [False, True],
+    "garnishments": [False, True],
+    "mid_year": [False, True],
+    "concurrent_employment": [False, True],
+}
+
+
+def profile_tuples(profile, factors, t):
+    """All t-wise (factor, value) interactions exercised by one profile"""
+    values = [(f, profile.get(f, TOGGLES.get(f))) for f in factors]
+    return set(combinations(values, t))
+
+
+def select_covering(profiles, t=2, factors=None):
+    """Greedy t-wise covering subset of `profiles`.
+
+    Returns (selected_indices, report). Indices are 0-based positions in `profiles`,
+    so run IDs for wave_runner are index + 1. Ties break toward the earlier profile,
+    which keeps selection deterministic and prefers hand-written profiles when the
+    pool is COMPANIES + synthetic.
+    """
+    factors = list(factors or TOGGLES)
+    t = max(1, min(t, len(factors)))
+    per_profile = [profile_tuples(p, factors, t) for p in profiles]
+    universe = set().union(*per_profile) if per_profile else set()
+
+    covered = set()
+    selected = []
+    gains = []
+    while covered != universe:
+        best, best_gain = None, 0
+        for i, tuples in enumerate(per_profile):
+            gain = len(tuples - covered)
+            if gain > best_gain:
+                best, best_gain = i, gain
+        selected.append(best)
+        gains.append(best_gain)
+        covered |= per_profile[best]
+
+    # Interactions in the full toggle domain that no profile in the pool exercises
+    domain_space = set()
+    for combo in combinations(factors, t):
+        domains = [[(f, v) for v in TOGGLE_DOMAINS.get(f, sorted({p.get(f) for p in profiles}, key=str))]
+                   for f in combo]
+        domain_space |= set(product(*domains))
+    unreachable = sorted(domain_space - universe, key=str)
+
+    report = {
+        "t": t,
+        "factors": factors,
+        "pool_size": len(profiles),
+        "selected_count": len(selected),
+        "selected": [{"run": i + 1, "code": profiles[i].get("code"), "new_tuples": g}
+                     for i, g in zip(selected, gains)],
+        "tuples_in_pool": len(universe),
+        "tuples_covered": len(covered),
+        "tuples_in_domain": len(domain_space),
+        "unreachable": [" & ".join(f"{f}={v}" for f, v in tup) for tup in unreachable],
+    }
+    return selected, report
+
+
+def print_coverage_report(report):
+    print(f"\n{'='*60}")
+    print(f"  {report['t']}-WISE COVERAGE SELECTION")
+    print(f"{'='*60}")
+    print(f"  Factors:   {', '.join(report['factors'])}")
+    print(f"  Pool:      {report['pool_size']} profiles")
+    print(f"  Selected:  {report['selected_count']} profiles")
+    print(f"  Coverage:  {report['tuples_covered']}/{report['tuples_in_pool']} interactions in pool "
+          f"({report['tuples_in_domain']} in full domain)")
+    print("\n  SELECTED RUNS (in pick order):")
+    for s in report["selected"]:
+        print(f"    Run {s['run']:02d} ({s['code']}): +{s['new_tuples']} interactions")
+    if report["unreachable"]:
+        print(f"\n  NOT EXERCISED BY ANY PROFILE IN POOL ({len(report['unreachable'])}):")
+        for u in report["unreachable"][:20]:
+            print(f"    {u}")
+        if len(report["unreachable"]) > 20:
+            print(f"    ... {len(report['unreachable']) - 20} more")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    t = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    pool = list(COMPANIES)
+    if len(sys.argv) > 3:
+        from profile_synth import synthesize_companies
+        pool += synthesize_companies(int(sys.argv[2]), int(sys.argv[3]))
+    _, rep = select_covering(pool, t)
+    print_coverage_report(rep)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+History-Driven Wave Prioritizer — run the likeliest failures first.
+Scores each candidate run from the error registry: recent failures of the same
+profile, toggle similarity to recently failing profiles, and checks touched by
+recent spec patches. wave_runner.run_wave(prioritize=True) runs in score order
+and stops once the covered share of predicted failure mass reaches a confidence
+threshold.
+"""
+
+from coverage_select import TOGGLES
+
+# Recency decay per wave of age (age 0 = most recent wave)
+DECAY = 0.5
+# Noisy-OR weights for each signal
+W_RECENT_FAIL = 0.6
+W_SIMILAR = 0.3
+W_PATCHED = 0.4
+# Floor so never-failed runs still get ordered (and sampled) rather than ignored
+BASE_RISK = 0.02
+DEFAULT_CONFIDENCE = 0.9
+
+# Conditional checks only apply to profiles with these toggles (see validator.run_validation)
+CHECK_APPLIES = {
+    "CW-07": lambda p: p.get("unions"),
+    "MF-17": lambda p: p.get("unions"),
+    "MF-05": lambda p: p.get("benefits_approach", "full") != "deductions_only",
+    "MF-06a": lambda p: p.get("garnishments"),
+    "MF-06b": lambda p: p.get("mid_year"),
+    "MF-22": lambda p: p.get("concurrent_employment"),
+    "MF-23": lambda p: p.get("time_approach", "full") != "full",
+}
+
+
+def _toggle_similarity(a, b):
+    same = sum(1 for f, d in TOGGLES.items() if a.get(f, d) == b.get(f, d))
+    return same / len(TOGGLES)
+
+
+def _patched_checks(reg):
+    """{check_id: weight} for checks addressed by spec patches, decayed by waves run since.
+    Patches are placed by "after_wave" when recorded, else by timestamp."""
+    waves = reg.get("waves", [])
+    weights = {}
+    for patch in reg.get("spec_patches", []):
+        ea = patch.get("errors_addressed")
+        if not isinstance(ea, list):
+            continue
+        if "after_wave" in patch:
+            age = sum(1 for w in waves if w["wave"] > patch["after_wave"])
+        else:
+            age = sum(1 for w in waves if w.get("timestamp", "") > patch.get("timestamp", ""))
+        w = DECAY ** age
+        for err in ea:
+            check_id = err.split(":")[0]
+            weights[check_id] = max(weights.get(check_id, 0), w)
+    return weights
+
+
+def score_runs(reg, profiles, run_ids):
+    """Predicted failure likelihood per run. Returns [(run_id, likelihood, reasons)] sorted high → low."""
+    waves = reg.get("waves", [])
+    by_code = {q.get("code"): q for q in profiles}
+
+    # Per-profile recent failure weight and check history, keyed by profile code
+    fail_weight = {}
+    failed_checks = {}
+    failing_profiles = []  # (registry result, recency weight)
+    for age, wave in enumerate(reversed(waves)):
+        w = DECAY ** age
+        for r in wave.get("results", []):
+            if not r.get("fails"):
+                continue
+            code = r.get("code")
+            fail_weight[code] = max(fail_weight.get(code, 0), w)
+            for f in r["fails"]:
+                failed_checks.setdefault(code, set()).add(f.split(":")[0])
+            failing_profiles.append((r, w))
+    patched = _patched_checks(reg)
+
+    scored = []
+    for run_id in run_ids:
+        p = profiles[run_id - 1]
+        code = p.get("code")
+        reasons = []
+
+        recent = fail_weight.get(code, 0)
+        if recent:
+            reasons.append(f"failed {recent:.2f}-weighted recently")
+
+        similar = 0
+        for r, w in failing_profiles:
+            if r.get("code") == code:
+                continue
+            # Registry results only carry the two approach toggles; fall back to the profile pool
+            other = by_code.get(r.get("code"), r)
+            similar = max(similar, _toggle_similarity(p, other) * w)
+        if similar >= 0.5:
+            reasons.append(f"toggles like failing runs ({similar:.2f})")
+
+        patch_hit = 0
+        for check_id, w in patched.items():
+            if check_id in failed_checks.get(code, ()):
+                patch_hit = max(patch_hit, w)
+            elif check_id in CHECK_APPLIES and CHECK_APPLIES[check_id](p):
+                patch_hit = max(patch_hit, w * 0.5)
+        if patch_hit:
+            reasons.append(f"touches patched checks ({patch_hit:.2f})")
+
+        miss = (1 - BASE_RISK) * (1 - W_RECENT_FAIL * recent) * (1 - W_SIMILAR * similar) * (1 - W_PATCHED * patch_hit)
+        scored.append((run_id, round(1 - miss, 4), reasons))
+
+    scored.sort(key=lambda x: (-x[1], x[0]))
+    return scored
+
+
+class EarlyStop:
+    """Tracks covered predicted-failure mass while a prioritized wave runs.
+
+    should_stop() turns true once the runs completed so far account for `confidence`
+    of the total predicted likelihood. A failure in a run scored below the median
+    means the model is off for this wave, so early stopping is disabled.
+    """
+
+    def __init__(self, scored, confidence=DEFAULT_CONFIDENCE):
+        self.confidence = confidence
+        self.likelihood = {run_id: lk for run_id, lk, _ in scored}
+        self.total = sum(self.likelihood.values()) or 1
+        ordered = sorted(self.likelihood.values())
+        self.median = ordered[len(ordered) // 2] if ordered else 0
+        self.covered = 0
+        self.surprised = False
+
+    def observe(self, run_id, failed):
+        lk = self.likelihood.get(run_id, 0)
+        self.covered += lk
+        if failed and lk < self.median:
+            self.surprised = True
+
+    def coverage(self):
+        return self.covered / self.total
+
+    def should_stop(self):
+        return not self.surprised and self.coverage() >= self.confidence
+
+
+if __name__ == "__main__":
+    import sys
+    from test_harness import COMPANIES
+    from wave_runner import load_registry
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    ranked = score_runs(load_registry(), COMPANIES, list(range(1, len(COMPANIES) + 1)))
+    for run_id, lk, reasons in ranked[:top]:
+        print(f"  Run {run_id:02d} ({COMPANIES[run_id - 1]['code']}): {lk:.3f}  {'; '.join(reasons)}")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Synthetic Company Profile Generator — scale and load testing for the battery.
+Produces any number of company dicts in the same schema as test_harness.COMPANIES,
+with controllable distributions and reproducible seeding, for use as an
+alternative profile source in wave_runner.run_wave.
+
+Every numeric knob accepts either a fixed int or an inclusive (lo, hi) range.
+Toggle knobs accept a probability (booleans) or a {value: weight} dict (approaches).
+"""
+
+import os
+import sys
+import math
+import random
+import string
+
+from test_harness import COMPANIES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+from gen_helpers import STATE_GEOCODES
+
+# ============================================================
+# POOLS (derived from the hand-written battery where possible)
+# ============================================================
+
+ALL_STATES = [s for s in STATE_GEOCODES if s != "Federal"]
+INDUSTRIES = sorted({c["industry"] for c in COMPANIES})
+PSA_POOL = sorted({p for c in COMPANIES for p in c["psas"]})
+SUBGROUP_POOL = {}
+for _c in COMPANIES:
+    for _code, _desc in _c["ee_subgroups"].items():
+        SUBGROUP_POOL.setdefault(_code, _desc)
+BENEFIT_POOL = ["MED1", "DEN1", "VIS1", "401K", "LIFE", "MED2", "ROTH", "HSA1", "FSA1", "STD1", "LTD1"]
+PAYROLL_AREA_POOL = {"W1": "Weekly", "B1": "Biweekly", "S1": "Semi-monthly", "M1": "Monthly"}
+
+DEFAULTS = {
+    "employees": (50, 50000),      # sampled log-uniform
+    "states": (1, 10),
+    "pas": (1, 8),
+    "psas": (2, 6),
+    "ee_subgroups": (2, 6),
+    "payroll_areas": (1, 3),
+    "benefits": (4, 11),
+    "wt_count": (30, 55),
+    "unions": 0.4,
+    "garnishments": 0.6,
+    "mid_year": 0.5,
+    "concurrent_employment": 0.1,
+    "benefits_approach": {"full": 0.6, "hybrid": 0.2, "deductions_only": 0.2},
+    "time_approach": {"full": 0.6, "negative": 0.2, "third_party": 0.2},
+}
+
+
+def _pick_int(rng, spec, log=False):
+    if isinstance(spec, int):
+        return spec
+    lo, hi = spec
+    if log and lo > 0:
+        return int(round(math.exp(rng.uniform(math.log(lo), math.log(hi)))))
+    return rng.randint(lo, hi)
+
+
+def _pick_weighted(rng, weights):
+    if isinstance(weights, str):
+        return weights
+    values = list(weights)
+    return rng.choices(values, weights=[weights[v] for v in values])[0]
+
+
+# Hand-written codes are reserved so registry history never conflates the two pools
+_RESERVED_CODES = {c["code"] for c in COMPANIES}
+SYNTH_CODES = [a + b + c for a in string.ascii_uppercase for b in string.ascii_uppercase
+               for c in string.ascii_uppercase if a + b + c not in _RESERVED_CODES]
+
+
+def _code_for(index):
+    """Unique 3-letter company code for a synthetic profile index (wraps after ~17,500)"""
+    return SYNTH_CODES[index % len(SYNTH_CODES)]
+
+
+def _extend_codes(pool, count, prefix):
+    """Take from a code pool, then pad with generated codes if count exceeds it"""
+    codes = list(pool[:count])
+    n = 1
+    while len(codes) < count:
+        candidate = f"{prefix}{n:03d}"
+        if candidate not in codes:
+            codes.append(candidate)
+        n += 1
+    return codes
+
+
+def synthesize_company(index, seed=0, start_id=1001, **overrides):
+    """Build one synthetic profile. Same (index, seed, overrides) → same profile."""
+    cfg = dict(DEFAULTS, **overrides)
+    rng = random.Random(f"{seed}:{index}")
+
+    code = _code_for(index)
+    industry = rng.choice(INDUSTRIES)
+
+    n_states = min(_pick_int(rng, cfg["states"]), len(ALL_STATES))
+    states = rng.sample(ALL_STATES, n_states)
+
+    # At least one PA per operating state, as in every hand-written profile
+    n_pas = max(_pick_int(rng, cfg["pas"]), n_states)
+    pas = {f"{code}{i + 1}": states[i % len(states)] for i in range(n_pas)}
+
+    n_psas = _pick_int(rng, cfg["psas"])
+    psas = _extend_codes(rng.sample(PSA_POOL, min(len(PSA_POOL), n_psas)), n_psas, "P")
+
+    # S1/H1 lead every real profile; the rest are sampled from the battery's subgroups
+    n_sub = max(1, _pick_int(rng, cfg["ee_subgroups"]))
+    extra = [s for s in SUBGROUP_POOL if s not in ("S1", "H1")]
+    sub_codes = _extend_codes(["S1", "H1"] + rng.sample(extra, min(len(extra), max(0, n_sub - 2))), n_sub, "X")
+    ee_subgroups = {s: SUBGROUP_POOL.get(s, f"Subgroup {s}") for s in sub_codes}
+
+    n_areas = min(_pick_int(rng, cfg["payroll_areas"]), len(PAYROLL_AREA_POOL))
+    area_codes = sorted(rng.sample(list(PAYROLL_AREA_POOL), n_areas))
+    payroll_areas = {a: PAYROLL_AREA_POOL[a] for a in area_codes}
+
+    n_ben = min(_pick_int(rng, cfg["benefits"]), len(BENEFIT_POOL))
+    # Core plans (medical/dental/vision/401k) first, optional plans sampled after
+    benefits = BENEFIT_POOL[:min(n_ben, 4)] + rng.sample(BENEFIT_POOL[4:], max(0, n_ben - 4))
+
+    return {
+        "id": start_id + index, "code": code, "name": f"{code} Synthetic {industry}",
+        "industry": industry, "employees": _pick_int(rng, cfg["employees"], log=True),
+        "company_code": rng.choice(["1000", "2000", "3000"]),
+        "pas": pas,
+        "psas": psas,
+        "ee_subgroups": ee_subgroups,
+        "payroll_areas": payroll_areas,
+        "unions": rng.random() < cfg["unions"], "states": states,
+        "benefits": benefits,
+        "wt_count": _pick_int(rng, cfg["wt_count"]),
+        "garnishments": rng.random() < cfg["garnishments"],
+        "mid_year": rng.random() < cfg["mid_year"],
+        "benefits_approach": _pick_weighted(rng, cfg["benefits_approach"]),
+        "time_approach": _pick_weighted(rng, cfg["time_approach"]),
+        "concurrent_employment": rng.random() < cfg["concurrent_employment"],
+    }
+
+
+def synthesize_companies(count, seed=0, start_id=1001, **overrides):
+    """Build `count` synthetic profiles. Profile i is stable for a given seed regardless of count.
+
+    Example — 2,000 profiles spanning every state count up to all 51:
+        synthesize_companies(2000, seed=7, states=(1, 51), pas=(1, 60))
+
+    Or run a wave over them (files are generated since none exist on disk yet):
+        run_wave(wave_num, 1, 200, generate=True, profiles=synthesize_companies(200, seed=7))
+    """
+    return [synthesize_company(i, seed, start_id, **overrides) for i in range(count)]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    profiles = synthesize_companies(n, seed, states=(1, len(ALL_STATES)))
+    print(f"=== {len(profiles)} Synthetic Profiles (seed {seed}) ===")
+    for key in ["employees", "wt_count"]:
+        print(f"  {key}: {min(p[key] for p in profiles)} - {max(p[key] for p in profiles)}")
+    for key in ["states", "pas", "psas", "ee_subgroups", "payroll_areas", "benefits"]:
+        print(f"  {key}: {min(len(p[key]) for p in profiles)} - {max(len(p[key]) for p in profiles)}")
+    for key in ["unions", "garnishments", "mid_year", "concurrent_employment"]:
+        print(f"  {key}: {sum(1 for p in profiles if p[key])} / {len(profiles)}")
+    for key in ["benefits_approach", "time_approach"]:
+        dist = {}
+        for p in profiles:
+            dist[p[key]] = dist.get(p[key], 0) + 1
+        print(f"  {key}: {dict(sorted(dist.items()))}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Budget checks for prompt_compact.compact_payload: a large, repetitive workbook-style
+payload must come out within the token budget it is given, with a _refs legend
+that holds only refs the truncated data still uses.
+
+Run with pytest, or directly: python test_prompt_compact.py
+"""
+
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+from prompt_compact import compact_payload, estimate_tokens
+
+BUDGETS = (200, 500, 2000, 8000)
+
+
+def _workbook_payload(tabs=10, rows=200):
+    return {f"Tab_{t}": [{"Config Object Type": "Personnel Sub-Area assignment row",
+                          "Description": f"Standard description text for tab {t} row {i % 7}",
+                          "IMG Path": "SPRO > Personnel Management > Personnel Administration",
+                          "Notes": f"note {i}"} for i in range(rows)]
+            for t in range(tabs)}
+
+
+def test_compact_payload_fits_budget():
+    payload = _workbook_payload()
+    for budget in BUDGETS:
+        text = compact_payload(payload, budget)
+        assert estimate_tokens(text) <= budget, (budget, estimate_tokens(text))
+        json.loads(text)
+
+
+def test_refs_legend_only_holds_used_refs():
+    for budget in BUDGETS:
+        encoded = json.loads(compact_payload(_workbook_payload(), budget))
+        if "_refs" in encoded:
+            used = set(re.findall(r'"(&\d+)"', json.dumps(encoded["data"])))
+            assert set(encoded["_refs"]) == used, budget
+
+
+def test_compact_payload_within_budget_is_untruncated():
+    payload = _workbook_payload(tabs=2, rows=3)
+    assert compact_payload(payload, 100000) == compact_payload(payload)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  {name}: ok")
@@ -8,9 +8,15 @@ Includes v1.0 plugin checks for migration files and config workbook.
 
 import openpyxl
 import json
+import os
 import re
+import sys
 from collections import defaultdict
 
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib")
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+
 # ESSION anti-pattern list
 ESSION_PATTERNS = [
     "MESSION", "PESSION", "PAESSION", "AESSION", "VESSION",
@@ -297,6 +303,16 @@ def run_validation(config_file, migration_file, company_spec):
         cw_checks.append({"id": "CW-10", "name": "Tax rates populated", "pass": False,
                           "detail": "Tax Authorities sheet not found"})
 
+    # CW-11: Work schedule rules referenced by the structure and IT0007 are defined (CC-07)
+    from config_conflicts import detect_conflicts, read_tabs
+    wsr_tabs = read_tabs(cwb, {"Enterprise_Structure", "Work_Schedule_Rules"})
+    wsr_tabs.update(read_tabs(mwb, {"IT0007_WorkTime"}))
+    undefined = [k for c in detect_conflicts(wsr_tabs)[0] if c["check"] == "CC-07" for k in c["keys"]]
+    cw_checks.append({"id": "CW-11", "name": "Work schedule rules defined", "pass": not undefined,
+                      "detail": f"Undefined: {undefined[:5]}" if undefined else "All referenced rules defined"})
+    if undefined:
+        cw_issues.append(f"Work schedule rules referenced but not defined: {', '.join(undefined)}")
+
     # ============ MIGRATION FILE CHECKS ============
 
     # MF-01: ESSION check
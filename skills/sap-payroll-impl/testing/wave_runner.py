@@ -8,18 +8,27 @@ import json
 import os
 import sys
 import datetime
+import time
+import tracemalloc
 from collections import defaultdict, Counter
-from test_harness import COMPANIES
+from test_harness import REGISTRY, validate_profiles
 from validator import run_validation
 
 REGISTRY_FILE = "error_registry.json"
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib")
+
+# Validation-time regression threshold for final_report (percent slower than the
+# same run in the previous wave). Deltas under REGRESSION_MIN_DELTA_S are noise.
+REGRESSION_PCT = 25.0
+REGRESSION_MIN_DELTA_S = 0.05
 
 
 def load_registry():
     if os.path.exists(REGISTRY_FILE):
         with open(REGISTRY_FILE) as f:
             return json.load(f)
-    return {"version": "1.0.0", "waves": [], "errors": {}, "spec_patches": [], "score_history": []}
+    return {"version": "1.0.0", "waves": [], "errors": {}, "spec_patches": [], "score_history": [],
+            "perf_history": []}
 
 
 def save_registry(reg):
@@ -27,17 +36,53 @@ def save_registry(reg):
         json.dump(reg, f, indent=2)
 
 
-def validate_run(run_id):
-    """Validate a single run and return structured results"""
-    c = COMPANIES[run_id - 1]
+def run_files(run_id, c):
+    """Config + migration file names for a run"""
+    code = c["code"]
+    return f"run{run_id:02d}_config_{code}.xlsx", f"run{run_id:02d}_migration_{code}.xlsx"
+
+
+def generate_run(run_id, profiles=None):
+    """Generate config + migration files for a run with gen_helpers. Returns elapsed seconds."""
+    if LIB_DIR not in sys.path:
+        sys.path.insert(0, LIB_DIR)
+    from gen_helpers import generate_config_workbook, generate_migration_file
+
+    c = (profiles or REGISTRY.all())[run_id - 1]
+    config_file, migration_file = run_files(run_id, c)
+    t0 = time.perf_counter()
+    generate_config_workbook(c, config_file)
+    generate_migration_file(c, migration_file)
+    return time.perf_counter() - t0
+
+
+def _traced_peak(config_file, migration_file, c):
+    """Peak traced Python allocations (bytes) over one extra, untimed validation pass."""
+    tracemalloc.start()
+    try:
+        run_validation(config_file, migration_file, c)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def validate_run(run_id, gen_seconds=None, profiles=None, trace_memory=False):
+    """Validate a single run and return structured results.
+    profiles: alternative profile list (e.g. profile_synth output); defaults to COMPANIES.
+    trace_memory=True adds a second, tracemalloc-traced pass for peak_mem_mb (None
+    otherwise); validate_s always times the untraced pass."""
+    c = (profiles or REGISTRY.all())[run_id - 1]
     code = c["code"]
-    config_file = f"run{run_id:02d}_config_{code}.xlsx"
-    migration_file = f"run{run_id:02d}_migration_{code}.xlsx"
+    config_file, migration_file = run_files(run_id, c)
 
     if not os.path.exists(config_file) or not os.path.exists(migration_file):
         return None
 
+    t0 = time.perf_counter()
     results = run_validation(config_file, migration_file, c)
+    validate_s = time.perf_counter() - t0
+    # Tracing slows validation several times over, so it never overlaps the timed pass
+    peak = _traced_peak(config_file, migration_file, c) if trace_memory else None
     summary = results.get("summary", {})
 
     # Extract failed check IDs
@@ -60,22 +105,108 @@ def validate_run(run_id):
         "passed": summary.get("total_pass", 0),
         "total": summary.get("total_checks", 0),
         "status": summary.get("validation_status", "ERROR"),
-        "fails": fails
+        "fails": fails,
+        "perf": {
+            "generate_s": round(gen_seconds, 3) if gen_seconds is not None else None,
+            "validate_s": round(validate_s, 3),
+            "config_kb": round(os.path.getsize(config_file) / 1024, 1),
+            "migration_kb": round(os.path.getsize(migration_file) / 1024, 1),
+            "peak_mem_mb": round(peak / (1024 * 1024), 1) if peak is not None else None,
+        }
     }
 
 
-def run_wave(wave_num, start_run, end_run):
-    """Validate all runs in a wave and update registry"""
+def generate_and_validate(run_id, generate=False, profiles=None, cwd=None, trace_memory=False):
+    """One wave run: optionally regenerate, then validate. cwd: directory holding the
+    run files, for callers running this in another process (worker.py's pool)."""
+    if cwd:
+        os.chdir(cwd)
+    gen_seconds = generate_run(run_id, profiles) if generate else None
+    return validate_run(run_id, gen_seconds, profiles, trace_memory)
+
+
+def summarize_perf(wave_results):
+    """Aggregate per-run perf records into a wave-level perf summary"""
+    perfs = [r["perf"] for r in wave_results if r.get("perf")]
+    if not perfs:
+        return {}
+    val = [p["validate_s"] for p in perfs]
+    gen = [p["generate_s"] for p in perfs if p.get("generate_s") is not None]
+    mem = [p["peak_mem_mb"] for p in perfs if p.get("peak_mem_mb") is not None]
+    return {
+        "validate_s_total": round(sum(val), 3),
+        "validate_s_avg": round(sum(val) / len(val), 3),
+        "validate_s_max": round(max(val), 3),
+        "generate_s_total": round(sum(gen), 3) if gen else None,
+        "generate_s_avg": round(sum(gen) / len(gen), 3) if gen else None,
+        "config_kb_avg": round(sum(p["config_kb"] for p in perfs) / len(perfs), 1),
+        "migration_kb_avg": round(sum(p["migration_kb"] for p in perfs) / len(perfs), 1),
+        "peak_mem_mb_max": max(mem) if mem else None,
+    }
+
+
+def run_wave(wave_num, start_run, end_run, generate=False, profiles=None, run_ids=None,
+             prioritize=False, confidence=None, executor=None, trace_memory=False):
+    """Validate all runs in a wave and update registry.
+    generate=True regenerates each run's files with gen_helpers first and records generation time.
+    profiles: alternative profile source indexed by run_id - 1 (defaults to test_harness.COMPANIES).
+    run_ids: explicit, possibly non-contiguous runs (e.g. a coverage_select subset); overrides the range.
+    prioritize=True orders runs by predicted failure likelihood from registry history; with
+    confidence (0-1) set, the wave stops once that share of predicted failure mass has run.
+    executor: concurrent.futures executor to run the runs on (e.g. worker.py's warm
+    process pool); results are still reported in run order. Ignored with early stopping.
+    trace_memory=True records each run's peak_mem_mb from an extra traced validation pass."""
     reg = load_registry()
+    if run_ids is None:
+        run_ids = list(range(start_run, end_run + 1))
+        runs_label = f"{start_run}-{end_run}"
+    else:
+        runs_label = ",".join(str(r) for r in run_ids)
+
+    # Schema gate: reject malformed profiles before spending time generating/validating
+    pool = profiles or REGISTRY.all()
+    problems = validate_profiles([pool[r - 1] for r in run_ids])
+    if problems:
+        print(f"  {len(problems)} profile schema problems — wave not started:")
+        for code, err in problems[:20]:
+            print(f"    {code}: {err}")
+        return
+
+    early_stop = None
+    if prioritize:
+        from prioritizer import score_runs, EarlyStop
+        scored = score_runs(reg, pool, run_ids)
+        run_ids = [run_id for run_id, _, _ in scored]
+        if confidence is not None:
+            early_stop = EarlyStop(scored, confidence)
+        print("  Prioritized order: " + ", ".join(f"{r}({lk:.2f})" for r, lk, _ in scored[:10])
+              + (" ..." if len(scored) > 10 else ""))
 
     wave_results = []
-    for run_id in range(start_run, end_run + 1):
-        result = validate_run(run_id)
+    skipped_runs = []
+    if executor is not None and early_stop is None:
+        cwd = os.getcwd()
+        outcomes = executor.map(generate_and_validate, run_ids, [generate] * len(run_ids),
+                                [profiles] * len(run_ids), [cwd] * len(run_ids),
+                                [trace_memory] * len(run_ids))
+    else:
+        outcomes = (generate_and_validate(run_id, generate, profiles, trace_memory=trace_memory)
+                    for run_id in run_ids)
+    for n, (run_id, result) in enumerate(zip(run_ids, outcomes)):
         if result:
             wave_results.append(result)
-            print(f"  Run {run_id:02d} ({result['code']}): {result['score']}% — {result['status']}")
+            print(f"  Run {run_id:02d} ({result['code']}): {result['score']}% — {result['status']}"
+                  f"  [validate {result['perf']['validate_s']:.2f}s]")
         else:
             print(f"  Run {run_id:02d}: FILES NOT FOUND — skipping")
+        if early_stop:
+            early_stop.observe(run_id, bool(result and result["fails"]))
+            if early_stop.should_stop():
+                skipped_runs = run_ids[n + 1:]
+                if skipped_runs:
+                    print(f"  Confidence {early_stop.coverage():.0%} >= {early_stop.confidence:.0%} — "
+                          f"stopping early, {len(skipped_runs)} low-risk runs skipped")
+                break
 
     if not wave_results:
         print("No results to process")
@@ -110,7 +241,7 @@ def run_wave(wave_num, start_run, end_run):
     # Record wave
     wave_data = {
         "wave": wave_num,
-        "runs": f"{start_run}-{end_run}",
+        "runs": runs_label,
         "timestamp": datetime.datetime.now().isoformat(),
         "count": len(wave_results),
         "avg_score": round(avg, 1),
@@ -121,16 +252,34 @@ def run_wave(wave_num, start_run, end_run):
         "min_score": min(scores) if scores else 0,
         "max_score": max(scores) if scores else 0,
         "top_failures": fail_counter.most_common(10),
+        "perf": summarize_perf(wave_results),
         "results": wave_results
     }
+    if prioritize:
+        wave_data["prioritized"] = {
+            "confidence": confidence,
+            "order": [r["run"] for r in wave_results],
+            "skipped": skipped_runs,
+        }
     reg["waves"].append(wave_data)
     reg["score_history"].append({"wave": wave_num, "avg": round(avg, 1), "perfect": perfect, "count": len(wave_results)})
+    perf = wave_data["perf"]
+    reg.setdefault("perf_history", []).append({
+        "wave": wave_num,
+        "count": len(wave_results),
+        "validate_avg": perf["validate_s_avg"],
+        "validate_max": perf["validate_s_max"],
+        "generate_avg": perf["generate_s_avg"],
+        "config_kb_avg": perf["config_kb_avg"],
+        "migration_kb_avg": perf["migration_kb_avg"],
+        "peak_mem_mb": perf["peak_mem_mb_max"],
+    })
 
     save_registry(reg)
 
     # Print wave report
     print(f"\n{'='*60}")
-    print(f"  WAVE {wave_num} SUMMARY (Runs {start_run}-{end_run})")
+    print(f"  WAVE {wave_num} SUMMARY (Runs {runs_label})")
     print(f"{'='*60}")
     print(f"  Average Score:  {avg:.1f}%")
     print(f"  Perfect (100%): {perfect}/{len(wave_results)}")
@@ -138,6 +287,11 @@ def run_wave(wave_num, start_run, end_run):
     print(f"  >= 90%:         {above90}/{len(wave_results)}")
     print(f"  < 90%:          {below90}/{len(wave_results)}")
     print(f"  Min: {min(scores):.1f}%  Max: {max(scores):.1f}%")
+    mem = f"  Peak mem: {perf['peak_mem_mb_max']} MB" if perf["peak_mem_mb_max"] is not None else ""
+    print(f"  Validate: {perf['validate_s_total']:.2f}s total, {perf['validate_s_avg']:.2f}s avg, "
+          f"{perf['validate_s_max']:.2f}s max{mem}")
+    if perf["generate_s_total"] is not None:
+        print(f"  Generate: {perf['generate_s_total']:.2f}s total, {perf['generate_s_avg']:.2f}s avg")
     print()
 
     if fail_counter:
@@ -155,6 +309,9 @@ def run_wave(wave_num, start_run, end_run):
         print(f"\n  WAVE-OVER-WAVE:")
         print(f"    Avg Score: {prev['avg']}% → {curr['avg']}% ({'+'if delta>=0 else ''}{delta:.1f}%)")
         print(f"    Perfect:   {prev['perfect']} → {curr['perfect']}")
+        perf_hist = reg["perf_history"]
+        if len(perf_hist) >= 2 and perf_hist[-2]["wave"] == prev["wave"]:
+            print(f"    Validate:  {perf_hist[-2]['validate_avg']:.2f}s → {perf_hist[-1]['validate_avg']:.2f}s avg/run")
 
     # Identify errors that persist across waves (need spec fix)
     persistent = []
@@ -206,7 +363,28 @@ def mark_errors_fixed(error_ids, patch_description):
     print(f"Marked {len(error_ids)} errors as fixed: {patch_description}")
 
 
-def final_report():
+def find_perf_regressions(reg, threshold_pct=REGRESSION_PCT):
+    """Compare each run's validation time with the same run in its previous wave.
+    Returns [(wave, run, code, prev_s, curr_s, pct)] for slowdowns above threshold_pct."""
+    last_seen = {}
+    regressions = []
+    for wave in reg["waves"]:
+        for r in wave.get("results", []):
+            perf = r.get("perf")
+            if not perf:
+                continue
+            key = (r["run"], r["code"])
+            prev = last_seen.get(key)
+            curr_s = perf["validate_s"]
+            if prev and prev > 0:
+                pct = (curr_s - prev) / prev * 100
+                if pct > threshold_pct and curr_s - prev >= REGRESSION_MIN_DELTA_S:
+                    regressions.append((wave["wave"], r["run"], r["code"], prev, curr_s, round(pct, 1)))
+            last_seen[key] = curr_s
+    return regressions
+
+
+def final_report(regress_pct=REGRESSION_PCT):
     """Generate a final summary across all waves"""
     reg = load_registry()
 
@@ -230,6 +408,24 @@ def final_report():
     print(f"\n  OVERALL IMPROVEMENT: {first['avg']}% → {last['avg']}% ({'+' if improvement >= 0 else ''}{improvement:.1f}%)")
     print(f"  PERFECT SCORES:     {first['perfect']} → {last['perfect']}")
 
+    # Performance trend (only waves recorded with timing data)
+    perf_hist = reg.get("perf_history", [])
+    if perf_hist:
+        slowest = max(h["validate_avg"] for h in perf_hist) or 1
+        print("\n  WAVE-BY-WAVE PERFORMANCE (avg validate s/run):")
+        for h in perf_hist:
+            bar = "█" * int(h["validate_avg"] / slowest * 30)
+            gen = f"  gen {h['generate_avg']:.2f}s" if h.get("generate_avg") is not None else ""
+            mem = f"  mem {h['peak_mem_mb']} MB" if h.get("peak_mem_mb") is not None else ""
+            print(f"    Wave {h['wave']}: {bar:<30} {h['validate_avg']:.2f}s (max {h['validate_max']:.2f}s)"
+                  f"{gen}  files {h['config_kb_avg'] + h['migration_kb_avg']:.0f} KB{mem}")
+
+        regressions = find_perf_regressions(reg, regress_pct)
+        if regressions:
+            print(f"\n  VALIDATION TIME REGRESSIONS (> {regress_pct:g}% slower than previous wave):")
+            for wave, run, code, prev_s, curr_s, pct in regressions:
+                print(f"    Wave {wave} Run {run:02d} ({code}): {prev_s:.2f}s → {curr_s:.2f}s (+{pct}%)")
+
     # Error resolution stats
     total_errors = len(reg["errors"])
     fixed_errors = sum(1 for e in reg["errors"].values() if e.get("fixed"))
@@ -249,10 +445,15 @@ def final_report():
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
-        print("  python wave_runner.py validate <wave_num> <start_run> <end_run>")
+        print("  python wave_runner.py validate <wave_num> <start_run> <end_run> [--generate]"
+              " [--synthetic <count> <seed>] [--trace-memory]")
+        print("  python wave_runner.py smoke <wave_num> [t] [--generate] [--synthetic <count> <seed>]"
+              " [--trace-memory]")
+        print("  python wave_runner.py priority <wave_num> <start_run> <end_run> [confidence] [--generate]"
+              " [--trace-memory]")
         print("  python wave_runner.py errors")
         print("  python wave_runner.py fix <error_ids_comma_sep> <description>")
-        print("  python wave_runner.py report")
+        print("  python wave_runner.py report [regress_pct]")
         sys.exit(1)
 
     cmd = sys.argv[1]
@@ -260,7 +461,38 @@ if __name__ == "__main__":
         wave_num = int(sys.argv[2])
         start = int(sys.argv[3])
         end = int(sys.argv[4])
-        run_wave(wave_num, start, end)
+        opts = sys.argv[5:]
+        profiles = None
+        if "--synthetic" in opts:
+            from profile_synth import synthesize_companies
+            i = opts.index("--synthetic")
+            profiles = synthesize_companies(int(opts[i + 1]), int(opts[i + 2]))
+        # Synthetic profiles have no files on disk until generated
+        run_wave(wave_num, start, end, generate="--generate" in opts or profiles is not None,
+                 profiles=profiles, trace_memory="--trace-memory" in opts)
+    elif cmd == "smoke":
+        # Pairwise (or t-wise) covering subset of COMPANIES, optionally + synthetic pool
+        from coverage_select import select_covering, print_coverage_report
+        wave_num = int(sys.argv[2])
+        opts = sys.argv[3:]
+        t = int(opts[0]) if opts and opts[0].isdigit() else 2
+        pool = list(REGISTRY.all())
+        if "--synthetic" in opts:
+            from profile_synth import synthesize_companies
+            i = opts.index("--synthetic")
+            pool += synthesize_companies(int(opts[i + 1]), int(opts[i + 2]))
+        selected, report = select_covering(pool, t)
+        print_coverage_report(report)
+        run_wave(wave_num, None, None, generate="--generate" in opts or len(pool) > len(REGISTRY),
+                 profiles=pool, run_ids=sorted(i + 1 for i in selected), trace_memory="--trace-memory" in opts)
+    elif cmd == "priority":
+        wave_num = int(sys.argv[2])
+        start = int(sys.argv[3])
+        end = int(sys.argv[4])
+        opts = sys.argv[5:]
+        conf = next((float(o) for o in opts if not o.startswith("--")), None)
+        run_wave(wave_num, start, end, generate="--generate" in opts, prioritize=True, confidence=conf,
+                 trace_memory="--trace-memory" in opts)
     elif cmd == "errors":
         print(get_error_context_for_spec_update())
     elif cmd == "fix":
@@ -268,4 +500,4 @@ if __name__ == "__main__":
         desc = sys.argv[3]
         mark_errors_fixed(error_ids, desc)
     elif cmd == "report":
-        final_report()
+        final_report(float(sys.argv[2]) if len(sys.argv) > 2 else REGRESSION_PCT)
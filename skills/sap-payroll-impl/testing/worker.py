@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Worker — warm generation/validation daemon for cc-py-toolkit v1.0.
+Keeps openpyxl, gen_helpers, validator and the profile registry loaded in a
+process pool behind a Unix socket, so CI and interactive jobs skip interpreter
+startup and imports. Jobs are newline-delimited JSON requests, one JSON reply
+each; wave jobs run wave_runner.run_wave on the pool and return its report.
+
+Validate jobs skip tracemalloc (peak_mem_mb is None) unless a wave asks for
+"trace_memory", and single-run validate jobs are cached by the run files'
+content hash, so re-validating unchanged files is a lookup. When a .py file or
+a data file (SOURCE_DATA) in lib/ or testing/ changes, the pool is restarted
+and the cache dropped before the next job — the daemon never runs stale code.
+
+Usage:
+  python worker.py serve [--workers=N]                 # start the daemon (foreground)
+  python worker.py generate <run_id> [--validate]      # regenerate a run's files in the cwd
+  python worker.py validate <run_id>                   # validate a run's files in the cwd
+  python worker.py wave <wave_num> <start_run> <end_run> [--generate] [--trace-memory]
+  python worker.py ping | stop
+
+The socket is $PAYROLL_WORKER_SOCKET, or payroll-worker-<uid>.sock in the temp dir.
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.join(TESTING_DIR, "..", "lib")
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+
+DEFAULT_SOCKET = os.environ.get("PAYROLL_WORKER_SOCKET") or os.path.join(
+    tempfile.gettempdir(), f"payroll-worker-{os.getuid()}.sock")
+DEFAULT_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+def _warm():
+    """Pool initializer: silence generator prints and run one small company end to end
+    so openpyxl's lazily imported writer/reader paths are loaded before the first job."""
+    sys.stdout = open(os.devnull, "w")
+    from test_harness import REGISTRY
+    from wave_runner import generate_run, validate_run
+    smallest = min(REGISTRY.all(), key=lambda c: (len(c["pas"]) + len(c["psas"]), c["employees"]))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            validate_run(1, generate_run(1, [smallest]), [smallest])
+        finally:
+            os.chdir(cwd)
+
+
+def _ready():
+    time.sleep(0.05)  # keeps one process busy so the next warm-up call lands on another
+    return os.getpid()
+
+
+def _job(op, run_id, profiles, cwd):
+    """generate / validate / generate+validate for one run, in a pool process."""
+    from wave_runner import generate_and_validate, generate_run, run_files
+    os.chdir(cwd)
+    if op == "generate":
+        seconds = generate_run(run_id, profiles)
+        from test_harness import REGISTRY
+        c = (profiles or REGISTRY.all())[run_id - 1]
+        return {"run": run_id, "files": list(run_files(run_id, c)), "generate_s": round(seconds, 3)}
+    return generate_and_validate(run_id, op == "generate+validate", profiles)
+
+
+# Data files the jobs load at import time; run outputs (*.xlsx, *.digest.json, the
+# registry) are written next to them and must not count as source changes
+SOURCE_DATA = frozenset({"companies.json", "gap_rules.json", "ref_index.json"})
+
+
+def _source_stamp():
+    """(path, mtime) of every module and data file the jobs can load."""
+    stamp = []
+    for d in (LIB_DIR, TESTING_DIR):
+        for name in sorted(os.listdir(d)):
+            if name.endswith(".py") or name in SOURCE_DATA:
+                path = os.path.join(d, name)
+                stamp.append((path, os.path.getmtime(path)))
+    return tuple(stamp)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            t0 = time.perf_counter()
+            try:
+                reply = {"ok": True, "result": self.server.dispatch(json.loads(line))}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            reply["elapsed_s"] = round(time.perf_counter() - t0, 4)
+            self.wfile.write((json.dumps(reply, default=str) + "\n").encode())
+            self.wfile.flush()
+
+
+class WorkerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server dispatching jobs to a warm process pool."""
+
+    daemon_threads = True
+
+    def __init__(self, path=DEFAULT_SOCKET, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self.wave_lock = threading.Lock()
+        self.pool_lock = threading.Lock()
+        self.cache = {}  # (run files' hashes, profile) -> validate result
+        self.jobs = 0
+        self.restarts = 0
+        self._start_pool()
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _Handler)
+
+    def _start_pool(self):
+        from test_harness import REGISTRY
+        REGISTRY.all()  # loaded once, inherited by the forked pool
+        self.stamp = _source_stamp()
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("fork"),
+                                        initializer=_warm)
+        # Fork and warm the pool now, before the job that triggered it runs
+        for f in [self.pool.submit(_ready) for _ in range(self.workers)]:
+            f.result()
+
+    def _refresh(self):
+        """Restart the pool (and reload changed modules here) if any source changed."""
+        with self.pool_lock:
+            stamp = _source_stamp()
+            if stamp == self.stamp:
+                return
+            import importlib
+            self.pool.shutdown(wait=True)
+            # Dependencies enter sys.modules after their importers: reload in reverse
+            # so "from validator import run_validation" rebinds to the new function
+            roots = (os.path.realpath(LIB_DIR), os.path.realpath(TESTING_DIR))
+            for name, module in reversed(list(sys.modules.items())):
+                path = getattr(module, "__file__", None)
+                if not name.startswith("__") and path and os.path.dirname(os.path.realpath(path)) in roots:
+                    importlib.reload(module)
+            self.cache.clear()
+            self.restarts += 1
+            self._start_pool()
+
+    def _cache_key(self, run_id, profiles, cwd):
+        from stages import file_fingerprint
+        from test_harness import REGISTRY
+        from wave_runner import run_files
+        c = (profiles or REGISTRY.all())[run_id - 1]
+        hashes = [file_fingerprint(os.path.join(cwd, f)) for f in run_files(run_id, c)]
+        if None in hashes:
+            return None
+        return json.dumps([hashes, c], sort_keys=True, default=str)
+
+    def dispatch(self, request):
+        op = request.get("op")
+        self.jobs += 1
+        if op == "ping":
+            return {"pid": os.getpid(), "workers": self.workers, "jobs": self.jobs,
+                    "cached": len(self.cache), "restarts": self.restarts}
+        if op == "stop":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return "stopping"
+        self._refresh()
+        cwd = request.get("cwd") or os.getcwd()
+        profiles = request.get("profiles")
+        if op in ("generate", "validate", "generate+validate"):
+            run_ids = request.get("runs") or [request["run"]]
+            keys = [self._cache_key(r, profiles, cwd) if op == "validate" else None for r in run_ids]
+            pending = {r: self.pool.submit(_job, op, r, profiles, cwd)
+                       for r, key in zip(run_ids, keys) if key not in self.cache}
+            results = []
+            for r, key in zip(run_ids, keys):
+                if r in pending:
+                    result = pending[r].result()
+                    if key is not None and result is not None:
+                        self.cache[key] = result
+                else:
+                    result = dict(self.cache[key], cached=True)
+                results.append(result)
+            return results if "runs" in request else results[0]
+        if op == "wave":
+            from wave_runner import run_wave
+            out = io.StringIO()
+            # run_wave reads the registry and run files from the cwd: one wave at a time
+            with self.wave_lock, contextlib.redirect_stdout(out):
+                os.chdir(cwd)
+                wave = run_wave(request["wave"], request.get("start"), request.get("end"),
+                                generate=request.get("generate", False), profiles=profiles,
+                                run_ids=request.get("run_ids"), executor=self.pool,
+                                trace_memory=request.get("trace_memory", False))
+            return {"report": out.getvalue(),
+                    "summary": {k: v for k, v in (wave or {}).items() if k != "results"}}
+        raise ValueError(f"unknown op {op!r}")
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(cancel_futures=True)
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)
+
+
+class WorkerClient:
+    """Thin client: WorkerClient().call("validate", run=3, cwd=".")"""
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, op, **params):
+        self.file.write((json.dumps(dict(params, op=op)) + "\n").encode())
+        self.file.flush()
+        reply = json.loads(self.file.readline())
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply["result"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def serve(path=DEFAULT_SOCKET, workers=DEFAULT_WORKERS):
+    server = WorkerServer(path, workers)
+    print(f"Payroll worker: {workers} warm processes on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    opts = [a for a in sys.argv[1:] if a.startswith("--")]
+    if not args:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    cmd = args[0]
+    if cmd == "serve":
+        workers = next((int(a.split("=", 1)[1]) for a in opts if a.startswith("--workers=")), DEFAULT_WORKERS)
+        serve(workers=workers)
+        sys.exit(0)
+    try:
+        client = WorkerClient()
+    except OSError:
+        print(f"No worker on {DEFAULT_SOCKET} — start one with: python worker.py serve", file=sys.stderr)
+        sys.exit(2)
+    cwd = os.getcwd()
+    if cmd in ("generate", "validate"):
+        op = "generate+validate" if cmd == "generate" and "--validate" in opts else cmd
+        result = client.call(op, run=int(args[1]), cwd=cwd)
+        print(json.dumps(result, indent=2))
+    elif cmd == "wave":
+        result = client.call("wave", wave=int(args[1]), start=int(args[2]), end=int(args[3]),
+                             generate="--generate" in opts, trace_memory="--trace-memory" in opts, cwd=cwd)
+        print(result["report"], end="")
+    else:
+        print(json.dumps(client.call(cmd), indent=2))
+    client.close()